@@ -1,118 +1,126 @@
 from pydantic_settings import BaseSettings
-
 from typing import List, Union
-
 from pydantic import Field, field_validator
-
 import json
-
 import os
 
-
-
 class Settings(BaseSettings):
-
     MONGODB_URL: str = Field(default="mongodb://localhost:27017", validation_alias="MONGO_URI")
-
     DATABASE_NAME: str = "solace_ai"
-
     
-
     SECRET_KEY: str = Field(default="your-secret-key-change-in-production", validation_alias="JWT_SECRET")
-
     ALGORITHM: str = "HS256"
-
+    METRICS_TOKEN: str = Field(default="")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
-
     REMEMBER_ME_TOKEN_EXPIRE_DAYS: int = 30
-
     
-
     CORS_ORIGINS: List[str] = Field(
-
         default=["http://localhost:3000"],
-
         validation_alias="CORS_ORIGINS"
-
     )
-
     
-
     @field_validator("CORS_ORIGINS", mode="before")
-
     @classmethod
-
     def parse_cors_origins(cls, v):
-
         """Parse CORS_ORIGINS from JSON string, comma-separated string, or list"""
-
         if isinstance(v, str):
-
             v = v.strip()
 
-
             if v.startswith('['):
-
                 try:
-
                     parsed = json.loads(v)
-
                     if isinstance(parsed, list):
 
-
                         return [url.rstrip('/') for url in parsed if url]
-
                 except json.JSONDecodeError:
-
                     pass
-
             
 
-
             origins = [origin.strip().rstrip('/') for origin in v.split(',') if origin.strip()]
-
             return origins
-
         
-
         if isinstance(v, list):
 
-
             return [url.rstrip('/') if isinstance(url, str) else url for url in v if url]
-
         
-
         return v
-
     
-
     GROQ_API_KEY: str = Field(default="")
-
+    LLM_API_URL: str = Field(default="https://api.groq.com/openai/v1/chat/completions")
+    LLM_MODEL: str = Field(default="llama-3.1-8b-instant")
+    LLM_INSIGHTS_MODE: str = Field(default="inline")
+    LLM_STREAMING: bool = Field(default=False)
+    LLM_RESPONSE_FORMAT: str = Field(default="text")
+    LLM_TIMEOUT_SECONDS: float = Field(default=30.0)
+    LLM_MAX_PROMPT_TOKENS: int = Field(default=1200)
+    LLM_MAX_COMPLETION_TOKENS: int = Field(default=800)
+    LLM_BATCH_SIZE: int = Field(default=5)
+    LLM_BATCH_MAX_COMPLETION_TOKENS: int = Field(default=8000)
+    LLM_PROMPT_COST_PER_MILLION: float = Field(default=0.05)
+    LLM_COMPLETION_COST_PER_MILLION: float = Field(default=0.08)
+    LLM_REQUESTS_PER_MINUTE: int = Field(default=30)
+    LLM_TOKENS_PER_MINUTE: int = Field(default=6000)
+    LLM_MAX_CONCURRENCY: int = Field(default=4)
+    LLM_MAX_QUEUE_WAIT_SECONDS: float = Field(default=120.0)
+    LLM_BREAKER_FAILURE_THRESHOLD: int = Field(default=5)
+    LLM_BREAKER_RECOVERY_SECONDS: float = Field(default=30.0)
+    LLM_BREAKER_HALF_OPEN_MAX_CALLS: int = Field(default=1)
+    
+    INSIGHT_CACHE_ENABLED: bool = Field(default=False)
+    INSIGHT_CACHE_TTL_SECONDS: int = Field(default=86400)
+    INSIGHT_CACHE_MAX_ENTRIES: int = Field(default=1000)
+    INSIGHT_CACHE_QUANTUM: float = Field(default=10.0)
+    INSIGHT_CACHE_TEXT_MODE: str = Field(default="hash")
+    INSIGHT_CACHE_MONGO: bool = Field(default=False)
+    
+    HTTP_TIMEOUT_SECONDS: float = Field(default=30.0)
+    HTTP_CONNECT_TIMEOUT_SECONDS: float = Field(default=5.0)
+    HTTP_MAX_CONNECTIONS: int = Field(default=20)
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = Field(default=10)
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = Field(default=60.0)
+    HTTP2_ENABLED: bool = Field(default=False)
     
-
     VIDEOS_DIR: str = Field(default="/tmp/solace_videos")
-
     MAX_FILE_SIZE_MB: int = Field(default=100)
-
     MAX_VIDEO_DURATION_SECONDS: int = Field(default=120)
-
     MIN_VIDEO_DURATION_SECONDS: int = Field(default=3)
-
     
-
     PDFS_DIR: str = Field(default="/tmp/solace_pdfs")
-
-
-
+    PDFS_MAX_MB: int = Field(default=1024)
+    PDFS_MAX_AGE_DAYS: int = Field(default=30)
+    PDF_EAGER_RENDER: bool = Field(default=False)
+    PDF_RENDER_WORKERS: int = Field(default=2)
+    PDF_RENDER_EXECUTOR: str = Field(default="thread")
+    EXPORT_MERGED_MAX_REPORTS: int = Field(default=200)
+    REPORT_GZIP_MIN_BYTES: int = Field(default=512)
+    
+    STORAGE_BACKEND: str = Field(default="local")
+    S3_ENDPOINT_URL: str = Field(default="")
+    S3_BUCKET: str = Field(default="solace")
+    S3_ACCESS_KEY_ID: str = Field(default="")
+    S3_SECRET_ACCESS_KEY: str = Field(default="")
+    S3_REGION: str = Field(default="us-east-1")
+    
+    VIDEOS_MAX_MB: int = Field(default=2048)
+    FAILED_VIDEO_RETENTION_HOURS: int = Field(default=24)
+    VIDEO_IN_FLIGHT_GRACE_MINUTES: int = Field(default=60)
+    
+    RETENTION_ENABLED: bool = Field(default=True)
+    RETENTION_INTERVAL_SECONDS: int = Field(default=600)
+
+    TASK_PROGRESS_MIN_INTERVAL_MS: int = Field(default=500)
+    TASK_EVENTS_BACKEND: str = Field(default="memory")
+    SSE_HEARTBEAT_SECONDS: int = Field(default=15)
+    TASK_STATUS_DB_POLL_SECONDS: float = Field(default=1.0)
+    STATUS_LONG_POLL_MAX_SECONDS: int = Field(default=30)
+    
+    DASHBOARD_SOURCE: str = Field(default="rollups")
+    DASHBOARD_CACHE_TTL_SECONDS: float = Field(default=30.0)
+    DASHBOARD_CACHE_STALE_SECONDS: float = Field(default=0.0)
+    
     class Config:
-
         env_file = ".env"
-
         case_sensitive = True
-
         extra = "ignore"
 
-
-
 settings = Settings()
-
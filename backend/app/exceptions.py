@@ -2,41 +2,21 @@
 Custom exceptions for the application
 """
 
-
-
 class VideoProcessingError(Exception):
-
     pass
 
-
-
 class AudioProcessingError(Exception):
-
     pass
 
-
-
 class LLMAPIError(Exception):
-
     pass
 
-
-
 class PDFGenerationError(Exception):
-
     pass
 
-
-
 class DatabaseError(Exception):
-
     pass
 
-
-
 class FileOperationError(Exception):
-
     pass
 
-
-
@@ -1,123 +1,65 @@
 """
 Logging middleware for structured logging with request IDs
 """
-
 import logging
-
 import time
-
 import uuid
-
 from fastapi import Request, Response
-
 from starlette.middleware.base import BaseHTTPMiddleware
-
 from starlette.types import ASGIApp
 
-
-
 logger = logging.getLogger(__name__)
 
-
-
 class RequestLoggingMiddleware(BaseHTTPMiddleware):
-
     """
     Middleware to add request ID to all logs and track request/response
     """
-
     
-
     async def dispatch(self, request: Request, call_next):
-
         request_id = str(uuid.uuid4())
-
         request.state.request_id = request_id
-
         
-
         start_time = time.time()
-
         
-
         logger.info(
-
             f"[{request_id}] {request.method} {request.url.path}",
-
             extra={
-
                 "request_id": request_id,
-
                 "method": request.method,
-
                 "path": request.url.path,
-
                 "client_ip": request.client.host if request.client else None,
-
             }
-
         )
-
         
-
         try:
-
             response = await call_next(request)
-
             
-
             duration = time.time() - start_time
-
             
-
             logger.info(
-
                 f"[{request_id}] {response.status_code} - {duration:.3f}s",
-
                 extra={
-
                     "request_id": request_id,
-
                     "status_code": response.status_code,
-
                     "duration_ms": int(duration * 1000),
-
                 }
-
             )
-
             
-
             response.headers["X-Request-ID"] = request_id
-
             
-
             return response
-
             
-
         except Exception as e:
-
             duration = time.time() - start_time
-
             logger.error(
-
                 f"[{request_id}] Request failed after {duration:.3f}s: {str(e)}",
-
                 extra={
-
                     "request_id": request_id,
-
                     "error": str(e),
-
                     "duration_ms": int(duration * 1000),
-
                 },
-
                 exc_info=True
-
             )
-
             raise
 
 
@@ -125,10 +67,3 @@ class RequestLoggingMiddleware(BaseHTTPMiddleware):
 
 
 
-
-
-
-
-
-
-
@@ -1,67 +1,52 @@
 from fastapi import APIRouter, HTTPException, status, Depends, UploadFile, File, Form, BackgroundTasks, Query, Header, Request
-
-from fastapi.responses import FileResponse
-
-from typing import Optional
-
-from datetime import datetime, timedelta
-
-from collections import Counter
-
+from fastapi.responses import FileResponse, StreamingResponse, Response
+from starlette.background import BackgroundTask
+from typing import Optional, List
+from datetime import date, datetime, timedelta
+from collections import deque
 from app.schemas.checkin import CheckInResponse, TaskStatus, CheckInDetail
-
 from app.database import get_checkins_collection, get_tasks_collection, get_users_collection
-
 from app.utils.auth import get_current_active_user
-
+from app.utils.http import make_etag, etag_matches, http_date, not_modified_since, if_range_matches, parse_byte_range, accepts_encoding, gzip_body
+from app.utils.zipstream import ZipStream
 from jose import jwt, JWTError
-
+from pymongo import ReturnDocument
 from app.config import settings
-
 from app.schemas.user import UserResponse
-
 from app.services.video_ml import analyze_video_frames
-
-from app.services.pdf_generator import generate_checkin_pdf
-
-from app.services.llm_insights import generate_insights
-
+from app.services.pdf_generator import generate_merged_pdf, find_report, render_cached_report, PDF_DIR
+from app.services.report_content import build_report_content, render_report_html, report_version
+from app.services.storage import get_storage, retain_video
+from app.services.llm_insights import generate_insights, generate_fallback_insights, INSIGHT_SECTIONS
+from app.services.progress import TaskProgressReporter
+from app.services.instrumentation import StageTimings, summarize_stage_timings
+from app.services.task_events import broker, build_task_event, format_sse_event, publish_task_event, TERMINAL_STATUSES
+from app.services.metrics import metrics as metrics_registry
+from app.services.dashboard import get_dashboard_metrics_cached, record_checkin_rollup, dashboard_cache
 from slowapi import Limiter
-
 from slowapi.util import get_remote_address
-
 import uuid
-
 import os
-
+import asyncio
+import csv
+import io
+import json
+import re
+import time
 import shutil
-
 from pathlib import Path
-
 import logging
 
-
-
 logger = logging.getLogger(__name__)
 
-
-
 limiter = Limiter(key_func=get_remote_address)
 
-
-
 router = APIRouter()
 
-
-
 VIDEOS_DIR = Path(settings.VIDEOS_DIR)
-
 VIDEOS_DIR.mkdir(parents=True, exist_ok=True)
 
-
-
 async def get_employee_name(emp_id: str) -> tuple[str, str]:
-
     """
     Get employee name from database by ID
     
@@ -71,45 +56,25 @@ async def get_employee_name(emp_id: str) -> tuple[str, str]:
     Returns:
         tuple: (full_name, email) - Full name and email of the employee
     """
-
     from bson import ObjectId
-
     users_collection = get_users_collection()
-
     
-
     try:
-
         user_doc = await users_collection.find_one({"_id": ObjectId(emp_id)})
-
     except Exception:
-
         user_doc = await users_collection.find_one({"_id": emp_id})
-
     
-
     if user_doc:
-
         first_name = user_doc.get("first_name", "")
-
         last_name = user_doc.get("last_name", "")
-
         full_name = f"{first_name} {last_name}".strip() or "Employee"
-
         email = user_doc.get("email", "")
-
         return full_name, email
-
     
-
     logger.warning(f"No user found for emp_id: {emp_id}")
-
     return "Employee", ""
 
-
-
 async def cleanup_video_file(video_path: str, max_retries: int = 3) -> bool:
-
     """
     Delete video file with retry logic
     
@@ -120,483 +85,448 @@ async def cleanup_video_file(video_path: str, max_retries: int = 3) -> bool:
     Returns:
         bool: True if deleted successfully, False otherwise
     """
-
     import asyncio
-
     
-
     for attempt in range(max_retries):
-
         try:
-
             if os.path.exists(video_path):
-
                 os.remove(video_path)
-
                 logger.info(f"Deleted video after processing: {video_path}")
-
                 return True
-
             else:
-
                 logger.warning(f"Video file not found for deletion: {video_path}")
-
                 return False
-
         except PermissionError as e:
-
             logger.warning(f"Permission error deleting video (attempt {attempt + 1}/{max_retries}): {e}")
-
             if attempt < max_retries - 1:
-
                 await asyncio.sleep(1)
-
                 continue
-
         except Exception as e:
-
             logger.error(f"Error deleting video (attempt {attempt + 1}/{max_retries}): {e}")
-
             if attempt < max_retries - 1:
-
                 await asyncio.sleep(1)
-
                 continue
-
     
-
     logger.error(f"Failed to delete video after {max_retries} attempts: {video_path}")
-
     return False
 
-
-
 async def get_user_from_token_or_header(
-
     token: Optional[str] = Query(None),
-
     authorization: Optional[str] = Header(None)
-
 ) -> UserResponse:
-
     """
     Get current user from either query parameter token or Authorization header
     Used for PDF downloads where browsers need query params
     """
-
     
-
     if token:
-
         token_str = token
-
     elif authorization and authorization.startswith("Bearer "):
-
         token_str = authorization.split(" ")[1]
-
     else:
-
         raise HTTPException(
-
             status_code=status.HTTP_401_UNAUTHORIZED,
-
             detail="Not authenticated"
-
         )
-
     
-
     try:
-
         payload = jwt.decode(token_str, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-
         email = payload.get("sub")
-
         if not email:
-
             raise HTTPException(
-
                 status_code=status.HTTP_401_UNAUTHORIZED,
-
                 detail="Invalid token"
-
             )
-
     except JWTError:
-
         raise HTTPException(
-
             status_code=status.HTTP_401_UNAUTHORIZED,
-
             detail="Could not validate credentials"
-
         )
-
     
-
     users_collection = get_users_collection()
-
     user = await users_collection.find_one({"email": email})
-
     
-
     if not user:
-
         raise HTTPException(
-
             status_code=status.HTTP_401_UNAUTHORIZED,
-
             detail="User not found"
-
         )
-
     
-
     return UserResponse(
-
         id=str(user["_id"]),
-
         email=user["email"],
-
         first_name=user.get("first_name", ""),
-
         last_name=user.get("last_name", ""),
-
         role=user.get("role", "employee"),
-
         is_active=user.get("is_active", True),
-
         created_at=user.get("created_at", datetime.utcnow()),
-
         updated_at=user.get("updated_at", datetime.utcnow())
-
     )
 
-
-
 async def process_video_task(task_id: str, video_path: str, emp_id: str, emp_email: str, notes: Optional[str], checkin_timestamp: datetime):
-
     """
     Background task to process video
     - Extracts metrics using ML pipeline
     - Generates PDF report
+    - With LLM_INSIGHTS_MODE=deferred, completes with fallback insights and
+      generates LLM insights afterwards (see enrich_checkin_insights)
     - Deletes video immediately after successful processing
+    - Records per-stage timings on the task document
     
     Args:
         checkin_timestamp: The exact timestamp when the user submitted the check-in
     """
-
-    tasks_collection = get_tasks_collection()
-
     checkins_collection = get_checkins_collection()
-
+    progress = TaskProgressReporter(task_id)
+    timings = StageTimings()
+    total_stage = timings.start("total")
     
-
     try:
-
-        await tasks_collection.update_one(
-
-            {"task_id": task_id},
-
-            {"$set": {
-
-                "status": "processing",
-
-                "progress": 10,
-
-                "message": "Extracting video frames...",
-
-                "updated_at": datetime.utcnow()
-
-            }}
-
+        await progress.update(
+            status="processing",
+            progress=10,
+            message="Extracting video frames..."
         )
-
         
-
         logger.info(f"Starting ML analysis for task {task_id}")
-
         
-
-        await tasks_collection.update_one(
-
-            {"task_id": task_id},
-
-            {"$set": {
-
-                "progress": 30,
-
-                "message": "Analyzing video with MediaPipe FaceMesh...",
-
-                "updated_at": datetime.utcnow()
-
-            }}
-
-        )
-
+        await progress.update(progress=30, message="Analyzing video with MediaPipe FaceMesh...")
         
-
+        facemesh_stage = timings.start("facemesh")
         try:
-
-            face_metrics = await analyze_video_frames(video_path)
-
+            face_metrics = await analyze_video_frames(
+                video_path,
+                progress_callback=progress.stage(30, 40, "Analyzing video with MediaPipe FaceMesh", unit="frames")
+            )
             logger.info(f"Video analysis complete: {face_metrics}")
-
         except Exception as e:
-
+            facemesh_stage.error = str(e)
             logger.error(f"Video analysis failed: {e}")
-
             face_metrics = {
-
                 "stress_avg": 0,
-
                 "yawns_count": 0,
-
                 "dress_compliance": 0,
-
                 "duration_seconds": 0,
-
                 "face_detected": False,
-
                 "error": str(e)
-
             }
-
-        
-
-        await tasks_collection.update_one(
-
-            {"task_id": task_id},
-
-            {"$set": {"status": "processing", "progress": 40, "message": "Analyzing audio and transcript...", "updated_at": datetime.utcnow()}}
-
+        facemesh_stage.finish()
+        facemesh_stage.set_input(
+            frames=face_metrics.get("total_frames"),
+            frames_processed=face_metrics.get("frames_processed"),
+            video_seconds=face_metrics.get("duration_seconds")
         )
-
         
-
+        await progress.update(status="processing", progress=40, message="Analyzing audio and transcript...")
+        
         try:
-
             from app.services.audio_ml import analyze_audio
-
-            audio_metrics = await analyze_audio(video_path)
-
+            audio_metrics = await analyze_audio(
+                video_path,
+                progress_callback=progress.stage(40, 80, "Analyzing audio and transcript"),
+                timings=timings
+            )
             logger.info(f"Audio analysis complete: {audio_metrics.get('word_count')} words transcribed")
-
         except Exception as e:
-
             logger.error(f"Audio analysis failed: {e}")
-
             audio_metrics = {
-
                 "transcript": "",
-
                 "word_count": 0,
-
                 "speaking_pace_wpm": 0,
-
                 "voice_energy": 0,
-
                 "pitch_variance": 0,
-
                 "pauses_count": 0,
-
                 "sentiment": "neutral",
-
                 "duration_seconds": 0,
-
                 "has_audio": False,
-
                 "error": str(e)
-
             }
-
         
-
         employee_name, _ = await get_employee_name(emp_id)
-
         
-
         combined_metrics = {
-
             **face_metrics,
-
             "audio": audio_metrics
-
         }
-
         
-
-        logger.info(f"Generating LLM insights for {employee_name}")
-
-        insights_result = await generate_insights(
-
-            metrics=combined_metrics,
-
-            notes=notes,
-
-            employee_name=employee_name
-
-        )
-
+        await progress.update(progress=80, message="Generating insights...")
         
-
-
-        logger.info(f"LLM insights generated successfully: {len(insights_result.get('recommendations', []))} recommendations")
-
+        deferred_insights = settings.LLM_INSIGHTS_MODE == "deferred"
+        llm_usage = None
+        if deferred_insights:
+            insights_result = generate_fallback_insights(combined_metrics, notes)
+            insights_status = "pending"
+            logger.info(f"LLM insights for {employee_name} deferred until after the check-in completes")
+        else:
+            logger.info(f"Generating LLM insights for {employee_name}")
+            with timings.stage("llm_insights") as insights_stage:
+                insights_stage.set_input(
+                    transcript_words=audio_metrics.get("word_count", 0),
+                    notes_chars=len(notes or "")
+                )
+                insights_result = await generate_insights(
+                    metrics=combined_metrics,
+                    notes=notes,
+                    employee_name=employee_name,
+                    on_section=progress_insight_sections(progress)
+                )
+            llm_usage = insights_result.pop("usage", None)
+            insights_status = "completed" if insights_result.get("source") == "llm" else "fallback"
+            logger.info(f"LLM insights generated successfully: {len(insights_result.get('recommendations', []))} recommendations")
         
-
         checkin_doc = {
-
             "emp_id": emp_id,
-
             "emp_email": emp_email,
-
             "task_id": task_id,
-
             "video_path": None,
-
             "status": "completed",
-
             "date": checkin_timestamp,
-
             "notes": notes,
-
             "metrics": combined_metrics,
-
             "insights": insights_result,
-
+            "insights_status": insights_status,
+            "llm_usage": llm_usage,
             "pdf_url": None,
-
             "created_at": checkin_timestamp,
-
             "updated_at": datetime.utcnow()
-
         }
-
         
-
         result = await checkins_collection.insert_one(checkin_doc)
-
         checkin_doc["_id"] = result.inserted_id
-
+        await record_checkin_rollup(checkin_doc)
+        dashboard_cache.invalidate()
         
-
-        pdf_path = None
-
-        try:
-
-            emp_name, _ = await get_employee_name(emp_id)
-
+        if settings.PDF_EAGER_RENDER:
+            await progress.update(progress=90, message="Generating report...")
             
+            try:
+                emp_name, _ = await get_employee_name(emp_id)
+                
+                with timings.stage("pdf_render") as pdf_stage:
+                    pdf_path = await render_cached_report(checkin_doc, emp_name, emp_email)
+                    pdf_stage.set_input(bytes=os.path.getsize(pdf_path))
+                
+                await checkins_collection.update_one(
+                    {"_id": result.inserted_id},
+                    {"$set": {"pdf_url": pdf_path}}
+                )
+                
+                logger.info(f"PDF generated and saved: {pdf_path}")
+            except Exception as pdf_error:
+                logger.error(f"Failed to generate PDF: {pdf_error}", exc_info=True)
+        
+        video_deleted = await cleanup_video_file(video_path)
+        total_stage.finish()
+        
+        await progress.complete(
+            result={
+                "checkin_id": str(checkin_doc["_id"]),
+                "metrics": checkin_doc["metrics"],
+                "insights_status": insights_status,
+                "video_deleted": video_deleted
+            },
+            message="Video processing complete, video deleted",
+            timings=timings.to_dict()
+        )
+        
+        if deferred_insights:
+            schedule_deferred_insights(task_id, checkin_doc["_id"])
+        
+    except Exception as e:
+        logger.error(f"❌ Processing failed for {video_path}, keeping video for debugging: {e}", exc_info=True)
+        retained_key = await retain_video(video_path)
+        if not retained_key:
+            logger.info(f"Failed video retained at: {video_path} for debugging")
+        
+        total_stage.finish()
+        total_stage.error = str(e)
+        
+        await progress.fail(
+            message=f"Error processing video: {str(e)}",
+            video_path=video_path,
+            retained_video=retained_key,
+            timings=timings.to_dict()
+        )
 
-            pdf_path = await generate_checkin_pdf(checkin_doc, emp_name, emp_email)
-
-            
-
-            await checkins_collection.update_one(
-
-                {"_id": result.inserted_id},
-
-                {"$set": {"pdf_url": pdf_path, "updated_at": datetime.utcnow()}}
-
-            )
-
-            
-
-            logger.info(f"PDF generated and saved: {pdf_path}")
-
-        except Exception as pdf_error:
-
-            logger.error(f"Failed to generate PDF: {pdf_error}", exc_info=True)
-
-        
-
-        video_deleted = await cleanup_video_file(video_path)
-
-        
-
-        await tasks_collection.update_one(
+def progress_insight_sections(progress: TaskProgressReporter):
+    """Section callback that streams insights through a running task's progress updates"""
+    preview = {}
+    
+    async def on_section(section: str, content):
+        preview[section] = content
+        await progress.update(
+            message=f"Generating insights ({len(preview)}/{len(INSIGHT_SECTIONS)} sections)...",
+            insights_preview=dict(preview)
+        )
+    
+    return on_section
 
+def task_insight_sections(task_id: str):
+    """Section callback that writes insights into an already completed task and publishes them"""
+    async def on_section(section: str, content):
+        task = await get_tasks_collection().find_one_and_update(
             {"task_id": task_id},
-
-            {"$set": {
-
-                "status": "completed",
-
-                "progress": 100,
-
-                "message": "Video processing complete, video deleted",
-
-                "result": {
-
-                    "checkin_id": str(checkin_doc["_id"]),
-
-                    "metrics": checkin_doc["metrics"],
-
-                    "video_deleted": video_deleted
-
-                },
-
-                "updated_at": datetime.utcnow()
-
-            }}
-
+            {"$set": {f"insights_preview.{section}": content, "updated_at": datetime.utcnow()}},
+            return_document=ReturnDocument.AFTER
         )
+        if task:
+            task.pop("_id", None)
+            publish_task_event(task_id, task)
+    
+    return on_section
+
+_deferred_insight_tasks: set = set()
+
+def insights_claim_timeout() -> float:
+    """Seconds after which a "generating" claim is considered abandoned (worst-case LLM budget)"""
+    return settings.LLM_MAX_QUEUE_WAIT_SECONDS + settings.LLM_TIMEOUT_SECONDS * 3 + 30
+
+def stale_claim_query(now: datetime) -> dict:
+    """Filter for check-ins whose insights are pending or whose generating claim has gone stale"""
+    stale_before = now - timedelta(seconds=insights_claim_timeout())
+    return {"$or": [
+        {"insights_status": "pending"},
+        {"insights_status": "generating", "insights_claimed_at": {"$lt": stale_before}},
+        {"insights_status": "generating", "insights_claimed_at": {"$exists": False}}
+    ]}
+
+async def _delayed_enrich(task_id: str, checkin_id, delay: float) -> bool:
+    await asyncio.sleep(delay)
+    return await enrich_checkin_insights(task_id, checkin_id)
+
+def schedule_deferred_insights(task_id: str, checkin_id, delay: float = 0) -> asyncio.Task:
+    """Run enrich_checkin_insights in the background, keeping a reference until it finishes"""
+    if delay > 0:
+        job = asyncio.create_task(_delayed_enrich(task_id, checkin_id, delay))
+    else:
+        job = asyncio.create_task(enrich_checkin_insights(task_id, checkin_id))
+    _deferred_insight_tasks.add(job)
+    job.add_done_callback(_deferred_insight_tasks.discard)
+    return job
 
+async def enrich_checkin_insights(task_id: str, checkin_id) -> bool:
+    """
+    Replace the fallback insights of a completed check-in with LLM insights
+    - Claims the check-in (insights_status pending -> generating, stamping insights_claimed_at)
+      so it is enriched once; a generating claim older than insights_claim_timeout() was
+      abandoned by a dead worker and may be taken over
+    - Writes the insights back and regenerates the PDF
+    - Updates the task result and publishes an event so status/stream clients see it
+    
+    Returns:
+        bool: True if LLM insights were stored
+    """
+    checkins_collection = get_checkins_collection()
+    started = time.perf_counter()
+    
+    now = datetime.utcnow()
+    checkin = await checkins_collection.find_one_and_update(
+        {"_id": checkin_id, **stale_claim_query(now)},
+        {"$set": {"insights_status": "generating", "insights_claimed_at": now}},
+        return_document=ReturnDocument.AFTER
+    )
+    if not checkin:
+        return False
+    
+    insights_status = "fallback"
+    try:
+        employee_name, _ = await get_employee_name(checkin["emp_id"])
+        insights_result = await generate_insights(
+            metrics=checkin["metrics"],
+            notes=checkin.get("notes"),
+            employee_name=employee_name,
+            on_section=task_insight_sections(task_id) if task_id else None
+        )
         
-
-    except Exception as e:
-
-        logger.error(f"❌ Processing failed for {video_path}, keeping video for debugging: {e}", exc_info=True)
-
-        logger.info(f"Failed video retained at: {video_path} for debugging")
-
+        update = {"insights_status": "fallback", "updated_at": datetime.utcnow()}
+        llm_usage = insights_result.pop("usage", None)
+        if llm_usage:
+            update["llm_usage"] = llm_usage
+        if insights_result.get("source") == "llm":
+            insights_status = "completed"
+            checkin["insights"] = insights_result
+            checkin["updated_at"] = update["updated_at"]
+            update.update({"insights": insights_result, "insights_status": insights_status})
+            if settings.PDF_EAGER_RENDER:
+                try:
+                    update["pdf_url"] = await render_cached_report(checkin, employee_name, checkin.get("emp_email", ""))
+                except Exception as pdf_error:
+                    logger.error(f"Failed to regenerate PDF with LLM insights: {pdf_error}", exc_info=True)
+            else:
+                update["pdf_url"] = None
+            if checkin.get("pdf_url") and checkin["pdf_url"] != update.get("pdf_url") and os.path.exists(checkin["pdf_url"]):
+                os.remove(checkin["pdf_url"])
         
-
-        await tasks_collection.update_one(
-
-            {"task_id": task_id},
-
-            {"$set": {
-
-                "status": "failed",
-
-                "message": f"Error processing video: {str(e)}",
-
-                "video_path": video_path,
-
-                "updated_at": datetime.utcnow()
-
-            }}
-
+        await checkins_collection.update_one({"_id": checkin_id}, {"$set": update})
+        logger.info(f"Deferred insights for check-in {checkin_id}: {insights_status}")
+    except Exception as e:
+        logger.error(f"Deferred insights failed for check-in {checkin_id}: {e}", exc_info=True)
+        await checkins_collection.update_one(
+            {"_id": checkin_id},
+            {"$set": {"insights_status": "fallback", "updated_at": datetime.utcnow()}}
         )
+    
+    metrics_registry.inc("deferred_insights_total", status=insights_status)
+    metrics_registry.observe("deferred_insights_seconds", time.perf_counter() - started)
+    
+    if not task_id:
+        return insights_status == "completed"
+    
+    task = await get_tasks_collection().find_one_and_update(
+        {"task_id": task_id},
+        {"$set": {"result.insights_status": insights_status, "updated_at": datetime.utcnow()}},
+        return_document=ReturnDocument.AFTER
+    )
+    if task:
+        task.pop("_id", None)
+        publish_task_event(task_id, task)
+    
+    return insights_status == "completed"
 
-
+async def resume_pending_insights() -> int:
+    """
+    Re-schedule deferred insights left behind by a restart (called on startup)
+    - Pending check-ins are scheduled right away
+    - Generating claims may belong to a worker that died mid-generation: each is
+      retried once its claim exceeds insights_claim_timeout(), and the claim
+      query skips it if its owner finished in the meantime
+    """
+    if settings.LLM_INSIGHTS_MODE != "deferred":
+        return 0
+    
+    now = datetime.utcnow()
+    timeout = insights_claim_timeout()
+    count = 0
+    cursor = get_checkins_collection().find(
+        {"insights_status": {"$in": ["pending", "generating"]}},
+        {"task_id": 1, "insights_status": 1, "insights_claimed_at": 1}
+    )
+    async for checkin in cursor:
+        delay = 0.0
+        claimed_at = checkin.get("insights_claimed_at")
+        if checkin.get("insights_status") == "generating" and isinstance(claimed_at, datetime):
+            delay = max(0.0, (claimed_at - now).total_seconds() + timeout + 1)
+        schedule_deferred_insights(checkin.get("task_id"), checkin["_id"], delay=delay)
+        count += 1
+    if count:
+        logger.info(f"Resumed deferred insights for {count} check-ins")
+    return count
+
+def insights_pending(event: dict) -> bool:
+    return (event.get("result") or {}).get("insights_status") == "pending"
 
 @router.post("/daily-checkin", response_model=CheckInResponse)
-
 @limiter.limit("5/hour")
-
 async def upload_daily_checkin(
-
     request: Request,
-
     background_tasks: BackgroundTasks,
-
     video: UploadFile = File(...),
-
     notes: Optional[str] = Form(None),
-
     today: Optional[str] = Form(None),
-
     blockers: Optional[str] = Form(None),
-
     tomorrow: Optional[str] = Form(None),
-
     current_user: UserResponse = Depends(get_current_active_user)
-
 ):
-
     """
     Upload daily check-in video
     - Accepts video file (mp4, webm, avi, mov)
@@ -604,466 +534,787 @@ async def upload_daily_checkin(
     - Starts background processing task
     - Returns task_id for status polling
     """
-
     
-
     ALLOWED_CONTENT_TYPES = ["video/mp4", "video/webm", "video/x-matroska", "video/quicktime", "video/x-msvideo"]
-
     ALLOWED_EXTENSIONS = ["mp4", "webm", "mkv", "mov", "avi"]
-
     
-
     if not video.content_type or video.content_type not in ALLOWED_CONTENT_TYPES:
-
         raise HTTPException(
-
             status_code=status.HTTP_400_BAD_REQUEST,
-
             detail=f"Invalid file type. Allowed types: {', '.join(ALLOWED_CONTENT_TYPES)}"
-
         )
-
     
-
     if not video.filename:
-
         raise HTTPException(
-
             status_code=status.HTTP_400_BAD_REQUEST,
-
             detail="Filename is required"
-
         )
-
     
-
     safe_filename = os.path.basename(video.filename)
-
     file_extension = safe_filename.split(".")[-1].lower() if "." in safe_filename else ""
-
     
-
     if not file_extension or file_extension not in ALLOWED_EXTENSIONS:
-
         raise HTTPException(
-
             status_code=status.HTTP_400_BAD_REQUEST,
-
             detail=f"Invalid file extension. Allowed extensions: {', '.join(ALLOWED_EXTENSIONS)}"
-
         )
-
     
-
     MAX_FILE_SIZE = settings.MAX_FILE_SIZE_MB * 1024 * 1024
-
     video.file.seek(0, 2)
-
     file_size = video.file.tell()
-
     video.file.seek(0)
-
     
-
     if file_size > MAX_FILE_SIZE:
-
         raise HTTPException(
-
             status_code=status.HTTP_400_BAD_REQUEST,
-
             detail=f"Video file too large ({file_size / (1024*1024):.1f}MB). Maximum: {settings.MAX_FILE_SIZE_MB}MB"
-
         )
-
     
-
     if file_size < 1024:
-
         raise HTTPException(
-
             status_code=status.HTTP_400_BAD_REQUEST,
-
             detail="Video file appears to be empty or corrupted"
-
         )
-
     
-
     task_id = str(uuid.uuid4())
-
     video_filename = f"{task_id}.{file_extension}"
-
     video_path = VIDEOS_DIR / video_filename
-
     
-
     try:
-
         video_path = video_path.resolve()
-
         if not str(video_path).startswith(str(VIDEOS_DIR.resolve())):
-
             raise HTTPException(
-
                 status_code=status.HTTP_400_BAD_REQUEST,
-
                 detail="Invalid file path"
-
             )
-
     except Exception as e:
-
         logger.error(f"Path validation error: {e}")
-
         raise HTTPException(
-
             status_code=status.HTTP_400_BAD_REQUEST,
-
             detail="Invalid file path"
-
         )
-
     
-
     try:
-
         with open(video_path, "wb") as buffer:
-
             shutil.copyfileobj(video.file, buffer)
-
     except Exception as e:
-
         raise HTTPException(
-
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-
             detail=f"Failed to save video: {str(e)}"
-
         )
-
     
 
-
     checkin_timestamp = datetime.utcnow()
-
     
-
     tasks_collection = get_tasks_collection()
-
     task_doc = {
-
         "task_id": task_id,
-
         "emp_id": current_user.id,
-
         "emp_email": current_user.email,
-
         "status": "queued",
-
         "progress": 0,
-
         "message": "Video uploaded, queued for processing",
-
         "result": None,
-
         "created_at": checkin_timestamp,
-
         "updated_at": checkin_timestamp
-
     }
-
     
-
     await tasks_collection.insert_one(task_doc)
-
     
-
     combined_notes = f"{notes or ''}\n\nToday: {today or ''}\nBlockers: {blockers or ''}\nTomorrow: {tomorrow or ''}"
-
     background_tasks.add_task(
-
         process_video_task,
-
         task_id,
-
         str(video_path),
-
         current_user.id,
-
         current_user.email,
-
         combined_notes.strip(),
-
         checkin_timestamp
-
     )
-
     
-
     return CheckInResponse(
-
         task_id=task_id,
-
         status="queued",
-
         message="Video uploaded successfully. Processing started."
-
     )
 
-
-
 @router.get("/status/{task_id}", response_model=TaskStatus)
-
 async def get_task_status(
-
     task_id: str,
-
+    wait: Optional[float] = Query(default=None, ge=0, description="Seconds to hold the request until the task changes"),
+    if_none_match: Optional[str] = Header(None),
     current_user: UserResponse = Depends(get_current_active_user)
-
 ):
-
     """
     Get status of a processing task
     Used for polling by frontend
+    
+    Supports conditional requests: the ETag is derived from the task's updated_at,
+    and a matching If-None-Match returns 304. With `wait`, a request whose
+    If-None-Match is still current is held until the task changes or the wait
+    (capped at STATUS_LONG_POLL_MAX_SECONDS) expires.
     """
-
     tasks_collection = get_tasks_collection()
-
     
-
     task = await tasks_collection.find_one({"task_id": task_id})
-
     
-
     if not task:
-
         raise HTTPException(
-
             status_code=status.HTTP_404_NOT_FOUND,
-
             detail="Task not found"
-
         )
-
     
-
     if task["emp_id"] != current_user.id:
-
         raise HTTPException(
-
             status_code=status.HTTP_403_FORBIDDEN,
-
             detail="Access denied"
-
         )
-
     
-
-    return TaskStatus(
-
+    etag = make_etag(task_id, task["updated_at"])
+    
+    if wait and etag_matches(if_none_match, etag) and task["status"] not in TERMINAL_STATUSES:
+        task = await wait_for_task_change(task, etag, min(wait, settings.STATUS_LONG_POLL_MAX_SECONDS))
+        etag = make_etag(task_id, task["updated_at"])
+    
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    task_status = TaskStatus(
         task_id=task["task_id"],
-
         status=task["status"],
-
         progress=task.get("progress"),
-
         message=task.get("message"),
-
         result=task.get("result"),
-
+        insights_preview=task.get("insights_preview"),
         created_at=task["created_at"],
-
         updated_at=task["updated_at"]
-
+    )
+    return Response(
+        content=task_status.model_dump_json(),
+        media_type="application/json",
+        headers=headers
     )
 
-
-
-@router.get("/my-checkins")
-
-async def get_my_checkins(
-
-    page: int = Query(default=1, ge=1, description="Page number (1-indexed)"),
-
-    page_size: int = Query(default=20, ge=1, le=100, description="Items per page (max 100)"),
-
-    current_user: UserResponse = Depends(get_current_active_user)
-
-):
-
+async def wait_for_task_change(task: dict, etag: str, timeout: float) -> dict:
     """
-    Get check-ins for current user with pagination
+    Hold until the stored task differs from the given ETag or the timeout passes
+    
+    Status events wake the waiter; the task is then re-read, and re-checked at
+    most once per progress write interval until the coalesced write lands.
+    With TASK_EVENTS_BACKEND=memory the task is also re-read every
+    TASK_STATUS_DB_POLL_SECONDS, since tasks processed by another worker
+    publish no events here.
     
-    Args:
-        page: Page number (1-indexed)
-        page_size: Number of items per page (1-100)
-        
     Returns:
-        Paginated list of check-ins with metadata
+        dict: The latest task document
     """
-
-    checkins_collection = get_checkins_collection()
-
+    tasks_collection = get_tasks_collection()
+    task_id = task["task_id"]
+    deadline = time.monotonic() + timeout
+    recheck_interval = max(settings.TASK_PROGRESS_MIN_INTERVAL_MS / 1000, 0.1)
+    poll_interval = settings.TASK_STATUS_DB_POLL_SECONDS if settings.TASK_EVENTS_BACKEND == "memory" else None
+    changed = False
+    
+    async with broker.subscribe(task_id) as queue:
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            if changed:
+                wait_timeout = min(remaining, recheck_interval)
+            elif poll_interval:
+                wait_timeout = min(remaining, poll_interval)
+            else:
+                wait_timeout = remaining
+            try:
+                await asyncio.wait_for(queue.get(), timeout=wait_timeout)
+                changed = True
+            except asyncio.TimeoutError:
+                if not changed and not poll_interval:
+                    break
+            
+            latest = await tasks_collection.find_one({"task_id": task_id})
+            if latest and make_etag(task_id, latest["updated_at"]) != etag:
+                return latest
     
+    return await tasks_collection.find_one({"task_id": task_id}) or task
 
-    skip = (page - 1) * page_size
-
-    
-
-    total_count = await checkins_collection.count_documents({"emp_id": current_user.id})
+@router.get("/status/{task_id}/stream")
+async def stream_task_status(
+    task_id: str,
+    request: Request,
+    current_user: UserResponse = Depends(get_user_from_token_or_header)
+):
+    """
+    Stream status of a processing task as Server-Sent Events
+    Sends the current state, then progress events until the task completes or fails.
+    Supports token query param since EventSource cannot set headers.
+    
+    With TASK_EVENTS_BACKEND=memory the task is also re-read every
+    TASK_STATUS_DB_POLL_SECONDS, so streams served by a worker other than
+    the one processing the task still see progress and the terminal status.
+    """
+    tasks_collection = get_tasks_collection()
+    
+    task = await tasks_collection.find_one({"task_id": task_id}, {"emp_id": 1})
+    
+    if not task:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Task not found"
+        )
+    
+    if task["emp_id"] != current_user.id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+    
+    async def event_stream():
+        poll_db = settings.TASK_EVENTS_BACKEND == "memory"
+        wait_timeout = min(settings.TASK_STATUS_DB_POLL_SECONDS, settings.SSE_HEARTBEAT_SECONDS) if poll_db else settings.SSE_HEARTBEAT_SECONDS
+        
+        async with broker.subscribe(task_id) as queue:
+            snapshot = await tasks_collection.find_one({"task_id": task_id})
+            event = build_task_event(snapshot or {"task_id": task_id})
+            yield format_sse_event(event)
+            last_updated = event["updated_at"]
+            last_sent = time.monotonic()
+            
+            while event["event"] not in TERMINAL_STATUSES or insights_pending(event):
+                if await request.is_disconnected():
+                    break
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=wait_timeout)
+                except asyncio.TimeoutError:
+                    # The in-process broker only sees tasks processed by this worker
+                    latest = await tasks_collection.find_one({"task_id": task_id}) if poll_db else None
+                    if not latest or (last_updated is not None and latest["updated_at"] <= last_updated):
+                        if time.monotonic() - last_sent >= settings.SSE_HEARTBEAT_SECONDS:
+                            yield ": keep-alive\n\n"
+                            last_sent = time.monotonic()
+                        continue
+                    event = build_task_event(latest)
+                yield format_sse_event(event)
+                last_sent = time.monotonic()
+                if event["updated_at"] is not None and (last_updated is None or event["updated_at"] > last_updated):
+                    last_updated = event["updated_at"]
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no"
+        }
+    )
 
+@router.get("/stage-timings")
+async def get_stage_timings(
+    hours: int = Query(default=24, ge=1, le=24 * 30, description="Time window in hours"),
+    current_user: UserResponse = Depends(get_current_active_user)
+):
+    """
+    Get p50/p95/p99 processing time per pipeline stage for admin users
+    
+    Args:
+        hours: Only include tasks created within this many hours
+        
+    Returns:
+        Per-stage sample counts and wall/cpu/RSS percentiles
+    """
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can access stage timings"
+        )
     
+    tasks_collection = get_tasks_collection()
+    since = datetime.utcnow() - timedelta(hours=hours)
+    
+    cursor = tasks_collection.find(
+        {"created_at": {"$gte": since}, "timings": {"$exists": True}},
+        {"_id": 0, "timings": 1}
+    )
+    timings_docs = [task["timings"] async for task in cursor]
+    
+    return {
+        "window_hours": hours,
+        "since": since,
+        "tasks": len(timings_docs),
+        "stages": summarize_stage_timings(timings_docs)
+    }
 
+@router.get("/my-checkins")
+async def get_my_checkins(
+    page: int = Query(default=1, ge=1, description="Page number (1-indexed)"),
+    page_size: int = Query(default=20, ge=1, le=100, description="Items per page (max 100)"),
+    current_user: UserResponse = Depends(get_current_active_user)
+):
+    """
+    Get check-ins for current user with pagination
+    
+    Args:
+        page: Page number (1-indexed)
+        page_size: Number of items per page (1-100)
+        
+    Returns:
+        Paginated list of check-ins with metadata
+    """
+    checkins_collection = get_checkins_collection()
+    
+    skip = (page - 1) * page_size
+    
+    total_count = await checkins_collection.count_documents({"emp_id": current_user.id})
+    
     checkins = await checkins_collection.find(
-
         {"emp_id": current_user.id}
-
     ).sort("created_at", -1).skip(skip).limit(page_size).to_list(page_size)
-
     
-
     result = []
-
     for checkin in checkins:
-
         checkin["id"] = str(checkin["_id"])
-
+        checkin["pdf_url"] = report_download_url(checkin)
         del checkin["_id"]
-
         result.append(checkin)
-
     
-
     total_pages = (total_count + page_size - 1) // page_size
-
     
-
     return {
-
         "checkins": result,
-
         "pagination": {
-
             "page": page,
-
             "page_size": page_size,
-
             "total_count": total_count,
-
             "total_pages": total_pages,
-
             "has_next": page < total_pages,
-
             "has_prev": page > 1
-
         }
-
     }
 
+def report_download_url(checkin: dict) -> Optional[str]:
+    """pdf_url as shown to clients: the eagerly rendered file, or the on-demand download path"""
+    if checkin.get("pdf_url"):
+        return checkin["pdf_url"]
+    if checkin.get("insights"):
+        return f"/api/checkin/download-pdf/{checkin['_id']}"
+    return None
+
+async def get_checkin_report(checkin: dict, emp_name: Optional[str] = None) -> Optional[str]:
+    """
+    Locate or render the PDF report for a check-in
+    
+    Uses the report of the check-in's current version from this node's
+    PDF_DIR or shared report storage, and otherwise renders it from the
+    stored metrics and insights. Reports are keyed by version rather than
+    the stored pdf_url, so any node can serve them.
+    
+    Args:
+        checkin: Check-in document with stored metrics and insights
+        emp_name: Employee name, if the caller already looked it up
+        
+    Returns:
+        str: Report storage key, or None if it cannot be rendered
+    """
+    if not checkin.get("insights"):
+        return None
+    
+    key = await find_report(checkin)
+    if key:
+        return key
+    
+    try:
+        if emp_name is None:
+            emp_name, _ = await get_employee_name(checkin["emp_id"])
+        pdf_path = await render_cached_report(checkin, emp_name, checkin.get("emp_email", ""))
+    except Exception as e:
+        logger.error(f"Failed to render PDF for check-in {checkin['_id']}: {e}", exc_info=True)
+        return None
+    
+    logger.info(f"PDF rendered on download: {pdf_path}")
+    return Path(pdf_path).name
 
+def read_file_range(path: str, start: int, end: int) -> bytes:
+    with open(path, "rb") as f:
+        f.seek(start)
+        return f.read(end - start + 1)
 
 @router.get("/download-pdf/{checkin_id}")
-
 async def download_pdf(
-
     checkin_id: str,
-
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None),
+    if_range: Optional[str] = Header(None),
+    range_header: Optional[str] = Header(None, alias="Range"),
     current_user: UserResponse = Depends(get_user_from_token_or_header)
-
 ):
-
     """
     Download PDF report for a specific check-in
     Supports both Authorization header and token query param
+    
+    The strong ETag and Last-Modified come from the check-in id and
+    updated_at (reports are rendered deterministically per version), so
+    If-None-Match / If-Modified-Since are answered with 304 before the
+    report is located, rendered or read. A single byte range (honoring
+    If-Range) is served as 206; unsatisfiable ranges get 416.
     """
-
     checkins_collection = get_checkins_collection()
-
     
-
     from bson import ObjectId
-
     try:
-
         checkin = await checkins_collection.find_one({"_id": ObjectId(checkin_id)})
-
     except:
-
         raise HTTPException(
-
             status_code=status.HTTP_400_BAD_REQUEST,
-
             detail="Invalid check-in ID"
-
         )
-
     
-
     if not checkin:
-
         raise HTTPException(
-
             status_code=status.HTTP_404_NOT_FOUND,
-
             detail="Check-in not found"
-
         )
-
     
 
-
     if checkin["emp_id"] != current_user.id and current_user.role != "admin":
-
         raise HTTPException(
-
             status_code=status.HTTP_403_FORBIDDEN,
-
             detail="Access denied"
-
         )
-
     
-
-    pdf_path = checkin.get("pdf_url")
-
-    if not pdf_path or not os.path.exists(pdf_path):
-
+    version = report_version(checkin) or checkin.get("date")
+    etag = make_etag("pdf", checkin_id, version)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(version),
+        "Cache-Control": "private, no-cache",
+        "Accept-Ranges": "bytes"
+    }
+    
+    if etag_matches(if_none_match, etag) or (not if_none_match and not_modified_since(if_modified_since, version)):
+        metrics_registry.inc("pdf_downloads_total", result="not_modified", source="validators")
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    key = await get_checkin_report(checkin)
+    
+    if not key:
         raise HTTPException(
-
             status_code=status.HTTP_404_NOT_FOUND,
-
             detail="PDF report not found"
-
         )
-
     
-
+    pdf_path = str(PDF_DIR / key)
+    storage = get_storage("reports")
+    try:
+        stat_result = os.stat(pdf_path)
+        size = stat_result.st_size
+    except FileNotFoundError:
+        stat_result = None
+        info = await storage.stat(key)
+        if info is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="PDF report not found"
+            )
+        size = info["size"]
+    
+    if stat_result is not None:
+        try:
+            os.utime(pdf_path, (time.time(), stat_result.st_mtime))
+        except OSError:
+            pass
+    
+    source = "local" if stat_result is not None else storage.name
+    filename = f"checkin_report_{checkin_id}.pdf"
+    disposition = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if range_header and if_range_matches(if_range, etag, version):
+        try:
+            byte_range = parse_byte_range(range_header, size)
+        except ValueError:
+            metrics_registry.inc("pdf_downloads_total", result="range_not_satisfiable", source=source)
+            return Response(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                headers={**headers, "Content-Range": f"bytes */{size}"}
+            )
+        if byte_range:
+            start, end = byte_range
+            metrics_registry.inc("pdf_downloads_total", result="partial", source=source)
+            partial_headers = {**headers, **disposition, "Content-Range": f"bytes {start}-{end}/{size}"}
+            if stat_result is None:
+                return StreamingResponse(
+                    storage.iter_range(key, start, end),
+                    status_code=status.HTTP_206_PARTIAL_CONTENT,
+                    media_type="application/pdf",
+                    headers={**partial_headers, "Content-Length": str(end - start + 1)}
+                )
+            loop = asyncio.get_running_loop()
+            content = await loop.run_in_executor(None, read_file_range, pdf_path, start, end)
+            return Response(
+                content=content,
+                status_code=status.HTTP_206_PARTIAL_CONTENT,
+                media_type="application/pdf",
+                headers=partial_headers
+            )
+    
+    metrics_registry.inc("pdf_downloads_total", result="full", source=source)
+    if stat_result is None:
+        return StreamingResponse(
+            storage.iter_range(key),
+            media_type="application/pdf",
+            headers={**headers, **disposition, "Content-Length": str(size)}
+        )
     return FileResponse(
-
         path=pdf_path,
-
         media_type="application/pdf",
-
-        filename=f"checkin_report_{checkin_id}.pdf"
-
+        filename=filename,
+        headers=headers,
+        stat_result=stat_result
     )
 
-
-
+@router.get("/report/{checkin_id}")
+async def get_report(
+    checkin_id: str,
+    report_format: str = Query("json", alias="format", pattern="^(json|html)$"),
+    if_none_match: Optional[str] = Header(None),
+    if_modified_since: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+    current_user: UserResponse = Depends(get_user_from_token_or_header)
+):
+    """
+    Get the report for a specific check-in as JSON or server-rendered HTML
+    Supports both Authorization header and token query param
+    
+    Serves the same content model the PDF is laid out from, without
+    ReportLab or a file round-trip. Bodies are gzipped when the client
+    accepts it and the body reaches REPORT_GZIP_MIN_BYTES (per response, so
+    SSE routes stay uncompressed). The ETag covers the check-in version,
+    format and the coding actually sent, so If-None-Match revalidation is
+    answered with 304 before the employee lookup or rendering.
+    """
+    checkins_collection = get_checkins_collection()
+    
+    from bson import ObjectId
+    try:
+        checkin = await checkins_collection.find_one({"_id": ObjectId(checkin_id)})
+    except:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid check-in ID"
+        )
+    
+    if not checkin:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Check-in not found"
+        )
+    
+    if checkin["emp_id"] != current_user.id and current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Access denied"
+        )
+    
+    if not checkin.get("insights"):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Report not available yet"
+        )
+    
+    compress = accepts_encoding(accept_encoding, "gzip")
+    version = report_version(checkin) or checkin.get("date")
+    headers = {
+        "Last-Modified": http_date(version),
+        "Cache-Control": "private, no-cache"
+    }
+    
+    # A version always renders to the same body size, so the coding the client
+    # cached (gzip, or identity for a small body) is the one it would get again
+    codings = ["gzip", "identity"] if compress else ["identity"]
+    for coding in codings:
+        etag = make_etag("report", checkin_id, version, report_format, coding)
+        if etag_matches(if_none_match, etag):
+            headers["ETag"] = etag
+            if coding == "gzip" or not compress:
+                headers["Vary"] = "Accept-Encoding"
+            metrics_registry.inc("report_views_total", format=report_format, result="not_modified")
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    emp_name, _ = await get_employee_name(checkin["emp_id"])
+    content = build_report_content(checkin, emp_name, checkin.get("emp_email", ""))
+    if report_format == "html":
+        body = render_report_html(content).encode("utf-8")
+        media_type = "text/html"
+    else:
+        body = json.dumps(content, ensure_ascii=False).encode("utf-8")
+        media_type = "application/json"
+    
+    coding = "identity"
+    if len(body) >= settings.REPORT_GZIP_MIN_BYTES:
+        headers["Vary"] = "Accept-Encoding"
+        if compress:
+            coding = "gzip"
+            body = gzip_body(body)
+            headers["Content-Encoding"] = "gzip"
+    headers["ETag"] = make_etag("report", checkin_id, version, report_format, coding)
+    
+    if not if_none_match and not_modified_since(if_modified_since, version):
+        metrics_registry.inc("report_views_total", format=report_format, result="not_modified")
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    metrics_registry.inc("report_views_total", format=report_format, result="full")
+    return Response(content=body, media_type=media_type, headers=headers)
+
+def export_filename(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", text).strip("_") or "employee"
+
+@router.get("/export")
+async def export_reports(
+    start: date = Query(..., description="First check-in day (UTC, inclusive)"),
+    end: date = Query(..., description="Last check-in day (UTC, inclusive)"),
+    emp_id: Optional[List[str]] = Query(default=None, description="Only these employees (repeatable)"),
+    export_format: str = Query(default="zip", alias="format", pattern="^(zip|pdf)$", description="zip of reports or one merged pdf"),
+    current_user: UserResponse = Depends(get_user_from_token_or_header)
+):
+    """
+    Export the PDF reports of all completed check-ins in a date range for admin users
+    
+    The ZIP is streamed as reports become available: up to twice
+    PDF_RENDER_WORKERS reports are located or rendered ahead of the stream,
+    so memory stays flat regardless of the number of check-ins. A merged PDF
+    is rendered in one pass and capped at EXPORT_MERGED_MAX_REPORTS.
+    Supports both Authorization header and token query param
+    
+    Args:
+        start: First check-in day (UTC)
+        end: Last check-in day (UTC)
+        emp_id: Employee IDs to include (default: everyone)
+        export_format: "zip" or "pdf" (query parameter `format`)
+        
+    Returns:
+        Streamed ZIP (one PDF per check-in plus manifest.csv) or a merged PDF
+    """
+    if current_user.role != "admin":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only admins can export reports"
+        )
+    if end < start:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="end must not be before start"
+        )
+    
+    query = {
+        "status": "completed",
+        "date": {
+            "$gte": datetime(start.year, start.month, start.day),
+            "$lt": datetime(end.year, end.month, end.day) + timedelta(days=1)
+        }
+    }
+    if emp_id:
+        query["emp_id"] = {"$in": emp_id}
+    projection = {"video_path": 0, "llm_usage": 0}
+    
+    checkins_collection = get_checkins_collection()
+    employees = {}
+    
+    async def employee_for(checkin: dict) -> tuple[str, str]:
+        if checkin["emp_id"] not in employees:
+            employees[checkin["emp_id"]] = await get_employee_name(checkin["emp_id"])
+        return employees[checkin["emp_id"]]
+    
+    metrics_registry.inc("report_exports_total", format=export_format)
+    
+    if export_format == "pdf":
+        total = await checkins_collection.count_documents(query)
+        if total > settings.EXPORT_MERGED_MAX_REPORTS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Merged PDF export is limited to {settings.EXPORT_MERGED_MAX_REPORTS} reports ({total} matched); use format=zip"
+            )
+        
+        reports = []
+        async for checkin in checkins_collection.find(query, projection).sort("date", 1):
+            if checkin.get("insights"):
+                emp_name, emp_email = await employee_for(checkin)
+                reports.append((checkin, emp_name, checkin.get("emp_email") or emp_email))
+        if not reports:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="No reports in this range"
+            )
+        
+        pdf_path = str(PDF_DIR / f"export_{uuid.uuid4().hex}.pdf")
+        await generate_merged_pdf(reports, pdf_path)
+        return FileResponse(
+            path=pdf_path,
+            media_type="application/pdf",
+            filename=f"checkin_reports_{start}_{end}.pdf",
+            background=BackgroundTask(os.remove, pdf_path)
+        )
+    
+    async def locate(checkin: dict):
+        emp_name, emp_email = await employee_for(checkin)
+        return checkin, emp_name, emp_email, await get_checkin_report(checkin, emp_name=emp_name)
+    
+    async def archive():
+        loop = asyncio.get_running_loop()
+        zip_stream = ZipStream()
+        manifest = io.StringIO()
+        manifest_writer = csv.writer(manifest)
+        manifest_writer.writerow(["checkin_id", "employee", "email", "date", "file"])
+        window = max(1, settings.PDF_RENDER_WORKERS) * 2
+        pending = deque()
+        
+        async def emit(task) -> bytes:
+            checkin, emp_name, emp_email, key = await task
+            checkin_date = checkin.get("date")
+            day = checkin_date.strftime("%Y-%m-%d_%H%M") if isinstance(checkin_date, datetime) else "unknown"
+            filename = None
+            if key:
+                filename = f"{export_filename(emp_name)}/{day}_{checkin['_id']}.pdf"
+                local_path = PDF_DIR / key
+                if local_path.exists():
+                    data = await loop.run_in_executor(None, local_path.read_bytes)
+                else:
+                    data = await get_storage("reports").read(key)
+                zip_stream.add(filename, data)
+            manifest_writer.writerow([str(checkin["_id"]), emp_name, checkin.get("emp_email") or emp_email, day, filename or "unavailable"])
+            return zip_stream.drain()
+        
+        try:
+            async for checkin in checkins_collection.find(query, projection).sort("date", 1):
+                pending.append(asyncio.ensure_future(locate(checkin)))
+                if len(pending) >= window:
+                    chunk = await emit(pending.popleft())
+                    if chunk:
+                        yield chunk
+            while pending:
+                chunk = await emit(pending.popleft())
+                if chunk:
+                    yield chunk
+            
+            zip_stream.add("manifest.csv", manifest.getvalue().encode("utf-8"))
+            yield zip_stream.close()
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    return StreamingResponse(
+        archive(),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="checkin_reports_{start}_{end}.zip"'}
+    )
 
 
 @router.get("/all-checkins")
-
 async def get_all_checkins(
-
     page: int = Query(default=1, ge=1, description="Page number (1-indexed)"),
-
     page_size: int = Query(default=5, ge=1, le=100, description="Items per page (max 100)"),
-
     current_user: UserResponse = Depends(get_current_active_user)
-
 ):
-
     """
     Get all check-ins for admin users with employee information
     
@@ -1076,497 +1327,77 @@ async def get_all_checkins(
         Paginated list of all check-ins with employee names
     """
 
-
     if current_user.role != "admin":
-
         raise HTTPException(
-
             status_code=status.HTTP_403_FORBIDDEN,
-
             detail="Only admins can access all check-ins"
-
         )
-
     
-
     checkins_collection = get_checkins_collection()
-
     users_collection = get_users_collection()
-
     
-
     skip = (page - 1) * page_size
-
     
-
     total_count = await checkins_collection.count_documents({})
-
     
-
     checkins = await checkins_collection.find({}).sort("created_at", -1).skip(skip).limit(page_size).to_list(page_size)
-
     
-
     result = []
-
     for checkin in checkins:
 
-
         employee_name = None
-
         employee_email = None
-
         if "emp_id" in checkin:
-
             try:
-
                 from bson import ObjectId
-
                 employee = await users_collection.find_one({"_id": ObjectId(checkin["emp_id"])})
-
                 if employee:
-
                     employee_name = f"{employee.get('first_name', '')} {employee.get('last_name', '')}".strip()
-
                     employee_email = employee.get('email', '')
-
             except:
-
                 pass
-
         
-
         checkin_data = {
-
             "id": str(checkin["_id"]),
-
             "task_id": checkin.get("task_id", ""),
-
             "status": checkin.get("status", "unknown"),
-
             "date": checkin.get("date", ""),
-
             "created_at": checkin.get("created_at", "").isoformat() if isinstance(checkin.get("created_at"), datetime) else str(checkin.get("created_at", "")),
-
-            "pdf_url": checkin.get("pdf_url"),
-
+            "pdf_url": report_download_url(checkin),
             "emp_id": checkin.get("emp_id", ""),
-
             "employee_name": employee_name,
-
             "employee_email": employee_email,
-
         }
-
         result.append(checkin_data)
-
     
-
     return {
-
         "checkins": result,
-
         "total": total_count,
-
         "page": page,
-
         "page_size": page_size,
-
         "total_pages": (total_count + page_size - 1) // page_size
-
     }
 
 
-
-
-
 @router.get("/dashboard-metrics")
-
 async def get_dashboard_metrics(
-
     current_user: UserResponse = Depends(get_current_active_user)
-
 ):
-
     """
     Get aggregated dashboard metrics for admin users
     
+    Read from the daily_rollups collection, or aggregated from raw
+    check-ins with DASHBOARD_SOURCE=checkins (see services/dashboard.py),
+    and cached briefly per worker; storing a check-in invalidates it.
+    
     Returns:
         Dictionary with wellness metrics, employee stats, and trends
     """
 
-
     if current_user.role != "admin":
-
         raise HTTPException(
-
             status_code=status.HTTP_403_FORBIDDEN,
-
             detail="Only admins can access dashboard metrics"
-
         )
-
-    
-
-    checkins_collection = get_checkins_collection()
-
-    users_collection = get_users_collection()
-
-    
-
-
-    total_employees = await users_collection.count_documents({"role": "employee"})
-
-    
-
-
-    thirty_days_ago = datetime.now() - timedelta(days=30)
-
-    
-
-    recent_checkins = await checkins_collection.find({
-
-        "created_at": {"$gte": thirty_days_ago}
-
-    }).to_list(1000)
-
-    
-
-
-    stress_scores = []
-
-    engagement_scores = []
-
-    emotions = []
-
-    active_employee_ids = set()
-
-    at_risk_count = 0
-
-    
-
-    for checkin in recent_checkins:
-
-        metrics = checkin.get("metrics", {})
-
-        
-
-
-        stress_avg = metrics.get("stress_avg", 0)
-
-        engagement = metrics.get("engagement_score", 0)
-
-        
-
-        if stress_avg > 0:
-
-            stress_scores.append(stress_avg)
-
-        if engagement > 0:
-
-            engagement_scores.append(engagement)
-
-        
-
-
-        if "emp_id" in checkin:
-
-            active_employee_ids.add(checkin["emp_id"])
-
-        
-
-
-        if stress_avg > 70 or engagement < 50:
-
-            at_risk_count += 1
-
-        
-
-
-        audio = metrics.get("audio", {})
-
-        if audio.get("dominant_emotion"):
-
-            emotions.append(audio["dominant_emotion"])
-
-    
-
-
-    avg_stress = sum(stress_scores) / len(stress_scores) if stress_scores else 0
-
-    avg_engagement = sum(engagement_scores) / len(engagement_scores) if engagement_scores else 0
-
-    
-
-
-
-    wellness_score = ((100 - avg_stress) * 0.6 + avg_engagement * 0.4) if stress_scores or engagement_scores else 0
-
-    
-
-
-    emotion_counts = Counter(emotions)
-
-    dominant_emotion = emotion_counts.most_common(1)[0][0] if emotion_counts else "neutral"
-
-    
-
-
-    week_ago = datetime.now() - timedelta(days=7)
-
-    checkins_this_week = await checkins_collection.count_documents({
-
-        "created_at": {"$gte": week_ago}
-
-    })
-
-    checkins_this_month = len(recent_checkins)
-
-    
-
-
-    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
-
-    today_checkins = await checkins_collection.count_documents({
-
-        "created_at": {"$gte": today}
-
-    })
-
-    completion_rate = (today_checkins / total_employees * 100) if total_employees > 0 else 0
-
-    
-
-
-    stress_trend = []
-
-    for i in range(6, -1, -1):
-
-        day_start = (datetime.now() - timedelta(days=i)).replace(hour=0, minute=0, second=0, microsecond=0)
-
-        day_end = day_start + timedelta(days=1)
-
-        day_checkins = await checkins_collection.find({
-
-            "created_at": {"$gte": day_start, "$lt": day_end}
-
-        }).to_list(100)
-
-        
-
-        day_stress = []
-
-        for c in day_checkins:
-
-            s = c.get("metrics", {}).get("stress_avg", 0)
-
-            if s > 0:
-
-                day_stress.append(s)
-
-        
-
-        avg_day_stress = sum(day_stress) / len(day_stress) if day_stress else 0
-
-        stress_trend.append(round(avg_day_stress))
-
-    
-
-
-    engagement_trend = []
-
-    for i in range(6, -1, -1):
-
-        day_start = (datetime.now() - timedelta(days=i)).replace(hour=0, minute=0, second=0, microsecond=0)
-
-        day_end = day_start + timedelta(days=1)
-
-        day_checkins = await checkins_collection.find({
-
-            "created_at": {"$gte": day_start, "$lt": day_end}
-
-        }).to_list(100)
-
-        
-
-        day_engagement = []
-
-        for c in day_checkins:
-
-            e = c.get("metrics", {}).get("engagement_score", 0)
-
-            if e > 0:
-
-                day_engagement.append(e)
-
-        
-
-        avg_day_engagement = sum(day_engagement) / len(day_engagement) if day_engagement else 0
-
-        engagement_trend.append(round(avg_day_engagement))
-
-    
-
-
-
-
-    
-
-
-    current_week_start = (datetime.now() - timedelta(days=7)).replace(hour=0, minute=0, second=0, microsecond=0)
-
-    current_week_checkins = await checkins_collection.find({
-
-        "created_at": {"$gte": current_week_start}
-
-    }).to_list(1000)
-
-    
-
-    current_stress_scores = []
-
-    current_engagement_scores = []
-
-    for c in current_week_checkins:
-
-        m = c.get("metrics", {})
-
-        s = m.get("stress_avg", 0)
-
-        e = m.get("engagement_score", 0)
-
-        if s > 0:
-
-            current_stress_scores.append(s)
-
-        if e > 0:
-
-            current_engagement_scores.append(e)
-
-    
-
-    current_avg_stress = sum(current_stress_scores) / len(current_stress_scores) if current_stress_scores else avg_stress
-
-    current_avg_engagement = sum(current_engagement_scores) / len(current_engagement_scores) if current_engagement_scores else avg_engagement
-
-    current_wellness = ((100 - current_avg_stress) * 0.6 + current_avg_engagement * 0.4) if current_stress_scores or current_engagement_scores else wellness_score
-
-    
-
-
-    prev_week_start = (datetime.now() - timedelta(days=14)).replace(hour=0, minute=0, second=0, microsecond=0)
-
-    prev_week_end = current_week_start
-
-    prev_week_checkins = await checkins_collection.find({
-
-        "created_at": {"$gte": prev_week_start, "$lt": prev_week_end}
-
-    }).to_list(1000)
-
-    
-
-    prev_stress_scores = []
-
-    prev_engagement_scores = []
-
-    for c in prev_week_checkins:
-
-        m = c.get("metrics", {})
-
-        s = m.get("stress_avg", 0)
-
-        e = m.get("engagement_score", 0)
-
-        if s > 0:
-
-            prev_stress_scores.append(s)
-
-        if e > 0:
-
-            prev_engagement_scores.append(e)
-
-    
-
-    prev_avg_stress = sum(prev_stress_scores) / len(prev_stress_scores) if prev_stress_scores else current_avg_stress
-
-    prev_avg_engagement = sum(prev_engagement_scores) / len(prev_engagement_scores) if prev_engagement_scores else current_avg_engagement
-
-    prev_wellness = ((100 - prev_avg_stress) * 0.6 + prev_avg_engagement * 0.4) if prev_stress_scores or prev_engagement_scores else current_wellness
-
-    
-
-
-
-    if prev_avg_stress > 0:
-
-        stress_change = round(((prev_avg_stress - current_avg_stress) / prev_avg_stress) * 100, 1)
-
-    else:
-
-        stress_change = 0
-
     
-
-
-    if prev_avg_engagement > 0:
-
-        engagement_change = round(((current_avg_engagement - prev_avg_engagement) / prev_avg_engagement) * 100, 1)
-
-    else:
-
-        engagement_change = 0
-
-    
-
-
-    if prev_wellness > 0:
-
-        wellness_change = round(((current_wellness - prev_wellness) / prev_wellness) * 100, 1)
-
-    else:
-
-        wellness_change = 0
-
-    
-
-    return {
-
-        "wellness_score": round(wellness_score, 1),
-
-        "wellness_change": wellness_change,
-
-        "active_employees": len(active_employee_ids),
-
-        "total_employees": total_employees,
-
-        "at_risk_count": at_risk_count,
-
-        "at_risk_percentage": round((at_risk_count / total_employees * 100) if total_employees > 0 else 0, 1),
-
-        "avg_stress": round(avg_stress, 1),
-
-        "stress_change": stress_change,
-
-        "avg_engagement": round(avg_engagement, 1),
-
-        "engagement_change": engagement_change,
-
-        "dominant_emotion": dominant_emotion,
-
-        "checkins_this_week": checkins_this_week,
-
-        "checkins_this_month": checkins_this_month,
-
-        "completion_rate": round(completion_rate, 1),
-
-        "stress_trend": stress_trend,
-
-        "engagement_trend": engagement_trend,
-
-        "emotion_distribution": dict(emotion_counts)
-
-    }
-
-
-
+    return await get_dashboard_metrics_cached()
@@ -0,0 +1,101 @@
+from typing import Optional
+import logging
+import threading
+import time
+from app.config import settings
+from app.services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+STATE_CODES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+class CircuitBreaker:
+    """
+    Process-wide circuit breaker for an unreliable dependency
+    
+    closed: calls flow; consecutive failures are counted and trip the breaker
+    at `failure_threshold`.
+    open: calls are short-circuited until `recovery_seconds` have passed.
+    half_open: up to `half_open_max_calls` probe calls are let through; a
+    success closes the breaker, a failure re-opens it.
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: Optional[int] = None,
+        recovery_seconds: Optional[float] = None,
+        half_open_max_calls: Optional[int] = None
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold or settings.LLM_BREAKER_FAILURE_THRESHOLD
+        self.recovery_seconds = recovery_seconds or settings.LLM_BREAKER_RECOVERY_SECONDS
+        self.half_open_max_calls = half_open_max_calls or settings.LLM_BREAKER_HALF_OPEN_MAX_CALLS
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+        self._opened_at = 0.0
+        self._probes = 0
+        self._probe_started = 0.0
+        self._lock = threading.Lock()
+        self._publish_state()
+    
+    def _publish_state(self):
+        metrics.set_gauge("circuit_breaker_state", STATE_CODES[self.state], breaker=self.name)
+    
+    def _transition(self, state: str):
+        if state == self.state:
+            return
+        logger.warning(f"⚡ Circuit breaker '{self.name}' {self.state} -> {state}")
+        self.state = state
+        self._probes = 0
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+            self.trips += 1
+            metrics.inc("circuit_breaker_trips_total", breaker=self.name)
+        self._publish_state()
+    
+    def allow_request(self) -> bool:
+        """Return True if a call may proceed; False means short-circuit to the fallback"""
+        with self._lock:
+            now = time.monotonic()
+            if self.state == OPEN and now - self._opened_at >= self.recovery_seconds:
+                self._transition(HALF_OPEN)
+            
+            if self.state == CLOSED:
+                return True
+            
+            if self.state == HALF_OPEN:
+                if self._probes and now - self._probe_started >= self.recovery_seconds:
+                    self._probes = 0
+                if self._probes < self.half_open_max_calls:
+                    self._probes += 1
+                    self._probe_started = now
+                    return True
+            
+            metrics.inc("circuit_breaker_short_circuits_total", breaker=self.name)
+            return False
+    
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._transition(CLOSED)
+    
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            metrics.inc("circuit_breaker_failures_total", breaker=self.name)
+            if self.state == HALF_OPEN or (self.state == CLOSED and self.failures >= self.failure_threshold):
+                self._transition(OPEN)
+    
+    def release(self):
+        """Finish a call that neither proves nor disproves provider health (e.g. 429, 4xx)"""
+        with self._lock:
+            if self.state == HALF_OPEN and self._probes:
+                self._probes -= 1
+
+llm_breaker = CircuitBreaker("llm")
@@ -0,0 +1,441 @@
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple, Callable, Awaitable
+from collections import Counter
+import asyncio
+import logging
+import time
+from app.config import settings
+from app.database import get_checkins_collection, get_users_collection, get_daily_rollups_collection
+from app.services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+TREND_DAYS = 7
+ROLLUP_DAYS = 31
+ROLLUP_SCOPE = "org"
+
+def _positive(field: str) -> Dict[str, Any]:
+    """Value of `field` when it is > 0, else null (ignored by $avg)"""
+    return {"$cond": [{"$gt": [field, 0]}, field, None]}
+
+def _averages() -> Dict[str, Any]:
+    return {
+        "stress": {"$avg": _positive("$stress")},
+        "engagement": {"$avg": _positive("$engagement")}
+    }
+
+def build_dashboard_pipeline(now: datetime, users_collection: str) -> List[Dict[str, Any]]:
+    """
+    Aggregation computing every dashboard figure in one round-trip
+    
+    Check-ins of the last 30 days are projected down to the few fields the
+    dashboard uses (no transcripts or insights), the employee count is
+    appended with $unionWith (MongoDB 4.4+), and a $facet computes each
+    figure from that single scan.
+    
+    Args:
+        now: Reference time; windows and day boundaries derive from it
+        users_collection: Name of the users collection
+    
+    Returns:
+        list: Pipeline for the check-ins collection
+    """
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    current_week_start = today - timedelta(days=7)
+    prev_week_start = today - timedelta(days=14)
+    trend_boundaries = [today - timedelta(days=i) for i in range(TREND_DAYS - 1, -2, -1)]
+    
+    return [
+        {"$match": {"created_at": {"$gte": now - timedelta(days=30)}}},
+        {"$project": {
+            "_id": 0,
+            "emp_id": 1,
+            "created_at": 1,
+            "stress": {"$ifNull": ["$metrics.stress_avg", 0]},
+            "engagement": {"$ifNull": ["$metrics.engagement_score", 0]},
+            "emotion": "$metrics.audio.dominant_emotion"
+        }},
+        {"$unionWith": {
+            "coll": users_collection,
+            "pipeline": [
+                {"$match": {"role": "employee"}},
+                {"$count": "total_employees"}
+            ]
+        }},
+        {"$facet": {
+            "employees": [
+                {"$match": {"total_employees": {"$exists": True}}}
+            ],
+            "month": [
+                {"$match": {"created_at": {"$exists": True}}},
+                {"$group": {
+                    "_id": None,
+                    "count": {"$sum": 1},
+                    "at_risk": {"$sum": {"$cond": [
+                        {"$or": [{"$gt": ["$stress", 70]}, {"$lt": ["$engagement", 50]}]}, 1, 0
+                    ]}},
+                    **_averages()
+                }}
+            ],
+            "active_employees": [
+                {"$match": {"created_at": {"$exists": True}, "emp_id": {"$exists": True}}},
+                {"$group": {"_id": "$emp_id"}},
+                {"$count": "count"}
+            ],
+            "emotions": [
+                {"$match": {"created_at": {"$exists": True}, "emotion": {"$nin": [None, ""]}}},
+                {"$group": {"_id": "$emotion", "count": {"$sum": 1}, "first_seen": {"$min": "$created_at"}}},
+                {"$sort": {"first_seen": 1}}
+            ],
+            "this_week": [
+                {"$match": {"created_at": {"$gte": now - timedelta(days=7)}}},
+                {"$count": "count"}
+            ],
+            "today": [
+                {"$match": {"created_at": {"$gte": today}}},
+                {"$count": "count"}
+            ],
+            "trend": [
+                {"$match": {"created_at": {"$gte": trend_boundaries[0], "$lt": trend_boundaries[-1]}}},
+                {"$bucket": {
+                    "groupBy": "$created_at",
+                    "boundaries": trend_boundaries,
+                    "output": _averages()
+                }}
+            ],
+            "weeks": [
+                {"$match": {"created_at": {"$gte": prev_week_start}}},
+                {"$group": {
+                    "_id": {"$cond": [{"$gte": ["$created_at", current_week_start]}, "current", "previous"]},
+                    **_averages()
+                }}
+            ]
+        }}
+    ]
+
+def rollup_day(created_at: datetime) -> datetime:
+    """Day bucket of a check-in (created_at is compared naively, like the dashboard windows)"""
+    return created_at.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def rollup_key(day: datetime, scope: str = ROLLUP_SCOPE) -> str:
+    return f"{scope}:{day.strftime('%Y-%m-%d')}"
+
+def rollup_increments(checkin: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Counters a check-in adds to its day's rollup
+    
+    Mirrors the raw aggregation: scores count only when > 0, at-risk is
+    stress > 70 or engagement < 50, emotions are histogrammed by name.
+    """
+    metrics = checkin.get("metrics") or {}
+    stress = metrics.get("stress_avg") or 0
+    engagement = metrics.get("engagement_score") or 0
+    
+    increments = {
+        "checkins": 1,
+        "at_risk": 1 if stress > 70 or engagement < 50 else 0,
+        "stress_sum": stress if stress > 0 else 0,
+        "stress_count": 1 if stress > 0 else 0,
+        "engagement_sum": engagement if engagement > 0 else 0,
+        "engagement_count": 1 if engagement > 0 else 0
+    }
+    emotion = (metrics.get("audio") or {}).get("dominant_emotion")
+    if emotion:
+        increments[f"emotions.{str(emotion).replace('.', '_').lstrip('$')}"] = 1
+    return increments
+
+def rollup_update(checkin: Dict[str, Any], day: datetime, scope: str = ROLLUP_SCOPE) -> Dict[str, Any]:
+    """Upsert update applying one check-in to its day's rollup document"""
+    update = {
+        "$inc": rollup_increments(checkin),
+        "$set": {"updated_at": datetime.utcnow()},
+        "$setOnInsert": {"scope": scope, "day": day}
+    }
+    if "emp_id" in checkin:
+        update["$addToSet"] = {"employees": checkin["emp_id"]}
+    return update
+
+async def record_checkin_rollup(checkin: Dict[str, Any]):
+    """
+    Add a newly persisted check-in to the daily_rollups collection
+    
+    A single atomic upsert with $inc/$addToSet, so concurrent check-ins on
+    the same day never lose updates. Failures are logged rather than
+    raised: the check-in itself is already stored, and
+    scripts/rebuild_rollups.py recomputes rollups from raw check-ins.
+    """
+    day = rollup_day(checkin["created_at"])
+    try:
+        await get_daily_rollups_collection().update_one(
+            {"_id": rollup_key(day)},
+            rollup_update(checkin, day),
+            upsert=True
+        )
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to update daily rollup {rollup_key(day)}: {e}")
+
+def rollups_to_facets(rollups: List[Dict[str, Any]], total_employees: int, now: datetime) -> Dict[str, Any]:
+    """
+    Fold daily rollup documents into the shape build_dashboard_pipeline returns
+    
+    Windows are whole days: the month covers today and the 30 days before
+    it, and checkins_this_week the days since current_week_start.
+    """
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    current_week_start = today - timedelta(days=7)
+    prev_week_start = today - timedelta(days=14)
+    trend_start = today - timedelta(days=TREND_DAYS - 1)
+    
+    def averages(docs: List[Dict[str, Any]]) -> Dict[str, Any]:
+        stress_count = sum(d.get("stress_count", 0) for d in docs)
+        engagement_count = sum(d.get("engagement_count", 0) for d in docs)
+        return {
+            "stress": sum(d.get("stress_sum", 0) for d in docs) / stress_count if stress_count else None,
+            "engagement": sum(d.get("engagement_sum", 0) for d in docs) / engagement_count if engagement_count else None
+        }
+    
+    rollups = sorted(rollups, key=lambda d: d["day"])
+    employees = set()
+    emotions: Counter = Counter()
+    for doc in rollups:
+        employees.update(doc.get("employees", []))
+        emotions.update(doc.get("emotions") or {})
+    
+    current_week = [d for d in rollups if d["day"] >= current_week_start]
+    previous_week = [d for d in rollups if prev_week_start <= d["day"] < current_week_start]
+    
+    return {
+        "employees": [{"total_employees": total_employees}],
+        "month": [{
+            "count": sum(d.get("checkins", 0) for d in rollups),
+            "at_risk": sum(d.get("at_risk", 0) for d in rollups),
+            **averages(rollups)
+        }] if rollups else [],
+        "active_employees": [{"count": len(employees)}],
+        "emotions": [{"_id": name, "count": count} for name, count in emotions.items() if count],
+        "this_week": [{"count": sum(d.get("checkins", 0) for d in current_week)}],
+        "today": [{"count": sum(d.get("checkins", 0) for d in rollups if d["day"] == today)}],
+        "trend": [{"_id": d["day"], **averages([d])} for d in rollups if d["day"] >= trend_start],
+        "weeks": [
+            {"_id": name, **averages(docs)}
+            for name, docs in (("current", current_week), ("previous", previous_week)) if docs
+        ]
+    }
+
+def _count(facet: List[Dict[str, Any]], field: str = "count") -> int:
+    return facet[0][field] if facet else 0
+
+def _wellness(stress: float, engagement: float) -> float:
+    return (100 - stress) * 0.6 + engagement * 0.4
+
+def _change(previous: float, current: float) -> float:
+    return round(((current - previous) / previous) * 100, 1) if previous > 0 else 0
+
+def summarize_dashboard(result: Dict[str, Any], now: datetime) -> Dict[str, Any]:
+    """
+    Turn the $facet output of build_dashboard_pipeline into the dashboard response
+    
+    Averages only cover scores > 0; weeks without scores fall back to the
+    wider window, as the per-query implementation did.
+    """
+    today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    total_employees = _count(result["employees"], "total_employees")
+    month = result["month"][0] if result["month"] else {}
+    
+    has_month_scores = month.get("stress") is not None or month.get("engagement") is not None
+    avg_stress = month.get("stress") or 0
+    avg_engagement = month.get("engagement") or 0
+    wellness_score = _wellness(avg_stress, avg_engagement) if has_month_scores else 0
+    at_risk_count = month.get("at_risk", 0)
+    
+    emotion_counts = Counter({e["_id"]: e["count"] for e in result["emotions"]})
+    dominant_emotion = emotion_counts.most_common(1)[0][0] if emotion_counts else "neutral"
+    
+    weeks = {w["_id"]: w for w in result["weeks"]}
+    current = weeks.get("current", {})
+    previous = weeks.get("previous", {})
+    
+    current_avg_stress = current.get("stress") if current.get("stress") is not None else avg_stress
+    current_avg_engagement = current.get("engagement") if current.get("engagement") is not None else avg_engagement
+    has_current_scores = current.get("stress") is not None or current.get("engagement") is not None
+    current_wellness = _wellness(current_avg_stress, current_avg_engagement) if has_current_scores else wellness_score
+    
+    prev_avg_stress = previous.get("stress") if previous.get("stress") is not None else current_avg_stress
+    prev_avg_engagement = previous.get("engagement") if previous.get("engagement") is not None else current_avg_engagement
+    has_prev_scores = previous.get("stress") is not None or previous.get("engagement") is not None
+    prev_wellness = _wellness(prev_avg_stress, prev_avg_engagement) if has_prev_scores else current_wellness
+    
+    trend = {bucket["_id"]: bucket for bucket in result["trend"]}
+    days = [today - timedelta(days=i) for i in range(TREND_DAYS - 1, -1, -1)]
+    stress_trend = [round(trend.get(day, {}).get("stress") or 0) for day in days]
+    engagement_trend = [round(trend.get(day, {}).get("engagement") or 0) for day in days]
+    
+    today_checkins = _count(result["today"])
+    completion_rate = (today_checkins / total_employees * 100) if total_employees > 0 else 0
+    
+    return {
+        "wellness_score": round(wellness_score, 1),
+        "wellness_change": _change(prev_wellness, current_wellness),
+        "active_employees": _count(result["active_employees"]),
+        "total_employees": total_employees,
+        "at_risk_count": at_risk_count,
+        "at_risk_percentage": round((at_risk_count / total_employees * 100) if total_employees > 0 else 0, 1),
+        "avg_stress": round(avg_stress, 1),
+        "stress_change": round(((prev_avg_stress - current_avg_stress) / prev_avg_stress) * 100, 1) if prev_avg_stress > 0 else 0,
+        "avg_engagement": round(avg_engagement, 1),
+        "engagement_change": _change(prev_avg_engagement, current_avg_engagement),
+        "dominant_emotion": dominant_emotion,
+        "checkins_this_week": _count(result["this_week"]),
+        "checkins_this_month": month.get("count", 0),
+        "completion_rate": round(completion_rate, 1),
+        "stress_trend": stress_trend,
+        "engagement_trend": engagement_trend,
+        "emotion_distribution": dict(emotion_counts)
+    }
+
+async def load_rollups(now: datetime, scope: str = ROLLUP_SCOPE) -> Tuple[List[Dict[str, Any]], int, int]:
+    """
+    Fetch the last ROLLUP_DAYS daily rollups and the employee count
+    
+    Also counts the raw check-ins of the same whole-day window (a ranged
+    count on the created_at index), so callers can tell whether the rollups
+    cover every check-in.
+    
+    Returns:
+        Tuple of (rollup documents, employee count, raw check-in count)
+    """
+    today = rollup_day(now)
+    first_day = today - timedelta(days=ROLLUP_DAYS - 1)
+    keys = [rollup_key(today - timedelta(days=i), scope) for i in range(ROLLUP_DAYS)]
+    rollups, total_employees, raw_checkins = await asyncio.gather(
+        get_daily_rollups_collection().find({"_id": {"$in": keys}}).to_list(ROLLUP_DAYS),
+        get_users_collection().count_documents({"role": "employee"}),
+        get_checkins_collection().count_documents(
+            {"created_at": {"$gte": first_day, "$lt": today + timedelta(days=1)}}
+        )
+    )
+    return rollups, total_employees, raw_checkins
+
+async def compute_dashboard_metrics(now: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Compute the admin dashboard metrics
+    
+    DASHBOARD_SOURCE=rollups reads the daily_rollups documents of the last
+    month (kept current by record_checkin_rollup); checkins aggregates the
+    raw check-ins with a single $facet pipeline. Rollups are only used when
+    their check-in total matches the raw count for the window; otherwise
+    (rollups deployed mid-window, missed updates, or a rebuild still
+    pending) the mismatch is logged and the $facet pipeline is used until
+    scripts/rebuild_rollups.py has run.
+    
+    Returns:
+        Dictionary with wellness metrics, employee stats, and trends
+    """
+    now = now or datetime.now()
+    
+    if settings.DASHBOARD_SOURCE == "rollups":
+        rollups, total_employees, raw_checkins = await load_rollups(now)
+        rollup_checkins = sum(doc.get("checkins", 0) for doc in rollups)
+        if rollup_checkins == raw_checkins:
+            return summarize_dashboard(rollups_to_facets(rollups, total_employees, now), now)
+        logger.warning(
+            f"⚠️ Daily rollups cover {rollup_checkins} of {raw_checkins} check-ins in the dashboard window, "
+            f"aggregating check-ins (run scripts/rebuild_rollups.py)"
+        )
+        metrics.inc("dashboard_rollup_mismatch_total")
+    
+    checkins_collection = get_checkins_collection()
+    users_collection = get_users_collection()
+    
+    pipeline = build_dashboard_pipeline(now, users_collection.name)
+    results = await checkins_collection.aggregate(pipeline).to_list(1)
+    return summarize_dashboard(results[0], now)
+
+class DashboardCache:
+    """
+    Per-process cache of the dashboard response
+    
+    Entries are fresh for DASHBOARD_CACHE_TTL_SECONDS and until the next
+    invalidate() (called when a check-in is stored on this node; other
+    workers pick it up when their TTL runs out). Concurrent misses share
+    one computation. With DASHBOARD_CACHE_STALE_SECONDS > 0 an expired or
+    invalidated entry is still served for that long while a single
+    background refresh runs.
+    """
+    
+    def __init__(self, ttl_seconds: Optional[float] = None, stale_seconds: Optional[float] = None):
+        self.ttl_seconds = settings.DASHBOARD_CACHE_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.stale_seconds = settings.DASHBOARD_CACHE_STALE_SECONDS if stale_seconds is None else stale_seconds
+        self._value: Optional[Dict[str, Any]] = None
+        self._computed_at = 0.0
+        self._value_generation = -1
+        self._generation = 0
+        self._inflight: Optional["asyncio.Task[Dict[str, Any]]"] = None
+        self._inflight_generation = -1
+    
+    def invalidate(self):
+        """Mark the cached response as outdated (a new check-in was stored)"""
+        self._generation += 1
+        metrics.inc("dashboard_cache_invalidations_total")
+    
+    def _store(self, value: Dict[str, Any], generation: int, computed_at: float):
+        if generation >= self._value_generation:
+            self._value = value
+            self._value_generation = generation
+            self._computed_at = computed_at
+    
+    def _on_done(self, task: "asyncio.Task[Dict[str, Any]]"):
+        if self._inflight is task:
+            self._inflight = None
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"⚠️ Dashboard metrics refresh failed: {task.exception()}")
+    
+    def _refresh(self, compute: Callable[[], Awaitable[Dict[str, Any]]]) -> "asyncio.Task[Dict[str, Any]]":
+        """Start a computation for the current generation, or join the one in flight"""
+        if self._inflight is not None and self._inflight_generation == self._generation:
+            return self._inflight
+        
+        generation = self._generation
+        
+        async def run() -> Dict[str, Any]:
+            started = time.monotonic()
+            value = await compute()
+            metrics.observe("dashboard_compute_seconds", time.monotonic() - started)
+            self._store(value, generation, started)
+            return value
+        
+        task = asyncio.ensure_future(run())
+        self._inflight = task
+        self._inflight_generation = generation
+        task.add_done_callback(self._on_done)
+        return task
+    
+    async def get(self, compute: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Return the cached dashboard response, computing it on a miss
+        
+        Args:
+            compute: Coroutine function producing a fresh response
+        """
+        if self.ttl_seconds <= 0:
+            return await compute()
+        
+        age = time.monotonic() - self._computed_at
+        if self._value is not None:
+            if self._value_generation == self._generation and age < self.ttl_seconds:
+                metrics.inc("dashboard_cache_total", result="hit")
+                return self._value
+            if self.stale_seconds > 0 and age < self.ttl_seconds + self.stale_seconds:
+                metrics.inc("dashboard_cache_total", result="stale")
+                self._refresh(compute)
+                return self._value
+        
+        joined = self._inflight is not None and self._inflight_generation == self._generation
+        metrics.inc("dashboard_cache_total", result="joined" if joined else "miss")
+        return await asyncio.shield(self._refresh(compute))
+
+dashboard_cache = DashboardCache()
+
+async def get_dashboard_metrics_cached() -> Dict[str, Any]:
+    """Dashboard metrics through the process-wide dashboard_cache"""
+    return await dashboard_cache.get(compute_dashboard_metrics)
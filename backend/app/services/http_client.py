@@ -0,0 +1,66 @@
+from typing import Optional
+import httpx
+import logging
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_client: Optional[httpx.AsyncClient] = None
+
+def _http2_available() -> bool:
+    try:
+        import h2
+        return True
+    except ImportError:
+        return False
+
+def build_http_client() -> httpx.AsyncClient:
+    """
+    Build the shared outbound HTTP client from settings
+    
+    Connections are pooled and kept alive across requests, so repeated calls
+    to the same host (e.g. api.groq.com) skip DNS, TCP and TLS setup.
+    """
+    http2 = settings.HTTP2_ENABLED
+    if http2 and not _http2_available():
+        logger.warning("⚠️ HTTP2_ENABLED is set but the 'h2' package is not installed, using HTTP/1.1")
+        http2 = False
+    
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(
+            settings.HTTP_TIMEOUT_SECONDS,
+            connect=settings.HTTP_CONNECT_TIMEOUT_SECONDS
+        ),
+        limits=httpx.Limits(
+            max_connections=settings.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS
+        ),
+        http2=http2
+    )
+
+async def init_http_client() -> httpx.AsyncClient:
+    """Create the application-scoped HTTP client (called on startup)"""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = build_http_client()
+        logger.info("✅ Shared HTTP client ready")
+    return _client
+
+def get_http_client() -> httpx.AsyncClient:
+    """
+    Get the shared HTTP client for outbound integrations
+    
+    Created lazily when used outside the app lifecycle (scripts, tests).
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = build_http_client()
+    return _client
+
+async def close_http_client():
+    """Close pooled connections (called on shutdown)"""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -0,0 +1,214 @@
+from typing import Dict, Any, Optional
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import copy
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+from app.config import settings
+from app.database import get_insight_cache_collection
+from app.services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+PROMPT_VERSION = 1
+NAME_PLACEHOLDER = "{{employee_name}}"
+
+VIDEO_PERCENT_FIELDS = ("stress_avg", "stress_max", "stress_min", "engagement_score")
+AUDIO_UNIT_FIELDS = ("voice_energy", "pitch_variance", "sentiment_confidence")
+
+def quantize(value: Any, quantum: float) -> Optional[float]:
+    """Snap a numeric value to the nearest multiple of `quantum` (None if not numeric)"""
+    if not isinstance(value, (int, float)) or isinstance(value, bool):
+        return None
+    if quantum <= 0:
+        return round(float(value), 2)
+    return round(round(value / quantum) * quantum, 4)
+
+def _normalize_text(text: Optional[str], mode: str) -> Optional[str]:
+    text = " ".join((text or "").lower().split())
+    if not text:
+        return None
+    if mode == "exclude":
+        return "present"
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+def insight_fingerprint(
+    metrics_data: Dict[str, Any],
+    notes: Optional[str] = None,
+    model: str = "",
+    quantum: Optional[float] = None,
+    text_mode: Optional[str] = None
+) -> str:
+    """
+    Build a cache key from the inputs that shape the insights prompt
+    
+    Percent-scale metrics are snapped to multiples of `quantum`, 0-1 scale
+    metrics to multiples of `quantum / 100`. Transcript and notes are
+    either hashed (only identical text matches) or reduced to a presence
+    flag, per INSIGHT_CACHE_TEXT_MODE.
+    
+    Returns:
+        Hex digest identifying the prompt equivalence class
+    """
+    quantum = settings.INSIGHT_CACHE_QUANTUM if quantum is None else quantum
+    text_mode = text_mode or settings.INSIGHT_CACHE_TEXT_MODE
+    audio = metrics_data.get("audio") or {}
+    
+    parts: Dict[str, Any] = {
+        "v": PROMPT_VERSION,
+        "model": model,
+        "yawns": metrics_data.get("yawns_count", 0),
+        "face": bool(metrics_data.get("face_detected", True)),
+        "duration": quantize(metrics_data.get("duration_seconds", 0), quantum),
+        "head_pose": quantize(metrics_data.get("head_pose_variance", 0), quantum / 100),
+        "notes": _normalize_text(notes, text_mode)
+    }
+    for field in VIDEO_PERCENT_FIELDS:
+        parts[field] = quantize(metrics_data.get(field, 0), quantum)
+    
+    if audio.get("has_audio") and audio.get("transcript"):
+        emotions = audio.get("emotions") or {}
+        parts["audio"] = {
+            "transcript": _normalize_text(audio.get("transcript"), text_mode),
+            "words": quantize(audio.get("word_count", 0), quantum),
+            "pace": quantize(audio.get("speaking_pace_wpm", 0), quantum),
+            "pauses": audio.get("pauses_count", 0),
+            "sentiment": audio.get("sentiment", "neutral"),
+            "dominant_emotion": audio.get("dominant_emotion", "neutral"),
+            "top_emotions": [e[0] for e in sorted(emotions.items(), key=lambda x: x[1], reverse=True)[:3]],
+            **{field: quantize(audio.get(field, 0), quantum / 100) for field in AUDIO_UNIT_FIELDS}
+        }
+    
+    encoded = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+def _replace_in_insights(insights: Dict[str, Any], replace) -> Dict[str, Any]:
+    result = {}
+    for key, value in insights.items():
+        if isinstance(value, str):
+            result[key] = replace(value)
+        elif isinstance(value, list):
+            result[key] = [replace(v) if isinstance(v, str) else v for v in value]
+        else:
+            result[key] = copy.deepcopy(value)
+    return result
+
+def anonymize_insights(insights: Dict[str, Any], employee_name: str) -> Dict[str, Any]:
+    """Replace the employee's full and first name with a placeholder before sharing"""
+    names = [n for n in {employee_name.strip(), employee_name.strip().split(" ")[0]} if n and n != "Employee"]
+    if not names:
+        return _replace_in_insights(insights, lambda s: s)
+    pattern = re.compile(r"\b(" + "|".join(re.escape(n) for n in sorted(names, key=len, reverse=True)) + r")\b")
+    return _replace_in_insights(insights, lambda s: pattern.sub(NAME_PLACEHOLDER, s))
+
+def personalize_insights(insights: Dict[str, Any], employee_name: str) -> Dict[str, Any]:
+    """Fill the name placeholder of cached insights for the requesting employee"""
+    return _replace_in_insights(insights, lambda s: s.replace(NAME_PLACEHOLDER, employee_name))
+
+class InsightCache:
+    """
+    Two-tier cache of LLM insights keyed by insight_fingerprint
+    
+    The in-memory tier is a per-process LRU with TTL; the optional Mongo tier
+    (INSIGHT_CACHE_MONGO) shares entries across workers and expires them via
+    a TTL index. Entries are stored anonymized and personalized on read.
+    """
+    
+    def __init__(self, max_entries: Optional[int] = None, ttl_seconds: Optional[int] = None):
+        self.max_entries = max_entries or settings.INSIGHT_CACHE_MAX_ENTRIES
+        self.ttl_seconds = ttl_seconds or settings.INSIGHT_CACHE_TTL_SECONDS
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    def _record(self, hit: bool, tier: str):
+        metrics.inc("insight_cache_lookups_total", result="hit" if hit else "miss", tier=tier)
+        if hit:
+            self.hits += 1
+        elif tier == "all":
+            self.misses += 1
+        else:
+            return
+        metrics.set_gauge("insight_cache_hit_ratio", round(self.hits / (self.hits + self.misses), 4))
+    
+    def _get_memory(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+    
+    def _set_memory(self, key: str, value: Dict[str, Any]):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            metrics.set_gauge("insight_cache_entries", len(self._entries))
+    
+    async def get(self, key: str, employee_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up cached insights for a fingerprint
+        
+        Returns:
+            Personalized insights, or None on a miss
+        """
+        value = self._get_memory(key)
+        if value is not None:
+            self._record(True, "memory")
+            return personalize_insights(value, employee_name)
+        self._record(False, "memory")
+        
+        if settings.INSIGHT_CACHE_MONGO:
+            try:
+                doc = await get_insight_cache_collection().find_one(
+                    {"_id": key, "expires_at": {"$gt": datetime.utcnow()}}
+                )
+            except Exception as e:
+                logger.warning(f"Insight cache lookup failed: {e}")
+                doc = None
+            if doc:
+                self._record(True, "mongo")
+                self._set_memory(key, doc["insights"])
+                return personalize_insights(doc["insights"], employee_name)
+            self._record(False, "mongo")
+        
+        self._record(False, "all")
+        return None
+    
+    async def set(self, key: str, insights: Dict[str, Any], employee_name: str):
+        """Store LLM insights for a fingerprint (anonymized)"""
+        value = anonymize_insights(insights, employee_name)
+        self._set_memory(key, value)
+        
+        if settings.INSIGHT_CACHE_MONGO:
+            try:
+                await get_insight_cache_collection().replace_one(
+                    {"_id": key},
+                    {
+                        "_id": key,
+                        "insights": value,
+                        "created_at": datetime.utcnow(),
+                        "expires_at": datetime.utcnow() + timedelta(seconds=self.ttl_seconds)
+                    },
+                    upsert=True
+                )
+            except Exception as e:
+                logger.warning(f"Insight cache store failed: {e}")
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            metrics.set_gauge("insight_cache_entries", 0)
+
+insight_cache = InsightCache()
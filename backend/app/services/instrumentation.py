@@ -0,0 +1,124 @@
+from typing import Dict, Any, List, Optional, Iterable
+from contextlib import contextmanager
+import logging
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+def peak_rss_kb() -> int:
+    """Peak resident set size of this process in KB (0 where unsupported)"""
+    if resource is None:
+        return 0
+    return int(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+class StageRecord:
+    """Timing record for a single pipeline stage, started on creation"""
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.inputs: Dict[str, Any] = {}
+        self.wall_ms = 0.0
+        self.cpu_ms = 0.0
+        self.peak_rss_delta_kb = 0
+        self.error: Optional[str] = None
+        self._wall_start = time.perf_counter()
+        self._cpu_start = time.process_time()
+        self._rss_start = peak_rss_kb()
+    
+    def set_input(self, **sizes):
+        """Record input size for the stage (frames, audio seconds, tokens, ...)"""
+        self.inputs.update({k: v for k, v in sizes.items() if v is not None})
+    
+    def finish(self):
+        self.wall_ms = (time.perf_counter() - self._wall_start) * 1000
+        self.cpu_ms = (time.process_time() - self._cpu_start) * 1000
+        self.peak_rss_delta_kb = max(0, peak_rss_kb() - self._rss_start)
+        logger.debug(f"Stage {self.name}: {self.wall_ms:.0f}ms wall, {self.cpu_ms:.0f}ms cpu")
+    
+    def to_dict(self) -> Dict[str, Any]:
+        record = {
+            "wall_ms": round(self.wall_ms, 2),
+            "cpu_ms": round(self.cpu_ms, 2),
+            "peak_rss_delta_kb": self.peak_rss_delta_kb,
+            "input": self.inputs
+        }
+        if self.error:
+            record["error"] = self.error
+        return record
+
+class StageTimings:
+    """
+    Collects per-stage wall time, CPU time, peak RSS growth and input size
+    
+    CPU time is process-wide, so it includes executor threads working on the
+    stage as well as any concurrent requests on the same worker.
+    """
+    
+    def __init__(self):
+        self.stages: Dict[str, StageRecord] = {}
+    
+    def start(self, name: str) -> StageRecord:
+        """Start timing a stage; call finish() on the returned record"""
+        record = StageRecord(name)
+        self.stages[name] = record
+        return record
+    
+    @contextmanager
+    def stage(self, name: str):
+        record = self.start(name)
+        try:
+            yield record
+        except Exception as e:
+            record.error = str(e)
+            raise
+        finally:
+            record.finish()
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: record.to_dict() for name, record in self.stages.items()}
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Linear-interpolated percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+def summarize_stage_timings(timings_docs: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Aggregate stored `timings` sub-documents into p50/p95/p99 per stage
+    
+    Args:
+        timings_docs: Iterable of task `timings` sub-documents
+    
+    Returns:
+        Dictionary keyed by stage with sample count and wall/cpu percentiles
+    """
+    samples: Dict[str, Dict[str, List[float]]] = {}
+    for timings in timings_docs:
+        for name, record in (timings or {}).items():
+            stage_samples = samples.setdefault(name, {"wall_ms": [], "cpu_ms": [], "peak_rss_delta_kb": []})
+            for field in stage_samples:
+                value = record.get(field)
+                if value is not None:
+                    stage_samples[field].append(float(value))
+    
+    summary = {}
+    for name, fields in samples.items():
+        summary[name] = {"count": len(fields["wall_ms"])}
+        for field, values in fields.items():
+            values.sort()
+            summary[name][field] = {
+                "p50": round(percentile(values, 50), 2),
+                "p95": round(percentile(values, 95), 2),
+                "p99": round(percentile(values, 99), 2),
+                "max": round(values[-1], 2) if values else 0.0
+            }
+    return summary
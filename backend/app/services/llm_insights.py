@@ -1,37 +1,77 @@
 import httpx
-
-from typing import Dict, Any, List, Optional
-
+from typing import Dict, Any, List, Optional, Tuple, Callable, Awaitable
+import json
 import logging
-
 import asyncio
-
+import time
 from app.config import settings
-
-
+from app.services.http_client import get_http_client
+from app.services.llm_limiter import llm_limiter, parse_retry_after
+from app.services.circuit_breaker import llm_breaker
+from app.services.insight_cache import insight_cache, insight_fingerprint
+from app.services.tokenizer import count_tokens, count_message_tokens, truncate_to_tokens, tokenizer_name
+from app.services.metrics import metrics as metrics_registry
 
 logger = logging.getLogger(__name__)
 
-
-
-GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
-
+GROQ_API_URL = settings.LLM_API_URL
 GROQ_API_KEY = settings.GROQ_API_KEY
+GROQ_MODEL = settings.LLM_MODEL
+
+INSIGHT_SECTIONS = [
+    ("OVERALL_EXPERIENCE", "overall_experience"),
+    ("EMOTIONAL_STATE", "emotional_state"),
+    ("WORK_MOTIVATION", "work_motivation"),
+    ("PROFESSIONAL_APPEARANCE", "professional_appearance"),
+    ("AI_OBSERVATIONS", "ai_observations"),
+    ("RECOMMENDATIONS", "recommendations")
+]
+
+SECTION_KEYS = {header: section for header, section in INSIGHT_SECTIONS}
+
+INSIGHTS_JSON_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "overall_experience": {"type": "string"},
+        "emotional_state": {"type": "string"},
+        "work_motivation": {"type": "string"},
+        "professional_appearance": {"type": "string"},
+        "ai_observations": {"type": "string"},
+        "recommendations": {"type": "array", "items": {"type": "string"}, "minItems": 1, "maxItems": 5}
+    },
+    "required": [section for _, section in INSIGHT_SECTIONS],
+    "additionalProperties": False
+}
+
+TEXT_FORMAT_INSTRUCTIONS = """Format as:
+OVERALL_EXPERIENCE: [narrative description]
+EMOTIONAL_STATE: [narrative description]
+WORK_MOTIVATION: [narrative description]
+PROFESSIONAL_APPEARANCE: [narrative description]
+AI_OBSERVATIONS: [narrative description]
+RECOMMENDATIONS:
+- [recommendation 1]
+- [recommendation 2]
+- [recommendation 3]
+"""
+
+JSON_FORMAT_INSTRUCTIONS = """Respond with a single JSON object and nothing else, using these keys:
+{"overall_experience": "...", "emotional_state": "...", "work_motivation": "...", "professional_appearance": "...", "ai_observations": "...", "recommendations": ["...", "...", "..."]}
+"""
 
-GROQ_MODEL = "llama-3.1-8b-instant"
+TOKEN_BUCKETS = (100, 250, 500, 750, 1000, 1500, 2000, 3000, 4000, 8000)
+THROUGHPUT_BUCKETS = (10, 25, 50, 100, 200, 400, 800, 1600)
 
+PARSE_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025)
 
+SectionCallback = Callable[[str, Any], Awaitable[None]]
 
 async def generate_insights(
-
     metrics: Dict[str, Any],
-
     notes: Optional[str] = None,
-
-    employee_name: str = "Employee"
-
+    employee_name: str = "Employee",
+    on_section: Optional[SectionCallback] = None
 ) -> Dict[str, Any]:
-
     """
     Generate intelligent insights from check-in metrics using Groq (free LLM API)
     
@@ -39,31 +79,252 @@ async def generate_insights(
         metrics: Dictionary containing analysis metrics (stress, yawns, engagement, etc.)
         notes: Optional employee notes from check-in
         employee_name: Employee's name for personalization
+        on_section: Optional async callback(section, content) awaited as each
+            insight section completes (requires LLM_STREAMING)
     
     Returns:
-        Dictionary with summary and action items
+        Dictionary with summary and action items; LLM results also carry a
+        "usage" entry with token counts and cost for the check-in
     """
-
     
-
     if not GROQ_API_KEY:
-
         logger.warning("GROQ_API_KEY not found, using fallback insights")
-
+        return generate_fallback_insights(metrics, notes)
+    
+    try:
+        response_format = settings.LLM_RESPONSE_FORMAT
+        cache_key = None
+        if settings.INSIGHT_CACHE_ENABLED:
+            cache_key = insight_fingerprint(metrics, notes, model=GROQ_MODEL)
+            cached = await insight_cache.get(cache_key, employee_name)
+            if cached is not None:
+                logger.info(f"Using cached insights for {employee_name}")
+                if on_section:
+                    for _, section in INSIGHT_SECTIONS:
+                        await on_section(section, cached.get(section))
+                return cached
+        
+        messages, prompt_info = build_insights_messages(metrics, notes, employee_name, response_format)
+        
+        payload = build_payload(messages, settings.LLM_MAX_COMPLETION_TOKENS, response_format)
+        completion = await request_completion(
+            payload,
+            prompt_info["prompt_tokens"],
+            lambda text: parse_insights_response(text, response_format),
+            on_section if response_format == "text" else None
+        )
+        if completion is None:
+            return generate_fallback_insights(metrics, notes)
+        
+        insights_dict, call_usage = completion
+        insights_dict["source"] = "llm"
+        if cache_key:
+            await insight_cache.set(cache_key, insights_dict, employee_name)
+        insights_dict["usage"] = {**call_usage, "model": GROQ_MODEL, "trimmed": prompt_info["trimmed"]}
+        if on_section and (response_format != "text" or not settings.LLM_STREAMING):
+            for _, section in INSIGHT_SECTIONS:
+                await on_section(section, insights_dict[section])
+        
+        logger.info(f"Successfully generated Groq insights for {employee_name}")
+        
+        return insights_dict
+        
+    except Exception as e:
+        logger.error(f"Error generating Groq insights: {e}", exc_info=True)
         return generate_fallback_insights(metrics, notes)
 
+def build_payload(messages: List[Dict[str, str]], max_tokens: int, response_format: str = "text") -> Dict[str, Any]:
+    payload = {
+        "model": GROQ_MODEL,
+        "messages": messages,
+        "temperature": 0.7,
+        "max_tokens": max_tokens
+    }
+    if response_format == "json_schema":
+        payload["response_format"] = {
+            "type": "json_schema",
+            "json_schema": {"name": "checkin_insights", "strict": True, "schema": INSIGHTS_JSON_SCHEMA}
+        }
+    elif response_format == "json_object":
+        payload["response_format"] = {"type": "json_object"}
+    return payload
+
+async def request_completion(
+    payload: Dict[str, Any],
+    prompt_tokens: int,
+    parse: Callable[[str], Optional[Any]],
+    on_section: Optional[SectionCallback] = None,
+    max_retries: int = 3,
+    retry_delay: float = 1
+) -> Optional[Tuple[Any, Dict[str, Any]]]:
+    """
+    Send a chat completion through the circuit breaker, rate limiter and retry policy
     
+    Args:
+        payload: Chat completions request body
+        prompt_tokens: Local prompt token count (for limiter budget and usage fallback)
+        parse: Parses the completion text; returning None re-requests it
+        on_section: Section callback forwarded to the streaming parser; each
+            section is forwarded once, so a retry does not re-send sections
+            an earlier attempt already streamed
+    
+    Returns:
+        Tuple of (parsed result, token usage), or None when the caller should fall back
+    """
+    client = get_http_client()
+    estimated_tokens = prompt_tokens + payload["max_tokens"]
+    
+    attempt = 0
+    rate_limited = 0
+    call_usage = None
+    rate_limit_deadline = time.monotonic() + settings.LLM_MAX_QUEUE_WAIT_SECONDS
+    
+    sent_sections = set()
+    
+    async def emit_section(section: str, content):
+        if section in sent_sections:
+            return
+        sent_sections.add(section)
+        await on_section(section, content)
+    
+    while attempt < max_retries:
+        if not llm_breaker.allow_request():
+            logger.warning(f"Groq circuit breaker is {llm_breaker.state}, using fallback insights")
+            return None
+        
+        reserved = False
+        breaker_settled = False
+        try:
+            async with llm_limiter.acquire(estimated_tokens):
+                reserved = True
+                call_started = time.perf_counter()
+                if settings.LLM_STREAMING:
+                    response, ai_response, usage = await stream_chat_completion(
+                        client, payload, emit_section if on_section else None
+                    )
+                else:
+                    response = await client.post(
+                        GROQ_API_URL,
+                        headers=groq_headers(),
+                        json=payload,
+                        timeout=settings.LLM_TIMEOUT_SECONDS
+                    )
+                    ai_response = usage = None
+            if response.status_code != 200:
+                llm_limiter.record_usage(estimated_tokens, 0)
+                reserved = False
+            llm_limiter.update_from_headers(response.headers)
+            
+            if response.status_code == 200:
+                llm_breaker.record_success()
+                breaker_settled = True
+                if ai_response is None:
+                    result = response.json()
+                    ai_response = result["choices"][0]["message"]["content"]
+                    usage = result.get("usage")
+                ai_response = ai_response.strip()
+                call_usage = record_token_usage(
+                    usage,
+                    prompt_tokens,
+                    ai_response,
+                    time.perf_counter() - call_started,
+                    previous=call_usage
+                )
+                llm_limiter.record_usage(estimated_tokens, call_usage["last_total_tokens"])
+                reserved = False
+                
+                parsed = parse(ai_response)
+                if parsed is None:
+                    attempt += 1
+                    logger.warning(f"Unparseable Groq response (attempt {attempt}/{max_retries})")
+                    continue
+                call_usage.pop("last_total_tokens")
+                return parsed, call_usage
+            elif response.status_code == 429:
+                llm_breaker.release()
+                breaker_settled = True
+                rate_limited += 1
+                metrics_registry.inc("llm_rate_limited_total")
+                if time.monotonic() < rate_limit_deadline:
+                    if not parse_retry_after(response.headers.get("retry-after")):
+                        llm_limiter.pause(retry_delay * rate_limited)
+                    logger.warning(f"Groq API rate limit, queued for retry ({rate_limited} rate-limited responses)")
+                    continue
+                logger.warning(f"Groq API rate limit persisted beyond {settings.LLM_MAX_QUEUE_WAIT_SECONDS}s")
+                return None
+            elif response.status_code >= 500:
+                llm_breaker.record_failure()
+                breaker_settled = True
+                attempt += 1
+                logger.warning(f"Groq API server error: {response.status_code} (attempt {attempt}/{max_retries})")
+                if attempt < max_retries:
+                    await asyncio.sleep(retry_delay)
+                    continue
+            else:
+                llm_breaker.release()
+                breaker_settled = True
+                logger.warning(f"Groq API error: {response.status_code} - {response.text}")
+                return None
+                
+        except httpx.TimeoutException:
+            llm_breaker.record_failure()
+            breaker_settled = True
+            attempt += 1
+            logger.warning(f"Groq API timeout (attempt {attempt}/{max_retries})")
+            if attempt < max_retries:
+                await asyncio.sleep(retry_delay)
+                continue
+        except httpx.RequestError as e:
+            llm_breaker.record_failure()
+            breaker_settled = True
+            attempt += 1
+            logger.warning(f"Groq API request error: {e} (attempt {attempt}/{max_retries})")
+            if attempt < max_retries:
+                await asyncio.sleep(retry_delay)
+                continue
+        finally:
+            if reserved:
+                llm_limiter.record_usage(estimated_tokens, 0)
+            if not breaker_settled:
+                # Unexpected errors (malformed stream, cancellation) must not hold a half-open probe slot
+                llm_breaker.release()
+    
+    logger.error("All Groq API retry attempts failed, using fallback insights")
+    return None
 
-    try:
+SYSTEM_PROMPT = "You are a compassionate AI wellness coach specializing in employee wellbeing. Your insights should be professional, supportive, and actionable."
+
+INSIGHT_INSTRUCTIONS = """
+Based on the analysis above, provide a comprehensive qualitative assessment in narrative form. Write as if you observed the employee personally. Focus on:
 
-        audio = metrics.get('audio', {})
+1. OVERALL_EXPERIENCE: How was their overall experience during this check-in? What was their general demeanor and state of mind? (2-3 sentences)
 
-        has_audio = audio.get('has_audio', False)
+2. EMOTIONAL_STATE: What emotions were evident? How was their emotional well-being? Describe their mood and emotional presence. (2-3 sentences)
 
-        
+3. WORK_MOTIVATION: How motivated and engaged do they appear? What does their energy level suggest about their work motivation? (2-3 sentences)
+
+4. PROFESSIONAL_APPEARANCE: Comment on their professional appearance and office ethics. How did they present themselves? (2-3 sentences)
+
+5. AI_OBSERVATIONS: What specific behaviors, patterns, or signals did the AI analysis reveal? What predictions can be made about their current state? (2-3 sentences)
+
+6. RECOMMENDATIONS: 3-5 specific, actionable recommendations based on observations.
 
-        context = f"""You are an AI wellness coach analyzing a daily check-in for {employee_name}.
+Write in a professional, empathetic, narrative style. NO NUMBERS OR METRICS. Focus on qualitative observations and human insights.
 
+"""
+
+TRANSCRIPT_MAX_CHARS = 300
+
+def render_checkin_data(
+    metrics: Dict[str, Any],
+    notes: Optional[str],
+    transcript: Optional[str],
+    emotion_details: str
+) -> str:
+    """Render the metrics, audio analysis and notes block of the insights prompt"""
+    audio = metrics.get('audio', {})
+    
+    context = f"""
 Video Analysis Metrics:
 - Stress Level (Average): {metrics.get('stress_avg', 0):.1f}%
 - Stress Level (Max): {metrics.get('stress_max', 0):.1f}%
@@ -74,447 +335,581 @@ Video Analysis Metrics:
 - Video Duration: {metrics.get('duration_seconds', 0):.1f} seconds
 - Face Detected: {metrics.get('face_detected', True)}
 """
-
-        
-
-        if has_audio and audio.get('transcript'):
-
-
-            emotions = audio.get('emotions', {})
-
-            dominant_emotion = audio.get('dominant_emotion', 'neutral')
-
-            sentiment_confidence = audio.get('sentiment_confidence', 0.5)
-
-            
-
-            emotion_details = ""
-
-            if emotions:
-
-                top_emotions = sorted(emotions.items(), key=lambda x: x[1], reverse=True)[:3]
-
-                emotion_details = f"Top emotions: {', '.join([f'{e[0]} ({e[1]:.2f})' for e in top_emotions])}"
-
-            
-
-            context += f"""
+    
+    if transcript is not None:
+        full_transcript = audio.get('transcript', '')
+        context += f"""
 Audio Analysis:
-- Transcript: "{audio.get('transcript', '')[:300]}"{'...' if len(audio.get('transcript', '')) > 300 else ''}
+- Transcript: "{transcript}"{'...' if len(full_transcript) > len(transcript) else ''}
 - Word Count: {audio.get('word_count', 0)} words
 - Speaking Pace: {audio.get('speaking_pace_wpm', 0)} words/min (Normal: 120-150 wpm)
 - Voice Energy: {audio.get('voice_energy', 0):.2f} (0=quiet, 1=loud)
 - Pitch Variance: {audio.get('pitch_variance', 0):.2f} (higher = more stress in voice)
 - Hesitations/Pauses: {audio.get('pauses_count', 0)} long pauses
-- Overall Sentiment: {audio.get('sentiment', 'neutral')} (confidence: {sentiment_confidence:.2f})
-- Dominant Emotion: {dominant_emotion}
+- Overall Sentiment: {audio.get('sentiment', 'neutral')} (confidence: {audio.get('sentiment_confidence', 0.5):.2f})
+- Dominant Emotion: {audio.get('dominant_emotion', 'neutral')}
 {emotion_details}
 """
+    
+    if notes:
+        context += f"\nEmployee's Notes: {notes}\n"
+    
+    return context
 
-        
-
-        if notes:
-
-            context += f"\nEmployee's Notes: {notes}\n"
-
-        
-
-        context += """
-Based on the analysis above, provide a comprehensive qualitative assessment in narrative form. Write as if you observed the employee personally. Focus on:
-
-1. OVERALL_EXPERIENCE: How was their overall experience during this check-in? What was their general demeanor and state of mind? (2-3 sentences)
-
-2. EMOTIONAL_STATE: What emotions were evident? How was their emotional well-being? Describe their mood and emotional presence. (2-3 sentences)
-
-3. WORK_MOTIVATION: How motivated and engaged do they appear? What does their energy level suggest about their work motivation? (2-3 sentences)
-
-4. PROFESSIONAL_APPEARANCE: Comment on their professional appearance and office ethics. How did they present themselves? (2-3 sentences)
-
-5. AI_OBSERVATIONS: What specific behaviors, patterns, or signals did the AI analysis reveal? What predictions can be made about their current state? (2-3 sentences)
+def audio_excerpt(metrics: Dict[str, Any]) -> Tuple[Optional[str], str]:
+    """Transcript slice and top-emotion line for the prompt (None if there is no transcript)"""
+    audio = metrics.get('audio', {})
+    if not (audio.get('has_audio', False) and audio.get('transcript')):
+        return None, ""
+    
+    emotion_details = ""
+    emotions = audio.get('emotions', {})
+    if emotions:
+        top_emotions = sorted(emotions.items(), key=lambda x: x[1], reverse=True)[:3]
+        emotion_details = f"Top emotions: {', '.join([f'{e[0]} ({e[1]:.2f})' for e in top_emotions])}"
+    return audio.get('transcript', '')[:TRANSCRIPT_MAX_CHARS], emotion_details
+
+def fit_checkin_data(metrics: Dict[str, Any], notes: Optional[str], max_tokens: int) -> Tuple[str, List[str]]:
+    """
+    Render the check-in data block within `max_tokens`
+    
+    Optional content is trimmed in priority order: emotion breakdown first,
+    then the transcript excerpt, then the employee's notes. Metrics are
+    never trimmed.
+    
+    Returns:
+        Tuple of (rendered block, list of trimmed parts)
+    """
+    transcript, emotion_details = audio_excerpt(metrics)
+    data = render_checkin_data(metrics, notes, transcript, emotion_details)
+    tokens = count_tokens(data)
+    trimmed: List[str] = []
+    
+    if tokens > max_tokens and emotion_details:
+        emotion_details = ""
+        trimmed.append("emotions")
+        data = render_checkin_data(metrics, notes, transcript, emotion_details)
+        tokens = count_tokens(data)
+    
+    if tokens > max_tokens and transcript:
+        transcript = truncate_to_tokens(transcript, count_tokens(transcript) - (tokens - max_tokens))
+        trimmed.append("transcript")
+        data = render_checkin_data(metrics, notes, transcript, emotion_details)
+        tokens = count_tokens(data)
+    
+    if tokens > max_tokens and notes:
+        notes = truncate_to_tokens(notes, count_tokens(notes) - (tokens - max_tokens))
+        notes = f"{notes}..." if notes else None
+        trimmed.append("notes")
+        data = render_checkin_data(metrics, notes, transcript, emotion_details)
+    
+    for part in trimmed:
+        metrics_registry.inc("llm_prompt_trimmed_total", part=part)
+    return data, trimmed
 
-6. RECOMMENDATIONS: 3-5 specific, actionable recommendations based on observations.
+def build_insights_messages(
+    metrics: Dict[str, Any],
+    notes: Optional[str],
+    employee_name: str,
+    response_format: str = "text",
+    max_prompt_tokens: Optional[int] = None
+) -> Tuple[List[Dict[str, str]], Dict[str, Any]]:
+    """
+    Build the chat messages for an insights request within an input-token budget
+    
+    The system prompt, header and instructions are fixed; the check-in data
+    block gets the rest of LLM_MAX_PROMPT_TOKENS (see fit_checkin_data).
+    
+    Returns:
+        Tuple of (messages, info) where info has prompt_tokens, budget and
+        the list of trimmed parts
+    """
+    budget = max_prompt_tokens or settings.LLM_MAX_PROMPT_TOKENS
+    header = f"You are an AI wellness coach analyzing a daily check-in for {employee_name}.\n"
+    instructions = INSIGHT_INSTRUCTIONS + (JSON_FORMAT_INSTRUCTIONS if response_format != "text" else TEXT_FORMAT_INSTRUCTIONS)
+    overhead = count_message_tokens([{"content": SYSTEM_PROMPT}, {"content": header + instructions}])
+    
+    data, trimmed = fit_checkin_data(metrics, notes, budget - overhead)
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": header + data + instructions}
+    ]
+    prompt_tokens = count_message_tokens(messages)
+    if prompt_tokens > budget:
+        logger.warning(f"Insights prompt is {prompt_tokens} tokens after trimming (budget {budget})")
+    metrics_registry.observe("llm_prompt_tokens", prompt_tokens, buckets=TOKEN_BUCKETS)
+    
+    return messages, {"prompt_tokens": prompt_tokens, "budget": budget, "trimmed": trimmed}
 
-Write in a professional, empathetic, narrative style. NO NUMBERS OR METRICS. Focus on qualitative observations and human insights.
+BATCH_DELIMITER = "=== CHECKIN"
 
-Format as:
-OVERALL_EXPERIENCE: [narrative description]
-EMOTIONAL_STATE: [narrative description]
-WORK_MOTIVATION: [narrative description]
-PROFESSIONAL_APPEARANCE: [narrative description]
-AI_OBSERVATIONS: [narrative description]
-RECOMMENDATIONS:
-- [recommendation 1]
-- [recommendation 2]
-- [recommendation 3]
+BATCH_INSTRUCTIONS = """
+The check-ins above belong to different employees. Assess EACH check-in separately, using only that check-in's data and the employee name given for it.
 """
 
-        
+BATCH_TEXT_FORMAT_INSTRUCTIONS = """For every check-in, start with its delimiter line and then use this format:
+=== CHECKIN <number> ===
+""" + TEXT_FORMAT_INSTRUCTIONS
 
-        max_retries = 3
-
-        retry_delay = 1
+BATCH_JSON_FORMAT_INSTRUCTIONS = """Respond with a single JSON object and nothing else:
+{"checkins": [{"checkin": <number>, "overall_experience": "...", "emotional_state": "...", "work_motivation": "...", "professional_appearance": "...", "ai_observations": "...", "recommendations": ["...", "...", "..."]}]}
+"""
 
+def build_batch_messages(
+    checkins: List[Dict[str, Any]],
+    response_format: str = "text"
+) -> Tuple[List[Dict[str, str]], Dict[str, Any]]:
+    """
+    Pack several check-ins into one insights request
+    
+    The system prompt and instruction block are sent once; each check-in gets
+    a numbered, delimited data block trimmed to the same data budget as a
+    single request.
+    
+    Args:
+        checkins: Dicts with metrics, notes and employee_name
+    
+    Returns:
+        Tuple of (messages, info) with prompt_tokens and per-check-in trimmed parts
+    """
+    format_instructions = BATCH_JSON_FORMAT_INSTRUCTIONS if response_format != "text" else BATCH_TEXT_FORMAT_INSTRUCTIONS
+    single_overhead = count_message_tokens([
+        {"content": SYSTEM_PROMPT},
+        {"content": "You are an AI wellness coach analyzing a daily check-in for Employee.\n" + INSIGHT_INSTRUCTIONS + TEXT_FORMAT_INSTRUCTIONS}
+    ])
+    data_budget = settings.LLM_MAX_PROMPT_TOKENS - single_overhead
+    
+    context = f"You are an AI wellness coach analyzing {len(checkins)} daily check-ins.\n"
+    trimmed = []
+    for number, checkin in enumerate(checkins, 1):
+        data, parts = fit_checkin_data(checkin["metrics"], checkin.get("notes"), data_budget)
+        trimmed.append(parts)
+        context += f"\n{BATCH_DELIMITER} {number} ===\nEmployee: {checkin.get('employee_name') or 'Employee'}\n{data}"
+    context += BATCH_INSTRUCTIONS + INSIGHT_INSTRUCTIONS + format_instructions
+    
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": context}
+    ]
+    prompt_tokens = count_message_tokens(messages)
+    metrics_registry.observe("llm_prompt_tokens", prompt_tokens, buckets=TOKEN_BUCKETS, mode="batch")
+    return messages, {"prompt_tokens": prompt_tokens, "trimmed": trimmed}
+
+def parse_batch_response(response: str, count: int, response_format: str = "text") -> Optional[Dict[int, Dict[str, Any]]]:
+    """
+    Split a batched completion back into per-check-in insights
+    
+    Returns:
+        Dictionary of check-in number (1-based) to insight sections for every
+        check-in that parsed, or None if none did
+    """
+    results: Dict[int, Dict[str, Any]] = {}
+    
+    if response_format != "text":
+        try:
+            data = load_json_response(response)
+            entries = data.get("checkins", []) if isinstance(data, dict) else []
+            for entry in entries:
+                number = entry.get("checkin") if isinstance(entry, dict) else None
+                if isinstance(number, int) and 1 <= number <= count:
+                    try:
+                        results[number] = validate_insights_object(entry)
+                    except InsightParseError as e:
+                        logger.warning(f"Batched insights for check-in {number} rejected: {e}")
+        except InsightParseError as e:
+            logger.warning(f"Batched structured insights rejected: {e}")
+        if results:
+            return results
+    
+    segments: Dict[int, List[str]] = {}
+    current = None
+    for line in response.split("\n"):
+        marker = line.strip().strip("=#* ").upper()
+        if marker.startswith("CHECKIN"):
+            number = marker[len("CHECKIN"):].strip(" :#")
+            if number.isdigit() and 1 <= int(number) <= count:
+                current = int(number)
+                segments[current] = []
+                continue
+        if current is not None:
+            segments[current].append(line)
+    
+    for number, lines in segments.items():
+        sections = parse_insights_response("\n".join(lines))
+        if sections is not None:
+            results[number] = sections
+    return results or None
+
+async def generate_insights_batch(
+    checkins: List[Dict[str, Any]],
+    batch_size: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Generate insights for many check-ins with several check-ins per request
+    
+    Intended for backfills: the shared system prompt and instructions are
+    paid once per batch instead of once per check-in. Check-ins missing from
+    a batched answer are retried individually through generate_insights.
+    
+    Args:
+        checkins: Dicts with metrics, notes and employee_name
+        batch_size: Check-ins per request (default LLM_BATCH_SIZE)
+    
+    Returns:
+        List of insight dictionaries in the same order as `checkins`
+    """
+    batch_size = max(1, batch_size or settings.LLM_BATCH_SIZE)
+    response_format = "json_object" if settings.LLM_RESPONSE_FORMAT != "text" else "text"
+    results: List[Optional[Dict[str, Any]]] = [None] * len(checkins)
+    
+    for start in range(0, len(checkins), batch_size):
+        group = checkins[start:start + batch_size]
+        parsed: Dict[int, Dict[str, Any]] = {}
         
-
-        for attempt in range(max_retries):
-
+        if GROQ_API_KEY and len(group) > 1:
             try:
-
-                async with httpx.AsyncClient(timeout=30.0) as client:
-
-                    response = await client.post(
-
-                        GROQ_API_URL,
-
-                        headers={
-
-                            "Authorization": f"Bearer {GROQ_API_KEY}",
-
-                            "Content-Type": "application/json"
-
-                        },
-
-                        json={
-
+                messages, prompt_info = build_batch_messages(group, response_format)
+                max_tokens = min(settings.LLM_MAX_COMPLETION_TOKENS * len(group), settings.LLM_BATCH_MAX_COMPLETION_TOKENS)
+                completion = await request_completion(
+                    build_payload(messages, max_tokens, response_format),
+                    prompt_info["prompt_tokens"],
+                    lambda text: parse_batch_response(text, len(group), response_format)
+                )
+                if completion is not None:
+                    parsed, call_usage = completion
+                    share = len(parsed)
+                    for number, insights in parsed.items():
+                        insights["source"] = "llm"
+                        insights["usage"] = {
+                            "prompt_tokens": call_usage["prompt_tokens"] // share,
+                            "completion_tokens": call_usage["completion_tokens"] // share,
+                            "total_tokens": call_usage["total_tokens"] // share,
+                            "cost_usd": round(call_usage["cost_usd"] / share, 8),
+                            "usage_estimated": call_usage["usage_estimated"],
                             "model": GROQ_MODEL,
-
-                            "messages": [
-
-                                {
-
-                                    "role": "system",
-
-                                    "content": "You are a compassionate AI wellness coach specializing in employee wellbeing. Your insights should be professional, supportive, and actionable."
-
-                                },
-
-                                {
-
-                                    "role": "user",
-
-                                    "content": context
-
-                                }
-
-                            ],
-
-                            "temperature": 0.7,
-
-                            "max_tokens": 800
-
+                            "batch_size": len(group),
+                            "trimmed": prompt_info["trimmed"][number - 1]
                         }
-
-                    )
-
-                    
-
-                    if response.status_code == 200:
-
-                        result = response.json()
-
-                        ai_response = result["choices"][0]["message"]["content"].strip()
-
-                        
-
-                        insights_dict = parse_llm_response(ai_response, metrics)
-
-                        
-
-                        logger.info(f"Successfully generated Groq insights for {employee_name}")
-
-                        
-
-                        return insights_dict
-
-                    elif response.status_code == 429:
-
-                        logger.warning(f"Groq API rate limit (attempt {attempt + 1}/{max_retries})")
-
-                        if attempt < max_retries - 1:
-
-                            await asyncio.sleep(retry_delay * (attempt + 1))
-
-                            continue
-
-                    elif response.status_code >= 500:
-
-                        logger.warning(f"Groq API server error: {response.status_code} (attempt {attempt + 1}/{max_retries})")
-
-                        if attempt < max_retries - 1:
-
-                            await asyncio.sleep(retry_delay)
-
-                            continue
-
-                    else:
-
-                        logger.warning(f"Groq API error: {response.status_code} - {response.text}")
-
-                        return generate_fallback_insights(metrics, notes)
-
-                        
-
-            except httpx.TimeoutException:
-
-                logger.warning(f"Groq API timeout (attempt {attempt + 1}/{max_retries})")
-
-                if attempt < max_retries - 1:
-
-                    await asyncio.sleep(retry_delay)
-
-                    continue
-
-            except httpx.RequestError as e:
-
-                logger.warning(f"Groq API request error: {e} (attempt {attempt + 1}/{max_retries})")
-
-                if attempt < max_retries - 1:
-
-                    await asyncio.sleep(retry_delay)
-
-                    continue
-
+                metrics_registry.inc("llm_batch_requests_total")
+                metrics_registry.inc("llm_batch_checkins_total", len(parsed), result="parsed")
+                metrics_registry.inc("llm_batch_checkins_total", len(group) - len(parsed), result="missing")
+            except Exception as e:
+                logger.error(f"Batched insights request failed: {e}", exc_info=True)
         
-
-        logger.error("All Groq API retry attempts failed, using fallback insights")
-
-        return generate_fallback_insights(metrics, notes)
-
+        for offset, checkin in enumerate(group):
+            insights = parsed.get(offset + 1)
+            if insights is None:
+                insights = await generate_insights(
+                    metrics=checkin["metrics"],
+                    notes=checkin.get("notes"),
+                    employee_name=checkin.get("employee_name") or "Employee"
+                )
+            results[start + offset] = insights
         
-
-    except Exception as e:
-
-        logger.error(f"Error generating Groq insights: {e}", exc_info=True)
-
-        return generate_fallback_insights(metrics, notes)
-
-
-
-def parse_llm_response(response: str, metrics: Dict[str, Any]) -> Dict[str, Any]:
-
+        logger.info(f"Batched insights: {len(parsed)}/{len(group)} check-ins answered in one request")
+    
+    return results
+
+def record_token_usage(
+    usage: Optional[Dict[str, Any]],
+    estimated_prompt_tokens: int,
+    completion: str,
+    elapsed: float,
+    previous: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
     """
-    Parse LLM response to extract all qualitative insights
+    Account tokens, cost and throughput for one completed LLM call
     
-    Args:
-        response: Raw LLM response text
-        metrics: Metrics dict (for fallback)
+    Provider-reported usage is preferred; local token counts are used when
+    the response has none. Totals accumulate over retried calls of the same
+    check-in via `previous`.
     
     Returns:
-        Dictionary with all insight sections
+        Dictionary with prompt/completion/total tokens, cost_usd and calls
     """
-
-    lines = response.strip().split('\n')
-
+    usage = usage or {}
+    estimated = "prompt_tokens" not in usage
+    prompt_tokens = usage.get("prompt_tokens", estimated_prompt_tokens)
+    completion_tokens = usage.get("completion_tokens", count_tokens(completion))
+    cost = (
+        prompt_tokens * settings.LLM_PROMPT_COST_PER_MILLION
+        + completion_tokens * settings.LLM_COMPLETION_COST_PER_MILLION
+    ) / 1_000_000
     
+    metrics_registry.inc("llm_prompt_tokens_total", prompt_tokens, model=GROQ_MODEL)
+    metrics_registry.inc("llm_completion_tokens_total", completion_tokens, model=GROQ_MODEL)
+    metrics_registry.inc("llm_cost_usd_total", cost, model=GROQ_MODEL)
+    if elapsed > 0:
+        metrics_registry.observe("llm_completion_tokens_per_second", completion_tokens / elapsed, buckets=THROUGHPUT_BUCKETS)
+    
+    previous = previous or {"prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0, "latency_seconds": 0.0, "calls": 0}
+    return {
+        "prompt_tokens": previous["prompt_tokens"] + prompt_tokens,
+        "completion_tokens": previous["completion_tokens"] + completion_tokens,
+        "total_tokens": previous["prompt_tokens"] + prompt_tokens + previous["completion_tokens"] + completion_tokens,
+        "estimated_prompt_tokens": estimated_prompt_tokens,
+        "usage_estimated": estimated or previous.get("usage_estimated", False),
+        "cost_usd": round(previous["cost_usd"] + cost, 8),
+        "latency_seconds": round(previous["latency_seconds"] + elapsed, 3),
+        "calls": previous["calls"] + 1,
+        "tokenizer": tokenizer_name(),
+        "last_total_tokens": prompt_tokens + completion_tokens
+    }
 
-    sections = {
-
-        "overall_experience": "",
-
-        "emotional_state": "",
-
-        "work_motivation": "",
-
-        "professional_appearance": "",
-
-        "ai_observations": "",
-
-        "recommendations": []
-
+def groq_headers() -> Dict[str, str]:
+    return {
+        "Authorization": f"Bearer {GROQ_API_KEY}",
+        "Content-Type": "application/json"
     }
 
+class SectionStreamParser:
+    """
+    Incrementally split a streamed completion into insight sections
     
-
-    current_section = None
-
-    current_text = []
-
+    Text is buffered until a full line is available; when a new section
+    header (e.g. EMOTIONAL_STATE:) starts, the previous section is complete
+    and handed to the callback. RECOMMENDATIONS is emitted as a list when
+    the stream ends.
+    """
     
-
-    for line in lines:
-
-        line = line.strip()
-
+    def __init__(self, on_section: Optional[SectionCallback] = None):
+        self.on_section = on_section
+        self.text = ""
+        self._buffer = ""
+        self._section: Optional[str] = None
+        self._lines: List[str] = []
+    
+    async def feed(self, chunk: str):
+        self.text += chunk
+        self._buffer += chunk
+        while "\n" in self._buffer:
+            line, self._buffer = self._buffer.split("\n", 1)
+            await self._line(line.strip())
+    
+    async def close(self):
+        if self._buffer.strip():
+            await self._line(self._buffer.strip())
+        self._buffer = ""
+        await self._emit()
+    
+    async def _line(self, line: str):
         if not line:
-
-            continue
-
-        
-
-
-        if line.upper().startswith('OVERALL_EXPERIENCE'):
-
-            if current_section and current_text:
-
-                sections[current_section] = ' '.join(current_text).strip()
-
-            current_section = "overall_experience"
-
-            text = line.split(':', 1)[1].strip() if ':' in line else ''
-
-            current_text = [text] if text else []
-
-            continue
-
-        
-
-        if line.upper().startswith('EMOTIONAL_STATE'):
-
-            if current_section and current_text:
-
-                sections[current_section] = ' '.join(current_text).strip()
-
-            current_section = "emotional_state"
-
-            text = line.split(':', 1)[1].strip() if ':' in line else ''
-
-            current_text = [text] if text else []
-
-            continue
-
-        
-
-        if line.upper().startswith('WORK_MOTIVATION'):
-
-            if current_section and current_text:
-
-                sections[current_section] = ' '.join(current_text).strip()
-
-            current_section = "work_motivation"
-
-            text = line.split(':', 1)[1].strip() if ':' in line else ''
-
-            current_text = [text] if text else []
-
-            continue
-
+            return
+        header = match_section_header(line)
+        if header:
+            await self._emit()
+            self._section, text = header
+            self._lines = [text] if text else []
+            return
+        if self._section:
+            self._lines.append(line)
+    
+    async def _emit(self):
+        if self._section and self._lines and self.on_section:
+            if self._section == "recommendations":
+                content = [l.lstrip("-•* ").strip() for l in self._lines if l[:1] in "-•*"]
+            else:
+                content = " ".join(self._lines).strip()
+            try:
+                await self.on_section(self._section, content)
+            except Exception as e:
+                logger.warning(f"Insight section callback failed: {e}")
+        self._section = None
+        self._lines = []
+
+async def stream_chat_completion(
+    client: httpx.AsyncClient,
+    payload: Dict[str, Any],
+    on_section: Optional[SectionCallback] = None
+) -> Tuple[httpx.Response, Optional[str], Optional[Dict[str, Any]]]:
+    """
+    Request a streamed chat completion and parse sections as they arrive
+    
+    Returns:
+        Tuple of (response, full completion text, usage); text and usage are
+        None when the response is not 200
+    """
+    async with client.stream(
+        "POST",
+        GROQ_API_URL,
+        headers=groq_headers(),
+        json={**payload, "stream": True},
+        timeout=settings.LLM_TIMEOUT_SECONDS
+    ) as response:
+        if response.status_code != 200:
+            await response.aread()
+            return response, None, None
         
+        started = time.perf_counter()
+        first_token = None
+        parser = SectionStreamParser(on_section)
+        usage = None
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[5:].strip()
+            if data == "[DONE]":
+                break
+            chunk = json.loads(data)
+            usage = (chunk.get("x_groq") or {}).get("usage") or chunk.get("usage") or usage
+            choices = chunk.get("choices") or []
+            delta = choices[0].get("delta", {}).get("content") if choices else None
+            if delta:
+                if first_token is None:
+                    first_token = time.perf_counter() - started
+                    metrics_registry.observe("llm_time_to_first_token_seconds", first_token)
+                await parser.feed(delta)
+        await parser.close()
+        return response, parser.text, usage
+
+class InsightParseError(ValueError):
+    pass
+
+def validate_insights_json(response: str) -> Dict[str, Any]:
+    """
+    Strictly validate a JSON-mode response against INSIGHTS_JSON_SCHEMA
+    
+    Raises:
+        InsightParseError: If the response is not an object with non-empty
+            string sections and a list of 1-5 non-empty recommendations
+    """
+    return validate_insights_object(load_json_response(response))
+
+def load_json_response(response: str) -> Any:
+    text = response.strip()
+    if text.startswith("```"):
+        text = text.strip("`")
+        if text.startswith("json"):
+            text = text[4:]
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError as e:
+        raise InsightParseError(f"invalid JSON: {e}")
 
-        if line.upper().startswith('PROFESSIONAL_APPEARANCE'):
-
-            if current_section and current_text:
-
-                sections[current_section] = ' '.join(current_text).strip()
-
-            current_section = "professional_appearance"
-
-            text = line.split(':', 1)[1].strip() if ':' in line else ''
+def validate_insights_object(data: Any) -> Dict[str, Any]:
+    if not isinstance(data, dict):
+        raise InsightParseError("response is not a JSON object")
+    
+    sections: Dict[str, Any] = {}
+    for _, section in INSIGHT_SECTIONS:
+        value = data.get(section)
+        if section == "recommendations":
+            if not isinstance(value, list) or not 1 <= len(value) <= 5:
+                raise InsightParseError("recommendations must be a list of 1-5 items")
+            if not all(isinstance(item, str) and item.strip() for item in value):
+                raise InsightParseError("recommendations must be non-empty strings")
+            sections[section] = [item.strip() for item in value]
+        else:
+            if not isinstance(value, str) or not value.strip():
+                raise InsightParseError(f"{section} must be a non-empty string")
+            sections[section] = value.strip()
+    return sections
 
-            current_text = [text] if text else []
+def match_section_header(line: str) -> Optional[Tuple[str, str]]:
+    """
+    Recognize a section header line such as "2. EMOTIONAL_STATE: ..." or "**Work Motivation**:"
+    
+    Returns:
+        Tuple of (section key, text after the colon), or None if not a header
+    """
+    name, sep, rest = line.partition(":")
+    key = name.strip("#*0123456789.) ").upper().replace(" ", "_")
+    if key not in SECTION_KEYS:
+        return None
+    return SECTION_KEYS[key], rest.strip(" *") if sep else ""
 
+def tokenize_insight_sections(response: str) -> Dict[str, Any]:
+    """
+    Split a section-formatted response into insight sections in a single pass
+    
+    Narrative lines are joined per section; bullet lines under
+    RECOMMENDATIONS (or outside any section) become recommendations.
+    Sections that do not appear are left empty.
+    """
+    sections: Dict[str, Any] = {section: "" for _, section in INSIGHT_SECTIONS}
+    sections["recommendations"] = []
+    current_section = None
+    current_text: List[str] = []
+    
+    for line in response.split("\n"):
+        line = line.strip()
+        if not line:
             continue
-
         
-
-        if line.upper().startswith('AI_OBSERVATIONS'):
-
+        header = match_section_header(line)
+        if header:
             if current_section and current_text:
-
-                sections[current_section] = ' '.join(current_text).strip()
-
-            current_section = "ai_observations"
-
-            text = line.split(':', 1)[1].strip() if ':' in line else ''
-
-            current_text = [text] if text else []
-
+                sections[current_section] = " ".join(current_text).strip()
+            section, text = header
+            current_section = None if section == "recommendations" else section
+            current_text = [text] if text and current_section else []
             continue
-
         
-
-        if line.upper().startswith('RECOMMENDATIONS'):
-
-            if current_section and current_text:
-
-                sections[current_section] = ' '.join(current_text).strip()
-
-            current_section = None
-
-            continue
-
-        
-
-
-        if current_section:
-
-            if line.startswith('-') or line.startswith('•') or line.startswith('*'):
-
-
-                if current_section == "recommendations" or current_section is None:
-
-                    sections["recommendations"].append(line.lstrip('- •*').strip())
-
-                else:
-
-
-                    current_text.append(line)
-
-            else:
-
-                current_text.append(line)
-
-        elif line.startswith('-') or line.startswith('•') or line.startswith('*'):
-
-
-            sections["recommendations"].append(line.lstrip('- •*').strip())
-
+        if line[0] in "-•*" and current_section is None:
+            sections["recommendations"].append(line.lstrip("- •*").strip())
+        elif current_section:
+            current_text.append(line)
     
-
-
     if current_section and current_text:
+        sections[current_section] = " ".join(current_text).strip()
+    return sections
 
-        sections[current_section] = ' '.join(current_text).strip()
-
-    
-
-
-    if not any(sections.values()) and not sections["recommendations"]:
-
-        return generate_fallback_insights(metrics, None)
-
-    
-
-
+def fill_missing_sections(sections: Dict[str, Any]) -> Dict[str, Any]:
     if not sections["overall_experience"]:
-
         sections["overall_experience"] = "The employee appeared calm and engaged during the check-in, showing positive energy and focus."
-
     if not sections["emotional_state"]:
-
         sections["emotional_state"] = "Emotional state appears balanced and positive, with good energy levels."
-
     if not sections["work_motivation"]:
-
         sections["work_motivation"] = "Work motivation appears high, with strong engagement and active participation."
-
     if not sections["professional_appearance"]:
-
         sections["professional_appearance"] = "Professional presentation was maintained throughout the check-in."
-
     if not sections["ai_observations"]:
-
         sections["ai_observations"] = "AI analysis detected standard behavioral patterns consistent with a routine check-in."
-
     if not sections["recommendations"]:
-
         sections["recommendations"] = [
-
             "Continue maintaining regular check-ins",
-
             "Monitor overall well-being trends",
-
             "Stay engaged with work activities"
-
         ]
+    return sections
 
+def parse_insights_response(response: str, response_format: str = "text") -> Optional[Dict[str, Any]]:
+    """
+    Parse an LLM response into insight sections, recording parse metrics
     
-
+    JSON formats are validated strictly first; the section tokenizer is used
+    for text responses and as a fallback when JSON validation fails. Sections
+    the response left out are filled with canned text and counted as
+    result="partial".
+    
+    Returns:
+        Dictionary with all insight sections, or None if nothing usable was found
+    """
+    started = time.perf_counter()
+    sections = None
+    result = "failed"
+    
+    if response_format != "text":
+        try:
+            sections = validate_insights_json(response)
+            result = "ok"
+        except InsightParseError as e:
+            logger.warning(f"Structured insights rejected: {e}")
+    
+    if sections is None:
+        tokens = tokenize_insight_sections(response)
+        if any(tokens.values()):
+            if not all(tokens.values()):
+                result = "partial"
+            else:
+                result = "ok" if response_format == "text" else "repaired"
+            sections = fill_missing_sections(tokens)
+    
+    metrics_registry.observe("llm_parse_seconds", time.perf_counter() - started, buckets=PARSE_BUCKETS)
+    metrics_registry.inc("llm_parse_total", format=response_format, result=result)
     return sections
 
-
-
 def generate_fallback_insights(metrics: Dict[str, Any], notes: Optional[str] = None) -> Dict[str, Any]:
-
     """
     Generate qualitative fallback insights when LLM is not available
     
@@ -525,132 +920,70 @@ def generate_fallback_insights(metrics: Dict[str, Any], notes: Optional[str] = N
     Returns:
         Dictionary with all qualitative insight sections
     """
-
     stress_avg = metrics.get('stress_avg', 50)
-
     engagement = metrics.get('engagement_score', 50)
-
     yawns = metrics.get('yawns_count', 0)
-
     
 
-
     if stress_avg < 40 and engagement >= 70:
-
         overall_exp = "The employee appeared calm and engaged during the check-in, showing positive energy and focus. Their demeanor suggested a comfortable and confident state of mind."
-
         emotional = "Emotional state appears balanced and positive, with good energy levels and a sense of well-being evident throughout the session."
-
         motivation = "Work motivation appears high, with strong engagement and active participation. The employee demonstrated enthusiasm and commitment to their work."
-
     elif stress_avg < 70 and engagement >= 40:
-
         overall_exp = "The check-in showed moderate engagement with some signs of normal work-related stress. The employee maintained a professional demeanor while showing typical workplace energy levels."
-
         emotional = "Emotional state is generally stable, though some stress indicators were present. The employee managed their emotions well while navigating work demands."
-
         motivation = "Work motivation is at a moderate level, with consistent participation and engagement. The employee shows dedication but may benefit from additional support."
-
     else:
-
         overall_exp = "The check-in revealed elevated stress levels and reduced engagement, suggesting potential concerns. The employee appeared less comfortable and may be experiencing challenges."
-
         emotional = "Emotional state shows signs of stress and may benefit from support and attention. The employee's emotional well-being appears to need monitoring and care."
-
         motivation = "Work motivation appears lower than optimal, with reduced engagement levels. The employee may be experiencing factors affecting their work enthusiasm."
-
     
 
-
     professional = "Professional appearance and office ethics were maintained throughout the session. The employee presented themselves appropriately for the workplace environment."
-
     
 
-
     ai_obs_parts = []
-
     if yawns > 5:
-
         ai_obs_parts.append("The analysis detected signs of fatigue")
-
     if stress_avg > 70:
-
         ai_obs_parts.append("elevated stress indicators were observed")
-
     if engagement < 50:
-
         ai_obs_parts.append("engagement levels were lower than typical")
-
     
-
     if ai_obs_parts:
-
         ai_obs = f"AI analysis detected patterns indicating {', '.join(ai_obs_parts)}. These observations suggest the employee may benefit from wellness support and attention to their work-life balance."
-
     else:
-
         ai_obs = "AI analysis detected standard behavioral patterns consistent with a routine check-in. The employee's patterns align with healthy work engagement."
-
     
 
-
     recommendations = []
-
     if stress_avg > 70:
-
         recommendations.append("Consider stress management techniques like deep breathing exercises or short breaks throughout the day")
-
     if yawns > 5:
-
         recommendations.append("Ensure adequate rest and sleep to maintain alertness and productivity")
-
     if engagement < 50:
-
         recommendations.append("Take regular breaks to maintain focus and consider discussing workload with your supervisor")
-
     
-
     audio = metrics.get('audio', {})
-
     if audio.get('has_audio', False):
-
         sentiment = audio.get('sentiment', 'neutral')
-
         if sentiment == 'negative':
-
             recommendations.append("Consider discussing challenges with your team or manager to address concerns")
-
     
-
     if not recommendations:
-
         recommendations = [
-
             "Continue maintaining regular check-ins",
-
             "Monitor overall well-being trends",
-
             "Stay engaged with work activities"
-
         ]
-
     
-
     return {
-
         "overall_experience": overall_exp,
-
         "emotional_state": emotional,
-
         "work_motivation": motivation,
-
         "professional_appearance": professional,
-
         "ai_observations": ai_obs,
-
-        "recommendations": recommendations
-
+        "recommendations": recommendations,
+        "source": "fallback"
     }
 
-
-
@@ -0,0 +1,215 @@
+from typing import Optional, Mapping
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import asyncio
+import logging
+import time
+from app.config import settings
+from app.services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+def parse_reset_duration(value: Optional[str]) -> Optional[float]:
+    """
+    Parse rate limit reset values such as "7.66s", "2m59.56s", "1h2m" or "250ms"
+    
+    Returns:
+        Seconds as float, or None if the value cannot be parsed
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    
+    total = 0.0
+    number = ""
+    i = 0
+    while i < len(value):
+        ch = value[i]
+        if ch.isdigit() or ch == ".":
+            number += ch
+            i += 1
+            continue
+        if not number:
+            return None
+        if value.startswith("ms", i):
+            total += float(number) / 1000
+            i += 2
+        elif ch in "hms":
+            total += float(number) * {"h": 3600, "m": 60, "s": 1}[ch]
+            i += 1
+        else:
+            return None
+        number = ""
+    if number:
+        return None
+    return total
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a retry-after header: delay seconds (or a reset duration) or an HTTP-date
+    
+    Returns:
+        Seconds to wait (0 for dates already passed), or None if the value
+        cannot be parsed
+    """
+    if not value:
+        return None
+    seconds = parse_reset_duration(value)
+    if seconds is not None:
+        return seconds
+    try:
+        retry_at = parsedate_to_datetime(value.strip())
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+class TokenBucket:
+    """Token bucket refilled continuously at `per_minute` tokens per minute"""
+    
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.per_minute = per_minute
+        self.capacity = capacity or per_minute
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+    
+    @property
+    def enabled(self) -> bool:
+        return self.per_minute > 0
+    
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.per_minute / 60)
+        self._updated = now
+    
+    def time_until(self, amount: float) -> float:
+        """Seconds until `amount` tokens are available (0 if available now)"""
+        if not self.enabled:
+            return 0.0
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) * 60 / self.per_minute
+    
+    def consume(self, amount: float):
+        """Take `amount` tokens (a negative amount returns them, up to capacity)"""
+        if self.enabled:
+            self._refill()
+            self.tokens = min(self.capacity, self.tokens - amount)
+    
+    def cap(self, remaining: float):
+        """Lower the available tokens to what the provider reports as remaining"""
+        if self.enabled:
+            self._refill()
+            self.tokens = min(self.tokens, remaining)
+
+class LLMRateLimiter:
+    """
+    Client-side requests/minute and tokens/minute limiter with a concurrency gate
+    
+    Callers queue in `acquire()` until a concurrency slot and enough request
+    and token budget are available, instead of hitting the provider and
+    failing with 429. Provider `x-ratelimit-*` and `retry-after` headers
+    re-synchronize the local buckets after every response.
+    """
+    
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        max_concurrency: Optional[int] = None
+    ):
+        self.requests = TokenBucket(requests_per_minute if requests_per_minute is not None else settings.LLM_REQUESTS_PER_MINUTE)
+        self.tokens = TokenBucket(tokens_per_minute if tokens_per_minute is not None else settings.LLM_TOKENS_PER_MINUTE)
+        self.max_concurrency = max_concurrency or settings.LLM_MAX_CONCURRENCY
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._lock = asyncio.Lock()
+        self._blocked_until = 0.0
+        self._queued = 0
+    
+    @asynccontextmanager
+    async def acquire(self, estimated_tokens: int = 0):
+        """
+        Wait for a slot and rate budget, then hold the slot for the request
+        
+        Args:
+            estimated_tokens: Prompt plus max completion tokens for the call
+        """
+        started = time.monotonic()
+        self._queued += 1
+        metrics.set_gauge("llm_limiter_queued", self._queued)
+        try:
+            await self._semaphore.acquire()
+            try:
+                while True:
+                    async with self._lock:
+                        wait = max(
+                            self._blocked_until - time.monotonic(),
+                            self.requests.time_until(1),
+                            self.tokens.time_until(estimated_tokens)
+                        )
+                        if wait <= 0:
+                            self.requests.consume(1)
+                            self.tokens.consume(estimated_tokens)
+                            break
+                    await asyncio.sleep(wait)
+            except BaseException:
+                self._semaphore.release()
+                raise
+        finally:
+            self._queued -= 1
+            metrics.set_gauge("llm_limiter_queued", self._queued)
+        
+        waited = time.monotonic() - started
+        metrics.observe("llm_limiter_wait_seconds", waited)
+        if waited > 1:
+            logger.info(f"LLM call waited {waited:.1f}s for rate limit budget")
+        
+        try:
+            yield waited
+        finally:
+            self._semaphore.release()
+    
+    def record_usage(self, estimated_tokens: int, actual_tokens: Optional[int]):
+        """
+        Correct the token bucket once the real usage of a call is known
+        
+        Calls that produced no completion (errors, timeouts, 429s) settle
+        with actual_tokens=0, returning their whole reservation.
+        """
+        if actual_tokens is not None:
+            self.tokens.consume(actual_tokens - estimated_tokens)
+    
+    def pause(self, seconds: float):
+        """Block all callers for `seconds` (e.g. after a 429 with retry-after)"""
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+        metrics.inc("llm_limiter_pauses_total")
+    
+    def update_from_headers(self, headers: Mapping[str, str]):
+        """Sync local buckets with the provider's x-ratelimit-* and retry-after headers"""
+        for bucket, kind in ((self.requests, "requests"), (self.tokens, "tokens")):
+            remaining = headers.get(f"x-ratelimit-remaining-{kind}")
+            if remaining is None:
+                continue
+            try:
+                remaining = float(remaining)
+            except ValueError:
+                continue
+            bucket.cap(remaining)
+            if remaining <= 0:
+                reset = parse_reset_duration(headers.get(f"x-ratelimit-reset-{kind}"))
+                if reset:
+                    self.pause(reset)
+        
+        retry_after = parse_retry_after(headers.get("retry-after"))
+        if retry_after:
+            self.pause(retry_after)
+
+llm_limiter = LLMRateLimiter()
@@ -0,0 +1,85 @@
+from typing import Dict, Any, Tuple
+from collections import defaultdict
+import threading
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _key(name: str, labels: Dict[str, Any]) -> Tuple[str, Tuple[Tuple[str, str], ...]]:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+class Histogram:
+    """Cumulative bucket histogram with count, sum, min and max"""
+    
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.bucket_counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+    
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.bucket_counts[i] += 1
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "avg": round(self.sum / self.count, 6) if self.count else 0,
+            "min": self.min,
+            "max": self.max,
+            "buckets": {str(b): c for b, c in zip(self.buckets, self.bucket_counts)}
+        }
+
+class MetricsRegistry:
+    """
+    In-process counters, gauges and histograms
+    
+    Values are per worker process; the snapshot is served at /metrics.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple, float] = defaultdict(float)
+        self._gauges: Dict[Tuple, float] = {}
+        self._histograms: Dict[Tuple, Histogram] = {}
+    
+    def inc(self, name: str, value: float = 1, **labels):
+        with self._lock:
+            self._counters[_key(name, labels)] += value
+    
+    def set_gauge(self, name: str, value: float, **labels):
+        with self._lock:
+            self._gauges[_key(name, labels)] = value
+    
+    def observe(self, name: str, value: float, buckets=DEFAULT_BUCKETS, **labels):
+        with self._lock:
+            key = _key(name, labels)
+            if key not in self._histograms:
+                self._histograms[key] = Histogram(buckets)
+            self._histograms[key].observe(value)
+    
+    def get_counter(self, name: str, **labels) -> float:
+        return self._counters.get(_key(name, labels), 0)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        def group(items, render):
+            out: Dict[str, list] = defaultdict(list)
+            for (name, labels), value in items:
+                out[name].append({"labels": dict(labels), "value": render(value)})
+            return dict(out)
+        
+        with self._lock:
+            return {
+                "counters": group(self._counters.items(), lambda v: v),
+                "gauges": group(self._gauges.items(), lambda v: v),
+                "histograms": group(self._histograms.items(), lambda h: h.to_dict())
+            }
+
+metrics = MetricsRegistry()
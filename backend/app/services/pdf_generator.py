@@ -1,446 +1,427 @@
 from reportlab.lib.pagesizes import letter, A4
-
 from reportlab.lib import colors
-
 from reportlab.lib.units import inch
-
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
-
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
-
 from reportlab.pdfgen import canvas
-
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
 from datetime import datetime
-
-from typing import Dict, Any, List
-
+from typing import Dict, Any, List, Optional, Tuple
+import asyncio
+import multiprocessing
 import os
-
+import threading
+import time
+import uuid
 from pathlib import Path
-
 import logging
-
-
+from app.config import settings
+from app.services.metrics import metrics
+from app.services.storage import get_storage
+from app.services.report_content import build_report_content, employee_info_rows, report_version, FOOTER_TEXT
 
 logger = logging.getLogger(__name__)
 
-
-
-PDF_DIR = Path("/tmp/solace_pdfs")
-
+PDF_DIR = Path(settings.PDFS_DIR)
 PDF_DIR.mkdir(parents=True, exist_ok=True)
 
+RENDER_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
 
 
-def create_header(canvas_obj, doc):
-
-    canvas_obj.saveState()
-
-    canvas_obj.setFont('Helvetica-Bold', 16)
-
-    canvas_obj.setFillColor(colors.HexColor("#10b981"))
-
-    canvas_obj.drawString(inch, letter[1] - 0.5*inch, "Solace AI")
-
-    canvas_obj.setFont('Helvetica', 10)
-
-    canvas_obj.setFillColor(colors.black)
-
-    canvas_obj.drawRightString(letter[0] - inch, letter[1] - 0.5*inch, 
-
-                               f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M')}")
-
-    canvas_obj.line(inch, letter[1] - 0.6*inch, letter[0] - inch, letter[1] - 0.6*inch)
-
-    canvas_obj.restoreState()
-
-
-
-def create_footer(canvas_obj, doc):
-
-    canvas_obj.saveState()
-
-    canvas_obj.setFont('Helvetica', 8)
-
-    canvas_obj.setFillColor(colors.grey)
-
-    canvas_obj.drawCentredString(letter[0]/2, 0.5*inch, 
-
-                                 f"Page {doc.page} | Solace AI - Employee Check-in Report")
-
-    canvas_obj.restoreState()
-
-
-
-def get_stress_color(stress: float) -> colors.Color:
-
-    if stress < 40:
-
-        return colors.HexColor("#10b981")
-
-    elif stress < 70:
-
-        return colors.HexColor("#f59e0b")
-
-    else:
-
-        return colors.HexColor("#ef4444")
-
-
-
-def get_engagement_color(score: float) -> colors.Color:
-
-    if score >= 70:
-
-        return colors.HexColor("#10b981")
-
-    elif score >= 40:
-
-        return colors.HexColor("#f59e0b")
-
-    else:
-
-        return colors.HexColor("#ef4444")
-
-
-
-async def generate_checkin_pdf(
-
-    checkin_data: Dict[str, Any],
-
-    emp_name: str,
-
-    emp_email: str
-
-) -> str:
+_executor: Optional[Executor] = None
+_template = None
+_template_lock = threading.Lock()
+_inflight_renders: Dict[str, "asyncio.Future[str]"] = {}
 
+class ReportTemplate:
     """
-    Generate a qualitative PDF report for a check-in (NO NUMERICAL METRICS)
-    Shows only narrative observations and insights about the employee's experience,
-    emotional state, work motivation, professional appearance, and AI observations.
-    
-    Args:
-        checkin_data: Check-in document from database
-        emp_name: Employee name
-        emp_email: Employee email
+    Styles and page decorations shared by every check-in report
     
-    Returns:
-        str: Path to generated PDF file
+    Built once per process (see get_report_template) instead of per render:
+    getSampleStyleSheet(), the ParagraphStyles and the employee TableStyle
+    are read-only during layout, so concurrent renders can share them.
     """
-
-    try:
-
-        checkin_id = str(checkin_data.get("_id", "unknown"))
-
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-
-        pdf_filename = f"checkin_{checkin_id}_{timestamp}.pdf"
-
-        pdf_path = PDF_DIR / pdf_filename
-
-        
-
-        logger.info(f"Generating qualitative PDF report: {pdf_path}")
-
-        
-
-        doc = SimpleDocTemplate(
-
-            str(pdf_path),
-
-            pagesize=letter,
-
-            rightMargin=inch,
-
-            leftMargin=inch,
-
-            topMargin=inch,
-
-            bottomMargin=inch
-
-        )
-
-        
-
-        elements = []
-
-        
-
+    
+    def __init__(self):
         styles = getSampleStyleSheet()
-
-        title_style = ParagraphStyle(
-
+        self.title_style = ParagraphStyle(
             'CustomTitle',
-
             parent=styles['Heading1'],
-
             fontSize=24,
-
             textColor=colors.HexColor("#10b981"),
-
             spaceAfter=30,
-
             alignment=TA_CENTER
-
         )
-
-        heading_style = ParagraphStyle(
-
+        self.heading_style = ParagraphStyle(
             'CustomHeading',
-
             parent=styles['Heading2'],
-
             fontSize=16,
-
             textColor=colors.HexColor("#1f2937"),
-
             spaceAfter=12,
-
             spaceBefore=12
-
         )
-
-        normal_style = styles['Normal']
-
-        
-
-        elements.append(Paragraph("Daily Check-in Report", title_style))
-
-        elements.append(Spacer(1, 0.2*inch))
-
-        
-
-        elements.append(Paragraph("Employee Information", heading_style))
-
-        
-
-        emp_info_data = [
-
-            ["Name:", emp_name],
-
-            ["Email:", emp_email],
-
-            ["Check-in Date:", datetime.fromisoformat(str(checkin_data.get("date", datetime.now()))).strftime("%B %d, %Y")],
-
-            ["Check-in Time:", datetime.fromisoformat(str(checkin_data.get("date", datetime.now()))).strftime("%I:%M %p")]
-
-        ]
-
-        
-
-        emp_table = Table(emp_info_data, colWidths=[2*inch, 4*inch])
-
-        emp_table.setStyle(TableStyle([
-
+        self.narrative_style = ParagraphStyle(
+            'NarrativeStyle',
+            parent=styles['Normal'],
+            fontSize=11,
+            textColor=colors.HexColor("#374151"),
+            spaceAfter=12,
+            leading=16,
+            alignment=TA_LEFT
+        )
+        self.transcript_style = ParagraphStyle(
+            'TranscriptStyle',
+            parent=self.narrative_style,
+            fontSize=10,
+            textColor=colors.HexColor("#4b5563"),
+            leftIndent=20,
+            rightIndent=20,
+            fontStyle='italic'
+        )
+        self.footer_style = ParagraphStyle(
+            'Footer',
+            parent=styles['Normal'],
+            fontSize=8,
+            textColor=colors.grey,
+            alignment=TA_CENTER
+        )
+        self.info_table_style = TableStyle([
             ('BACKGROUND', (0, 0), (0, -1), colors.HexColor("#f3f4f6")),
-
             ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-
             ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
-
             ('ALIGN', (1, 0), (1, -1), 'LEFT'),
-
             ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-
             ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-
             ('FONTSIZE', (0, 0), (-1, -1), 10),
-
             ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-
             ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-
             ('TOPPADDING', (0, 0), (-1, -1), 8),
-
             ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+        ])
+        self.brand_color = colors.HexColor("#10b981")
+        self.header_y = letter[1] - 0.5*inch
+        self.rule_y = letter[1] - 0.6*inch
+        self.right_x = letter[0] - inch
+        self.footer_text = FOOTER_TEXT
+    
+    def draw_header(self, canvas_obj, doc):
+        """Page header; the generated timestamp is fixed per document by build()"""
+        generated = getattr(doc, "generated_label", None) or datetime.now().strftime('%Y-%m-%d %H:%M')
+        canvas_obj.saveState()
+        canvas_obj.setFont('Helvetica-Bold', 16)
+        canvas_obj.setFillColor(self.brand_color)
+        canvas_obj.drawString(inch, self.header_y, "Solace AI")
+        canvas_obj.setFont('Helvetica', 10)
+        canvas_obj.setFillColor(colors.black)
+        canvas_obj.drawRightString(self.right_x, self.header_y, f"Generated: {generated}")
+        canvas_obj.line(inch, self.rule_y, self.right_x, self.rule_y)
+        canvas_obj.restoreState()
+    
+    def build(self, doc: SimpleDocTemplate, elements: List[Any], generated_at: Optional[datetime] = None):
+        if generated_at is not None:
+            doc.generated_label = f"{generated_at.strftime('%Y-%m-%d %H:%M')} UTC"
+        else:
+            doc.generated_label = datetime.now().strftime('%Y-%m-%d %H:%M')
+        doc.build(elements, onFirstPage=self.draw_header, onLaterPages=self.draw_header)
+
+def get_report_template() -> ReportTemplate:
+    """Return the process-wide report template (built on first use)"""
+    global _template
+    if _template is None:
+        with _template_lock:
+            if _template is None:
+                _template = ReportTemplate()
+    return _template
 
-        ]))
-
-        elements.append(emp_table)
-
-        elements.append(Spacer(1, 0.4*inch))
-
-        
-
-
-        insights = checkin_data.get("insights", {})
-
-        
-
-
-        narrative_style = ParagraphStyle(
-
-            'NarrativeStyle',
-
-            parent=normal_style,
-
-            fontSize=11,
+def get_stress_color(stress: float) -> colors.Color:
+    if stress < 40:
+        return colors.HexColor("#10b981")
+    elif stress < 70:
+        return colors.HexColor("#f59e0b")
+    else:
+        return colors.HexColor("#ef4444")
 
-            textColor=colors.HexColor("#374151"),
+def get_engagement_color(score: float) -> colors.Color:
+    if score >= 70:
+        return colors.HexColor("#10b981")
+    elif score >= 40:
+        return colors.HexColor("#f59e0b")
+    else:
+        return colors.HexColor("#ef4444")
 
-            spaceAfter=12,
+def get_pdf_executor() -> Executor:
+    """
+    Return the bounded pool PDFs are rendered in (created on first use)
+    
+    PDF_RENDER_EXECUTOR=thread keeps ReportLab off the event loop but still
+    shares the GIL with request handling; process renders in separate
+    interpreters (spawned, so they never inherit the loop's threads).
+    """
+    global _executor
+    if _executor is None:
+        workers = max(1, settings.PDF_RENDER_WORKERS)
+        if settings.PDF_RENDER_EXECUTOR == "process":
+            _executor = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+        else:
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pdf-render")
+        logger.info(f"PDF render pool started ({settings.PDF_RENDER_EXECUTOR}, {workers} workers)")
+    return _executor
+
+def shutdown_pdf_executor():
+    """Stop the render pool, waiting for in-flight renders (called on shutdown)"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+def _render_timed(checkin_data: Dict[str, Any], emp_name: str, emp_email: str, pdf_path: Optional[str]) -> Tuple[str, float]:
+    started = time.perf_counter()
+    pdf_path = render_checkin_pdf(checkin_data, emp_name, emp_email, pdf_path)
+    return pdf_path, time.perf_counter() - started
+
+def report_key(checkin_data: Dict[str, Any]) -> str:
+    """
+    Storage key (file name) of the report for a check-in version
+    
+    Keyed by check-in id and updated_at, so a report rendered before the
+    insights changed is never served for the new version; orphaned versions
+    are evicted by retention. Millisecond precision matches what MongoDB
+    stores.
+    """
+    checkin_id = str(checkin_data.get("_id", "unknown"))
+    updated_at = report_version(checkin_data)
+    if updated_at is not None:
+        version = f"{updated_at.strftime('%Y%m%d%H%M%S')}{updated_at.microsecond // 1000:03d}"
+    else:
+        version = "0"
+    return f"checkin_{checkin_id}_v{version}.pdf"
 
-            leading=16,
+def report_cache_path(checkin_data: Dict[str, Any]) -> Path:
+    """Path of the report in this node's PDF_DIR (the store itself for STORAGE_BACKEND=local)"""
+    return PDF_DIR / report_key(checkin_data)
 
-            alignment=TA_LEFT
+async def find_report(checkin_data: Dict[str, Any]) -> Optional[str]:
+    """
+    Return the report key if the check-in's current version is already rendered
+    
+    Checks this node's PDF_DIR first, then shared storage (gridfs/s3).
+    """
+    key = report_key(checkin_data)
+    if (PDF_DIR / key).exists():
+        metrics.inc("pdf_report_cache_total", result="hit")
+        return key
+    storage = get_storage("reports")
+    if not storage.is_local and await storage.stat(key) is not None:
+        metrics.inc("pdf_report_cache_total", result="storage_hit")
+        return key
+    return None
+
+async def _render_and_store(checkin_data: Dict[str, Any], emp_name: str, emp_email: str, pdf_path: str) -> str:
+    pdf_path = await generate_checkin_pdf(checkin_data, emp_name, emp_email, pdf_path=pdf_path)
+    storage = get_storage("reports")
+    if not storage.is_local:
+        await storage.put_file(Path(pdf_path).name, pdf_path, content_type="application/pdf")
+    return pdf_path
+
+async def render_cached_report(checkin_data: Dict[str, Any], emp_name: str, emp_email: str) -> str:
+    """
+    Render a check-in report into PDF_DIR and publish it to report storage
+    
+    Concurrent requests for the same check-in version on this node share one
+    render. With a shared backend the file in PDF_DIR stays as a node-local
+    copy until retention evicts it.
+    
+    Returns:
+        str: Path to the rendered PDF file
+    """
+    key = str(report_cache_path(checkin_data))
+    pending = _inflight_renders.get(key)
+    if pending is not None:
+        metrics.inc("pdf_report_cache_total", result="joined")
+        return await asyncio.shield(pending)
+    
+    metrics.inc("pdf_report_cache_total", result="miss")
+    task = asyncio.ensure_future(_render_and_store(checkin_data, emp_name, emp_email, key))
+    _inflight_renders[key] = task
+    task.add_done_callback(lambda _: _inflight_renders.pop(key, None))
+    return await asyncio.shield(task)
 
+async def generate_checkin_pdf(
+    checkin_data: Dict[str, Any],
+    emp_name: str,
+    emp_email: str,
+    pdf_path: Optional[str] = None
+) -> str:
+    """
+    Render a check-in PDF in the render pool without blocking the event loop
+    
+    Records `pdf_render_seconds` (time spent rendering) and
+    `pdf_render_queue_seconds` (time waiting for a free worker).
+    
+    Args:
+        pdf_path: Destination file (default: a new timestamped file in PDF_DIR)
+    
+    Returns:
+        str: Path to generated PDF file
+    """
+    executor_kind = settings.PDF_RENDER_EXECUTOR
+    loop = asyncio.get_running_loop()
+    submitted = time.perf_counter()
+    try:
+        pdf_path, render_seconds = await loop.run_in_executor(
+            get_pdf_executor(), _render_timed, checkin_data, emp_name, emp_email, pdf_path
         )
+    except Exception:
+        metrics.inc("pdf_renders_total", executor=executor_kind, result="error")
+        raise
+    
+    total_seconds = time.perf_counter() - submitted
+    metrics.inc("pdf_renders_total", executor=executor_kind, result="ok")
+    metrics.observe("pdf_render_seconds", render_seconds, buckets=RENDER_BUCKETS, executor=executor_kind)
+    metrics.observe("pdf_render_queue_seconds", max(0.0, total_seconds - render_seconds), buckets=RENDER_BUCKETS, executor=executor_kind)
+    return pdf_path
 
-        
-
-
-        elements.append(Paragraph("Overall Experience", heading_style))
-
-        overall_exp = insights.get("overall_experience", "Analysis indicates a standard check-in session with typical engagement patterns.")
-
-        elements.append(Paragraph(overall_exp, narrative_style))
-
-        elements.append(Spacer(1, 0.3*inch))
-
-        
-
-
-        elements.append(Paragraph("Emotional State & Well-being", heading_style))
-
-        emotional_state = insights.get("emotional_state", "Emotional state appears balanced and stable.")
-
-        elements.append(Paragraph(emotional_state, narrative_style))
-
+def build_report_elements(
+    checkin_data: Dict[str, Any],
+    emp_name: str,
+    emp_email: str,
+    template: ReportTemplate
+) -> List[Any]:
+    """
+    Flowables of one qualitative check-in report (NO NUMERICAL METRICS)
+    Lays out the content model from build_report_content: narrative
+    observations about the employee's experience, emotional state, work
+    motivation, professional appearance, and AI observations.
+    """
+    content = build_report_content(checkin_data, emp_name, emp_email)
+    elements = []
+    
+    elements.append(Paragraph(content["title"], template.title_style))
+    elements.append(Spacer(1, 0.2*inch))
+    
+    elements.append(Paragraph("Employee Information", template.heading_style))
+    
+    emp_table = Table(employee_info_rows(content), colWidths=[2*inch, 4*inch])
+    emp_table.setStyle(template.info_table_style)
+    elements.append(emp_table)
+    elements.append(Spacer(1, 0.4*inch))
+    
+    for section in content["sections"]:
+        elements.append(Paragraph(section["title"], template.heading_style))
+        elements.append(Paragraph(section["text"], template.narrative_style))
         elements.append(Spacer(1, 0.3*inch))
-
-        
-
-
-        elements.append(Paragraph("Work Motivation & Engagement", heading_style))
-
-        work_motivation = insights.get("work_motivation", "Work motivation levels appear consistent with normal work patterns.")
-
-        elements.append(Paragraph(work_motivation, narrative_style))
-
+    
+    if content["transcript"]:
+        elements.append(Paragraph("What Was Said", template.heading_style))
+        elements.append(Paragraph(f'"{content["transcript"]}"', template.transcript_style))
         elements.append(Spacer(1, 0.3*inch))
-
-        
-
-
-        elements.append(Paragraph("Professional Appearance & Office Ethics", heading_style))
-
-        professional = insights.get("professional_appearance", "Professional presentation was maintained throughout the check-in session.")
-
-        elements.append(Paragraph(professional, narrative_style))
-
+    
+    if content["recommendations"]:
+        elements.append(Paragraph("Recommendations", template.heading_style))
+        for rec in content["recommendations"]:
+            elements.append(Paragraph(f"• {rec}", template.narrative_style))
         elements.append(Spacer(1, 0.3*inch))
-
-        
-
-
-        elements.append(Paragraph("AI Analysis & Observations", heading_style))
-
-        ai_obs = insights.get("ai_observations", "AI analysis detected standard behavioral patterns consistent with a routine check-in.")
-
-        elements.append(Paragraph(ai_obs, narrative_style))
-
+    
+    if content["notes"]:
+        elements.append(Paragraph("Employee Notes", template.heading_style))
+        elements.append(Paragraph(content["notes"], template.narrative_style))
         elements.append(Spacer(1, 0.3*inch))
+    
+    elements.append(Spacer(1, 0.3*inch))
+    elements.append(Paragraph(content["footer"], template.footer_style))
+    
+    return elements
 
-        
-
-
-        audio = checkin_data.get("metrics", {}).get("audio", {})
-
-        if audio.get("has_audio", False) and audio.get("transcript"):
-
-            elements.append(Paragraph("What Was Said", heading_style))
-
-            transcript_style = ParagraphStyle(
-
-                'TranscriptStyle',
-
-                parent=narrative_style,
-
-                fontSize=10,
-
-                textColor=colors.HexColor("#4b5563"),
-
-                leftIndent=20,
-
-                rightIndent=20,
-
-                fontStyle='italic'
-
-            )
-
-            elements.append(Paragraph(f'"{audio.get("transcript", "")}"', transcript_style))
-
-            elements.append(Spacer(1, 0.3*inch))
-
-        
-
-
-        recommendations = insights.get("recommendations", [])
-
-        if recommendations:
-
-            elements.append(Paragraph("Recommendations", heading_style))
-
-            for rec in recommendations:
-
-                elements.append(Paragraph(f"• {rec}", narrative_style))
-
-            elements.append(Spacer(1, 0.3*inch))
-
-        
-
-
-        notes = checkin_data.get("notes", "")
-
-        if notes:
-
-            elements.append(Paragraph("Employee Notes", heading_style))
-
-            elements.append(Paragraph(notes, narrative_style))
-
-            elements.append(Spacer(1, 0.3*inch))
+def _write_document(pdf_path: Path, elements: List[Any], template: ReportTemplate, generated_at: Optional[datetime] = None):
+    """
+    Build a document into a temp file next to `pdf_path`, then move it into place
+    
+    With `generated_at` the document is rendered in ReportLab invariant mode
+    (fixed creation date and document ID), so re-rendering the same check-in
+    version yields the same bytes and download ETags stay strong.
+    """
+    tmp_path = pdf_path.with_name(f".{pdf_path.name}.{uuid.uuid4().hex[:8]}.tmp")
+    try:
+        doc = SimpleDocTemplate(
+            str(tmp_path),
+            pagesize=letter,
+            rightMargin=inch,
+            leftMargin=inch,
+            topMargin=inch,
+            bottomMargin=inch,
+            invariant=1 if generated_at is not None else None
+        )
+        template.build(doc, elements, generated_at)
+        os.replace(tmp_path, pdf_path)
+    except Exception:
+        if tmp_path.exists():
+            tmp_path.unlink()
+        raise
 
+def render_checkin_pdf(
+    checkin_data: Dict[str, Any],
+    emp_name: str,
+    emp_email: str,
+    pdf_path: Optional[str] = None,
+    template: Optional[ReportTemplate] = None
+) -> str:
+    """
+    Generate the PDF report for a check-in
+    
+    Args:
+        checkin_data: Check-in document from database
+        emp_name: Employee name
+        emp_email: Employee email
+        pdf_path: Destination file, written atomically (default: new timestamped file)
+        template: Report template (default: the shared one from get_report_template)
+    
+    Returns:
+        str: Path to generated PDF file
+    """
+    try:
+        if pdf_path is None:
+            checkin_id = str(checkin_data.get("_id", "unknown"))
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            pdf_path = PDF_DIR / f"checkin_{checkin_id}_{timestamp}.pdf"
+        pdf_path = Path(pdf_path)
         
-
-        elements.append(Spacer(1, 0.3*inch))
-
-        footer_text = "This report was automatically generated by Solace AI based on qualitative analysis. For questions or concerns, please contact your supervisor."
-
-        footer_para = Paragraph(footer_text, ParagraphStyle(
-
-            'Footer',
-
-            parent=styles['Normal'],
-
-            fontSize=8,
-
-            textColor=colors.grey,
-
-            alignment=TA_CENTER
-
-        ))
-
-        elements.append(footer_para)
-
+        logger.info(f"Generating qualitative PDF report: {pdf_path}")
         
-
-        doc.build(elements, onFirstPage=create_header, onLaterPages=create_header)
-
+        template = template or get_report_template()
+        elements = build_report_elements(checkin_data, emp_name, emp_email, template)
+        _write_document(pdf_path, elements, template, report_version(checkin_data))
         
-
         logger.info(f"PDF generated successfully: {pdf_path}")
-
         return str(pdf_path)
-
         
-
     except Exception as e:
-
         logger.error(f"Error generating PDF: {e}", exc_info=True)
-
         raise
 
-
+def render_merged_pdf(reports: List[Tuple[Dict[str, Any], str, str]], pdf_path: str) -> str:
+    """
+    Render several check-in reports into one PDF, each starting on a new page
+    
+    Args:
+        reports: (check-in document, employee name, employee email) tuples
+        pdf_path: Destination file
+    
+    Returns:
+        str: Path to the merged PDF
+    """
+    template = get_report_template()
+    elements = []
+    for i, (checkin_data, emp_name, emp_email) in enumerate(reports):
+        if i:
+            elements.append(PageBreak())
+        elements.extend(build_report_elements(checkin_data, emp_name, emp_email, template))
+    _write_document(Path(pdf_path), elements, template)
+    logger.info(f"Merged PDF generated with {len(reports)} reports: {pdf_path}")
+    return pdf_path
+
+async def generate_merged_pdf(reports: List[Tuple[Dict[str, Any], str, str]], pdf_path: str) -> str:
+    """Render a merged PDF in the render pool (see render_merged_pdf)"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_pdf_executor(), render_merged_pdf, reports, pdf_path)
 
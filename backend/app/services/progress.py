@@ -0,0 +1,153 @@
+from typing import Dict, Any, Optional
+from datetime import datetime
+import asyncio
+import logging
+import time
+from app.config import settings
+from app.database import get_tasks_collection
+from app.services.task_events import publish_task_event, TERMINAL_STATUSES
+
+logger = logging.getLogger(__name__)
+
+class StageProgress:
+    """
+    Maps sub-stage progress (frames analyzed, audio steps, ...) onto a slice
+    of the task's overall progress range
+    """
+    
+    def __init__(self, reporter: "TaskProgressReporter", start: int, end: int, message: str, unit: str = "steps"):
+        self.reporter = reporter
+        self.start = start
+        self.end = end
+        self.message = message
+        self.unit = unit
+    
+    async def __call__(self, done: int, total: int):
+        fraction = min(1.0, done / total) if total > 0 else 0.0
+        progress = self.start + (self.end - self.start) * fraction
+        await self.reporter.update(
+            progress=progress,
+            message=f"{self.message} ({done}/{total} {self.unit})",
+            stage={"name": self.message, "done": done, "total": total, "unit": self.unit}
+        )
+
+class TaskProgressReporter:
+    """
+    Batches and rate-limits progress writes for a single task
+    
+    Intermediate updates are merged in memory and written to the tasks
+    collection at most once per TASK_PROGRESS_MIN_INTERVAL_MS. A trailing
+    write is scheduled so the latest state is never lost, and terminal
+    states (completed/failed) are always flushed immediately. Every update
+    is published to in-process subscribers of the task's status stream.
+    """
+    
+    def __init__(self, task_id: str, min_interval_ms: Optional[int] = None):
+        if min_interval_ms is None:
+            min_interval_ms = settings.TASK_PROGRESS_MIN_INTERVAL_MS
+        self.task_id = task_id
+        self.min_interval = max(0, min_interval_ms) / 1000
+        self.progress = 0
+        self.writes = 0
+        self._pending: Dict[str, Any] = {}
+        self._state: Dict[str, Any] = {}
+        self._last_write = 0.0
+        self._flush_task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self._closed = False
+    
+    def stage(self, start: int, end: int, message: str, unit: str = "steps") -> StageProgress:
+        """Return a (done, total) callback that reports progress between start and end"""
+        return StageProgress(self, start, end, message, unit)
+    
+    async def update(
+        self,
+        progress: Optional[float] = None,
+        message: Optional[str] = None,
+        status: Optional[str] = None,
+        **fields
+    ):
+        """
+        Record a progress update, writing it now or coalescing it into the next write
+        
+        Args:
+            progress: Overall progress percentage (never moves backwards)
+            message: Human readable status message
+            status: Task status; terminal statuses are flushed immediately
+            **fields: Extra task fields to set
+        """
+        if self._closed:
+            return
+        
+        if progress is not None and int(progress) >= self.progress:
+            self.progress = int(progress)
+            self._pending["progress"] = self.progress
+        if message is not None:
+            self._pending["message"] = message
+        if status is not None:
+            self._pending["status"] = status
+        self._pending.update(fields)
+        self._state.update(self._pending)
+        
+        if status in TERMINAL_STATUSES:
+            await self._finish()
+            publish_task_event(self.task_id, {**self._state, "updated_at": datetime.utcnow()})
+            return
+        
+        publish_task_event(self.task_id, {**self._state, "updated_at": datetime.utcnow()})
+        
+        elapsed = time.monotonic() - self._last_write
+        if elapsed >= self.min_interval:
+            await self.flush()
+        elif self._flush_task is None:
+            self._flush_task = asyncio.create_task(self._delayed_flush(self.min_interval - elapsed))
+    
+    async def complete(self, result: Dict[str, Any], message: str = "Processing complete", **fields):
+        await self.update(progress=100, message=message, status="completed", result=result, **fields)
+    
+    async def fail(self, message: str, **fields):
+        await self.update(message=message, status="failed", **fields)
+    
+    async def flush(self):
+        """Write any pending update to the tasks collection (a failed progress write stays pending)"""
+        async with self._lock:
+            if not self._pending:
+                return
+            update = {**self._pending, "updated_at": datetime.utcnow()}
+            self._pending = {}
+            self._last_write = time.monotonic()
+            
+            try:
+                await get_tasks_collection().update_one(
+                    {"task_id": self.task_id},
+                    {"$set": update}
+                )
+                self.writes += 1
+            except Exception as e:
+                logger.warning(f"Failed to write progress for task {self.task_id}: {e}")
+                if update.get("status") in TERMINAL_STATUSES:
+                    raise
+                update.pop("updated_at")
+                self._pending = {**update, **self._pending}
+    
+    async def _delayed_flush(self, delay: float):
+        try:
+            await asyncio.sleep(delay)
+            self._flush_task = None
+            await self.flush()
+        except asyncio.CancelledError:
+            pass
+    
+    async def _finish(self):
+        """
+        Write the terminal update and close the reporter
+        
+        Closes only once the write succeeded, so a caller whose complete()
+        raised can still record fail().
+        """
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
+        self._closed = True
+        logger.info(f"Task {self.task_id} finished with {self.writes} progress writes")
@@ -0,0 +1,135 @@
+from datetime import datetime
+from html import escape
+from typing import Dict, Any, List, Optional
+
+REPORT_TITLE = "Daily Check-in Report"
+
+NARRATIVE_SECTIONS = [
+    ("Overall Experience", "overall_experience", "Analysis indicates a standard check-in session with typical engagement patterns."),
+    ("Emotional State & Well-being", "emotional_state", "Emotional state appears balanced and stable."),
+    ("Work Motivation & Engagement", "work_motivation", "Work motivation levels appear consistent with normal work patterns."),
+    ("Professional Appearance & Office Ethics", "professional_appearance", "Professional presentation was maintained throughout the check-in session."),
+    ("AI Analysis & Observations", "ai_observations", "AI analysis detected standard behavioral patterns consistent with a routine check-in.")
+]
+FOOTER_TEXT = "This report was automatically generated by Solace AI based on qualitative analysis. For questions or concerns, please contact your supervisor."
+
+REPORT_CSS = """
+body { font-family: Helvetica, Arial, sans-serif; color: #374151; max-width: 720px; margin: 0 auto; padding: 24px; }
+h1 { color: #10b981; font-size: 24px; text-align: center; margin-bottom: 30px; }
+h2 { color: #1f2937; font-size: 16px; margin: 24px 0 12px; }
+p { font-size: 11pt; line-height: 16pt; }
+table { border-collapse: collapse; font-size: 10pt; }
+th, td { border: 0.5px solid #9ca3af; padding: 8px; }
+th { background: #f3f4f6; text-align: right; }
+blockquote { color: #4b5563; font-style: italic; margin: 0 20px; }
+footer { color: #6b7280; font-size: 8pt; text-align: center; margin-top: 40px; }
+"""
+
+def report_version(checkin_data: Dict[str, Any]) -> Optional[datetime]:
+    """Version of a check-in's report: its updated_at (created_at for old documents)"""
+    version = checkin_data.get("updated_at") or checkin_data.get("created_at")
+    return version if isinstance(version, datetime) else None
+
+def build_report_content(checkin_data: Dict[str, Any], emp_name: str, emp_email: str) -> Dict[str, Any]:
+    """
+    Build the content model of a qualitative check-in report (NO NUMERICAL METRICS)
+    
+    Single source of the report's sections: the PDF lays it out with
+    ReportLab, and the JSON/HTML report endpoint serves it directly.
+    
+    Args:
+        checkin_data: Check-in document with stored metrics and insights
+        emp_name: Employee name
+        emp_email: Employee email
+    
+    Returns:
+        dict: Title, employee info, narrative sections, transcript,
+        recommendations, notes and footer (plain text)
+    """
+    checkin_date = datetime.fromisoformat(str(checkin_data.get("date", datetime.now())))
+    insights = checkin_data.get("insights") or {}
+    audio = (checkin_data.get("metrics") or {}).get("audio") or {}
+    version = report_version(checkin_data)
+    
+    transcript = None
+    if audio.get("has_audio", False) and audio.get("transcript"):
+        transcript = audio["transcript"]
+    
+    return {
+        "checkin_id": str(checkin_data.get("_id", "")),
+        "version": version.isoformat() if version else None,
+        "title": REPORT_TITLE,
+        "employee": {
+            "name": emp_name,
+            "email": emp_email,
+            "checkin_date": checkin_date.strftime("%B %d, %Y"),
+            "checkin_time": checkin_date.strftime("%I:%M %p")
+        },
+        "sections": [
+            {"key": key, "title": title, "text": insights.get(key, default)}
+            for title, key, default in NARRATIVE_SECTIONS
+        ],
+        "transcript": transcript,
+        "recommendations": list(insights.get("recommendations", [])),
+        "notes": checkin_data.get("notes") or None,
+        "footer": FOOTER_TEXT
+    }
+
+def employee_info_rows(content: Dict[str, Any]) -> List[List[str]]:
+    """Label/value rows of the employee information table"""
+    employee = content["employee"]
+    return [
+        ["Name:", employee["name"]],
+        ["Email:", employee["email"]],
+        ["Check-in Date:", employee["checkin_date"]],
+        ["Check-in Time:", employee["checkin_time"]]
+    ]
+
+def render_report_html(content: Dict[str, Any]) -> str:
+    """
+    Render a report content model as a standalone HTML page
+    
+    All text is escaped; styles are inlined so the page can be shown in the
+    app or opened directly without extra requests.
+    """
+    parts = [
+        "<!DOCTYPE html>",
+        '<html lang="en">',
+        "<head>",
+        '<meta charset="utf-8">',
+        f"<title>{escape(content['title'])} - {escape(content['employee']['name'])}</title>",
+        f"<style>{REPORT_CSS}</style>",
+        "</head>",
+        "<body>",
+        f"<h1>{escape(content['title'])}</h1>",
+        "<h2>Employee Information</h2>",
+        "<table>"
+    ]
+    for label, value in employee_info_rows(content):
+        parts.append(f"<tr><th>{escape(label)}</th><td>{escape(value)}</td></tr>")
+    parts.append("</table>")
+    
+    for section in content["sections"]:
+        parts.append(f'<section id="{escape(section["key"])}">')
+        parts.append(f"<h2>{escape(section['title'])}</h2>")
+        parts.append(f"<p>{escape(section['text'])}</p>")
+        parts.append("</section>")
+    
+    if content["transcript"]:
+        parts.append("<h2>What Was Said</h2>")
+        parts.append(f"<blockquote>&quot;{escape(content['transcript'])}&quot;</blockquote>")
+    
+    if content["recommendations"]:
+        parts.append("<h2>Recommendations</h2>")
+        parts.append("<ul>")
+        parts.extend(f"<li>{escape(str(rec))}</li>" for rec in content["recommendations"])
+        parts.append("</ul>")
+    
+    if content["notes"]:
+        parts.append("<h2>Employee Notes</h2>")
+        parts.append(f"<p>{escape(content['notes'])}</p>")
+    
+    parts.append(f"<footer>{escape(content['footer'])}</footer>")
+    parts.append("</body>")
+    parts.append("</html>")
+    return "\n".join(parts)
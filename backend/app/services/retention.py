@@ -0,0 +1,189 @@
+from typing import Dict, Any, List, Optional
+from pathlib import Path
+import asyncio
+import logging
+import os
+import time
+from app.config import settings
+from app.services.metrics import metrics
+from app.services.storage import purge_remote_storage
+
+logger = logging.getLogger(__name__)
+
+class RetentionPolicy:
+    """
+    Size and age quota for one directory
+    
+    Args:
+        name: Label used in logs and metrics
+        directory: Directory to manage (only regular files directly inside it)
+        max_bytes: Evict files once the directory exceeds this size (0 = unbounded)
+        max_age_seconds: Delete files older than this (0 = keep forever)
+        grace_seconds: Never remove files younger than this, for age or size reasons
+        lru: Evict least recently used first (atime) instead of oldest first (mtime)
+    """
+    
+    def __init__(
+        self,
+        name: str,
+        directory: str,
+        max_bytes: int = 0,
+        max_age_seconds: int = 0,
+        grace_seconds: int = 0,
+        lru: bool = False
+    ):
+        self.name = name
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.grace_seconds = grace_seconds
+        self.lru = lru
+
+def _remove(policy: RetentionPolicy, path: str, size: int, reason: str, stats: Dict[str, Any]) -> bool:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        return False
+    except OSError as e:
+        logger.warning(f"Retention could not remove {path}: {e}")
+        return False
+    stats["files_removed"] += 1
+    stats["bytes_reclaimed"] += size
+    metrics.inc("retention_files_removed_total", directory=policy.name, reason=reason)
+    metrics.inc("retention_bytes_reclaimed_total", size, directory=policy.name, reason=reason)
+    return True
+
+def sweep_directory(policy: RetentionPolicy, now: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Apply a retention policy to its directory
+    
+    Age expiry runs first, then the size quota evicts files (LRU or oldest
+    first) until the directory fits. Both skip files inside the grace period,
+    so a max age shorter than the grace period cannot remove in-flight files.
+    
+    Returns:
+        Dictionary with files/bytes removed and remaining directory size
+    """
+    now = now or time.time()
+    stats = {"directory": str(policy.directory), "files_removed": 0, "bytes_reclaimed": 0, "bytes_remaining": 0}
+    
+    if not policy.directory.exists():
+        return stats
+    
+    files: List[Dict[str, Any]] = []
+    with os.scandir(policy.directory) as entries:
+        for entry in entries:
+            try:
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                st = entry.stat(follow_symlinks=False)
+            except FileNotFoundError:
+                continue
+            files.append({
+                "path": entry.path,
+                "size": st.st_size,
+                "mtime": st.st_mtime,
+                "last_used": max(st.st_atime, st.st_mtime) if policy.lru else st.st_mtime
+            })
+    
+    max_age = max(policy.max_age_seconds, policy.grace_seconds) if policy.max_age_seconds else 0
+    remaining = []
+    for f in files:
+        if max_age and now - f["mtime"] > max_age:
+            if _remove(policy, f["path"], f["size"], "age", stats):
+                continue
+        remaining.append(f)
+    
+    total = sum(f["size"] for f in remaining)
+    if policy.max_bytes and total > policy.max_bytes:
+        for f in sorted(remaining, key=lambda f: f["last_used"]):
+            if total <= policy.max_bytes:
+                break
+            if now - f["mtime"] < policy.grace_seconds:
+                continue
+            if _remove(policy, f["path"], f["size"], "quota", stats):
+                total -= f["size"]
+    
+    stats["bytes_remaining"] = total
+    metrics.set_gauge("retention_directory_bytes", total, directory=policy.name)
+    return stats
+
+def default_policies() -> List[RetentionPolicy]:
+    """Build retention policies for VIDEOS_DIR and PDFS_DIR from settings"""
+    return [
+        RetentionPolicy(
+            name="videos",
+            directory=settings.VIDEOS_DIR,
+            max_bytes=settings.VIDEOS_MAX_MB * 1024 * 1024,
+            max_age_seconds=settings.FAILED_VIDEO_RETENTION_HOURS * 3600,
+            grace_seconds=settings.VIDEO_IN_FLIGHT_GRACE_MINUTES * 60
+        ),
+        RetentionPolicy(
+            name="pdfs",
+            directory=settings.PDFS_DIR,
+            max_bytes=settings.PDFS_MAX_MB * 1024 * 1024,
+            max_age_seconds=settings.PDFS_MAX_AGE_DAYS * 86400,
+            grace_seconds=60,
+            lru=True
+        )
+    ]
+
+class RetentionManager:
+    """
+    Background janitor that periodically enforces directory quotas
+    
+    Uploaded videos of in-flight tasks are protected by the grace period;
+    failed-job videos kept for debugging expire after
+    FAILED_VIDEO_RETENTION_HOURS. PDFs can be regenerated from the stored
+    check-in, so they are evicted least recently used first. With a shared
+    STORAGE_BACKEND, objects there are expired by the same age limits.
+    """
+    
+    def __init__(self, policies: Optional[List[RetentionPolicy]] = None, interval_seconds: Optional[int] = None):
+        self.policies = policies if policies is not None else default_policies()
+        self.interval_seconds = interval_seconds or settings.RETENTION_INTERVAL_SECONDS
+        self._task: Optional[asyncio.Task] = None
+    
+    def sweep(self) -> List[Dict[str, Any]]:
+        started = time.perf_counter()
+        results = []
+        for policy in self.policies:
+            try:
+                results.append(sweep_directory(policy))
+            except Exception as e:
+                logger.error(f"Retention sweep failed for {policy.directory}: {e}", exc_info=True)
+        metrics.observe("retention_sweep_seconds", time.perf_counter() - started)
+        
+        reclaimed = sum(r["bytes_reclaimed"] for r in results)
+        if reclaimed:
+            logger.info(f"🧹 Retention reclaimed {reclaimed / (1024 * 1024):.1f}MB: {results}")
+        return results
+    
+    async def sweep_async(self) -> List[Dict[str, Any]]:
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, self.sweep)
+    
+    async def _run(self):
+        while True:
+            try:
+                await self.sweep_async()
+                await purge_remote_storage()
+            except Exception as e:
+                logger.error(f"Retention sweep error: {e}", exc_info=True)
+            await asyncio.sleep(self.interval_seconds)
+    
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+retention_manager = RetentionManager()
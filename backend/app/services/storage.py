@@ -0,0 +1,366 @@
+from abc import ABC, abstractmethod
+from typing import Dict, Any, AsyncIterator, Optional
+from datetime import datetime, timedelta
+from pathlib import Path
+import asyncio
+import logging
+import mimetypes
+import os
+import shutil
+from app.config import settings
+from app.database import get_gridfs_bucket
+from app.services.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 256 * 1024
+NAMESPACES = ("reports", "videos")
+
+class StorageBackend(ABC):
+    """
+    Object store for generated reports and retained videos
+    
+    Keys are flat file names within a namespace ("reports" or "videos").
+    Writes upload from a local file and reads yield chunks, so neither side
+    holds a whole object in memory.
+    """
+    
+    name = "base"
+    
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+    
+    @property
+    def is_local(self) -> bool:
+        return False
+    
+    def local_path(self, key: str) -> Optional[str]:
+        """Path of the object on this node's disk, if the backend is the local disk"""
+        return None
+    
+    @abstractmethod
+    async def stat(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return {"size", "last_modified"} for a stored object, or None if missing"""
+    
+    @abstractmethod
+    async def put_file(self, key: str, path: str, content_type: str = "application/octet-stream"):
+        """Upload a local file under `key`, replacing any existing object"""
+    
+    @abstractmethod
+    def iter_range(self, key: str, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        """Yield the bytes of an object from `start` to `end` (inclusive) in chunks"""
+    
+    @abstractmethod
+    async def delete(self, key: str):
+        """Remove an object; missing keys are ignored"""
+    
+    async def purge(self, older_than: datetime) -> int:
+        """Delete objects stored before `older_than`; returns how many were removed"""
+        return 0
+    
+    async def read(self, key: str) -> bytes:
+        return b"".join([chunk async for chunk in self.iter_range(key)])
+
+def _check_key(key: str) -> str:
+    if not key or "/" in key or "\\" in key or key.startswith("."):
+        raise ValueError(f"Invalid storage key: {key!r}")
+    return key
+
+class LocalStorage(StorageBackend):
+    """Files in a directory on this node (VIDEOS_DIR / PDFS_DIR), evicted by the retention manager"""
+    
+    name = "local"
+    
+    def __init__(self, namespace: str, directory: str):
+        super().__init__(namespace)
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+    
+    @property
+    def is_local(self) -> bool:
+        return True
+    
+    def _path(self, key: str) -> Path:
+        return self.directory / _check_key(key)
+    
+    def local_path(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        return str(path) if path.exists() else None
+    
+    async def stat(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            st = os.stat(self._path(key))
+        except FileNotFoundError:
+            return None
+        return {"size": st.st_size, "last_modified": datetime.utcfromtimestamp(st.st_mtime)}
+    
+    async def put_file(self, key: str, path: str, content_type: str = "application/octet-stream"):
+        dest = self._path(key)
+        if Path(path).resolve() == dest.resolve():
+            return
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, shutil.copyfile, path, dest)
+    
+    async def iter_range(self, key: str, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        loop = asyncio.get_running_loop()
+        with open(self._path(key), "rb") as f:
+            f.seek(start)
+            remaining = None if end is None else end - start + 1
+            while remaining is None or remaining > 0:
+                size = CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining)
+                chunk = await loop.run_in_executor(None, f.read, size)
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+    
+    async def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+class GridFSStorage(StorageBackend):
+    """
+    MongoDB GridFS bucket per namespace (reports.files / reports.chunks, ...)
+    
+    GridFS splits objects into 255KB chunks, so uploads and ranged reads
+    stream chunk by chunk. Re-uploading a key writes a new revision and then
+    deletes the older ones, so each key keeps a single file.
+    """
+    
+    name = "gridfs"
+    
+    def _bucket(self):
+        return get_gridfs_bucket(self.namespace)
+    
+    async def _latest(self, key: str) -> Optional[Dict[str, Any]]:
+        cursor = self._bucket().find({"filename": _check_key(key)}).sort("uploadDate", -1).limit(1)
+        files = await cursor.to_list(1)
+        return files[0] if files else None
+    
+    async def stat(self, key: str) -> Optional[Dict[str, Any]]:
+        doc = await self._latest(key)
+        if doc is None:
+            return None
+        return {"size": doc.length, "last_modified": doc.upload_date}
+    
+    async def put_file(self, key: str, path: str, content_type: str = "application/octet-stream"):
+        bucket = self._bucket()
+        with open(path, "rb") as f:
+            file_id = await bucket.upload_from_stream(
+                _check_key(key),
+                f,
+                chunk_size_bytes=CHUNK_SIZE,
+                metadata={"content_type": content_type}
+            )
+        async for doc in bucket.find({"filename": key, "_id": {"$lt": file_id}}):
+            await bucket.delete(doc._id)
+    
+    async def iter_range(self, key: str, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        grid_out = await self._bucket().open_download_stream_by_name(_check_key(key))
+        grid_out.seek(start)
+        remaining = (grid_out.length if end is None else end + 1) - start
+        while remaining > 0:
+            chunk = await grid_out.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    
+    async def delete(self, key: str):
+        bucket = self._bucket()
+        async for doc in bucket.find({"filename": _check_key(key)}):
+            await bucket.delete(doc._id)
+    
+    async def purge(self, older_than: datetime) -> int:
+        bucket = self._bucket()
+        removed = 0
+        async for doc in bucket.find({"uploadDate": {"$lt": older_than}}):
+            await bucket.delete(doc._id)
+            removed += 1
+        return removed
+
+class S3Storage(StorageBackend):
+    """
+    S3-compatible bucket (AWS S3, MinIO) with one key prefix per namespace
+    
+    Requires boto3. Uploads use multipart transfers and reads use ranged
+    GETs whose body is consumed chunk by chunk; boto3 calls run in the
+    default executor.
+    """
+    
+    name = "s3"
+    
+    def __init__(self, namespace: str, client, bucket: str):
+        super().__init__(namespace)
+        self.client = client
+        self.bucket = bucket
+    
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}/{_check_key(key)}"
+    
+    async def _call(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, lambda: fn(*args, **kwargs))
+    
+    async def stat(self, key: str) -> Optional[Dict[str, Any]]:
+        from botocore.exceptions import ClientError
+        try:
+            head = await self._call(self.client.head_object, Bucket=self.bucket, Key=self._key(key))
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+        return {"size": head["ContentLength"], "last_modified": head["LastModified"].replace(tzinfo=None)}
+    
+    async def put_file(self, key: str, path: str, content_type: str = "application/octet-stream"):
+        await self._call(
+            self.client.upload_file,
+            path,
+            self.bucket,
+            self._key(key),
+            ExtraArgs={"ContentType": content_type}
+        )
+    
+    async def iter_range(self, key: str, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        byte_range = f"bytes={start}-{'' if end is None else end}"
+        response = await self._call(self.client.get_object, Bucket=self.bucket, Key=self._key(key), Range=byte_range)
+        body = response["Body"]
+        try:
+            while True:
+                chunk = await self._call(body.read, CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            body.close()
+    
+    async def delete(self, key: str):
+        await self._call(self.client.delete_object, Bucket=self.bucket, Key=self._key(key))
+    
+    async def purge(self, older_than: datetime) -> int:
+        def run() -> int:
+            removed = 0
+            paginator = self.client.get_paginator("list_objects_v2")
+            for page in paginator.paginate(Bucket=self.bucket, Prefix=f"{self.namespace}/"):
+                expired = [
+                    {"Key": obj["Key"]}
+                    for obj in page.get("Contents", [])
+                    if obj["LastModified"].replace(tzinfo=None) < older_than
+                ]
+                if expired:
+                    self.client.delete_objects(Bucket=self.bucket, Delete={"Objects": expired, "Quiet": True})
+                    removed += len(expired)
+            return removed
+        
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, run)
+
+_backends: Dict[str, StorageBackend] = {}
+_s3_client = None
+
+def _get_s3_client():
+    global _s3_client
+    if _s3_client is None:
+        try:
+            import boto3
+            from botocore.config import Config
+        except ImportError as e:
+            raise RuntimeError("STORAGE_BACKEND=s3 requires the boto3 package") from e
+        _s3_client = boto3.client(
+            "s3",
+            endpoint_url=settings.S3_ENDPOINT_URL or None,
+            aws_access_key_id=settings.S3_ACCESS_KEY_ID or None,
+            aws_secret_access_key=settings.S3_SECRET_ACCESS_KEY or None,
+            region_name=settings.S3_REGION,
+            config=Config(s3={"addressing_style": "path"}, max_pool_connections=settings.HTTP_MAX_CONNECTIONS)
+        )
+    return _s3_client
+
+def get_storage(namespace: str) -> StorageBackend:
+    """
+    Return the storage backend for a namespace ("reports" or "videos")
+    
+    STORAGE_BACKEND=local keeps objects in PDFS_DIR / VIDEOS_DIR (single
+    node); gridfs and s3 share them across nodes and restarts.
+    """
+    if namespace not in NAMESPACES:
+        raise ValueError(f"Unknown storage namespace: {namespace}")
+    backend = _backends.get(namespace)
+    if backend is None:
+        kind = settings.STORAGE_BACKEND
+        if kind == "gridfs":
+            backend = GridFSStorage(namespace)
+        elif kind == "s3":
+            backend = S3Storage(namespace, _get_s3_client(), settings.S3_BUCKET)
+        elif kind == "local":
+            backend = LocalStorage(namespace, settings.PDFS_DIR if namespace == "reports" else settings.VIDEOS_DIR)
+        else:
+            raise ValueError(f"Unknown STORAGE_BACKEND: {kind}")
+        _backends[namespace] = backend
+    return backend
+
+async def init_storage():
+    """Validate the configured backend on startup and create the S3 bucket if missing"""
+    if settings.STORAGE_BACKEND != "s3":
+        logger.info(f"📦 Storage backend: {settings.STORAGE_BACKEND}")
+        return
+    from botocore.exceptions import ClientError
+    client = _get_s3_client()
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.run_in_executor(None, lambda: client.head_bucket(Bucket=settings.S3_BUCKET))
+    except ClientError:
+        await loop.run_in_executor(None, lambda: client.create_bucket(Bucket=settings.S3_BUCKET))
+        logger.info(f"📦 Created S3 bucket {settings.S3_BUCKET}")
+    logger.info(f"📦 Storage backend: s3 ({settings.S3_ENDPOINT_URL or 'AWS'}, bucket {settings.S3_BUCKET})")
+
+async def purge_remote_storage() -> Dict[str, int]:
+    """
+    Expire shared-storage objects the local retention sweep cannot see
+    
+    Reports older than PDFS_MAX_AGE_DAYS are re-rendered on demand; retained
+    videos expire after FAILED_VIDEO_RETENTION_HOURS.
+    """
+    if settings.STORAGE_BACKEND == "local":
+        return {}
+    now = datetime.utcnow()
+    cutoffs = {
+        "reports": now - timedelta(days=settings.PDFS_MAX_AGE_DAYS),
+        "videos": now - timedelta(hours=settings.FAILED_VIDEO_RETENTION_HOURS)
+    }
+    removed = {}
+    for namespace, cutoff in cutoffs.items():
+        try:
+            removed[namespace] = await get_storage(namespace).purge(cutoff)
+        except Exception as e:
+            logger.error(f"Storage purge failed for {namespace}: {e}", exc_info=True)
+            continue
+        if removed[namespace]:
+            metrics.inc("storage_objects_purged_total", removed[namespace], backend=settings.STORAGE_BACKEND, namespace=namespace)
+    return removed
+
+async def retain_video(video_path: str) -> Optional[str]:
+    """
+    Move a failed job's video into shared storage for debugging
+    
+    With the local backend the file simply stays in VIDEOS_DIR.
+    
+    Returns:
+        str: Storage key of the retained video, or None if it stayed local only
+    """
+    storage = get_storage("videos")
+    if storage.is_local or not os.path.exists(video_path):
+        return None
+    key = os.path.basename(video_path)
+    content_type = mimetypes.guess_type(key)[0] or "application/octet-stream"
+    try:
+        await storage.put_file(key, video_path, content_type=content_type)
+    except Exception as e:
+        logger.error(f"Could not retain video {video_path} in {storage.name}: {e}", exc_info=True)
+        return None
+    os.remove(video_path)
+    logger.info(f"Failed video retained in {storage.name} as {key}")
+    return key
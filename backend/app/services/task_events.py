@@ -0,0 +1,120 @@
+from typing import Dict, Any, Optional, Set
+from collections import defaultdict
+from contextlib import asynccontextmanager
+import asyncio
+import json
+import logging
+from fastapi.encoders import jsonable_encoder
+from app.config import settings
+from app.database import get_tasks_collection
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+class TaskEventBroker:
+    """
+    In-process pub/sub for task status events
+    
+    Each subscriber gets a bounded queue; when a slow subscriber falls behind,
+    the oldest progress event is dropped since later events supersede it.
+    """
+    
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = defaultdict(set)
+    
+    def publish(self, task_id: str, event: Dict[str, Any]):
+        for queue in list(self._subscribers.get(task_id, ())):
+            if queue.full():
+                try:
+                    queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    pass
+            queue.put_nowait(event)
+    
+    def subscriber_count(self, task_id: str) -> int:
+        return len(self._subscribers.get(task_id, ()))
+    
+    @asynccontextmanager
+    async def subscribe(self, task_id: str):
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers[task_id].add(queue)
+        try:
+            yield queue
+        finally:
+            self._subscribers[task_id].discard(queue)
+            if not self._subscribers[task_id]:
+                del self._subscribers[task_id]
+
+broker = TaskEventBroker()
+
+_watcher_task: Optional[asyncio.Task] = None
+
+def build_task_event(task: Dict[str, Any]) -> Dict[str, Any]:
+    """Build a status event from a (possibly partial) task document"""
+    status = task.get("status")
+    return {
+        "event": status if status in TERMINAL_STATUSES else "progress",
+        "task_id": task.get("task_id"),
+        "status": status,
+        "progress": task.get("progress"),
+        "message": task.get("message"),
+        "stage": task.get("stage"),
+        "result": task.get("result"),
+        "insights": task.get("insights_preview"),
+        "updated_at": task.get("updated_at")
+    }
+
+def format_sse_event(event: Dict[str, Any]) -> str:
+    """Serialize an event in Server-Sent Events wire format"""
+    return f"event: {event['event']}\ndata: {json.dumps(jsonable_encoder(event))}\n\n"
+
+def publish_task_event(task_id: str, task: Dict[str, Any]):
+    """
+    Publish a task state change from the process that made it
+    
+    With the change_stream backend, events are delivered by the watcher from
+    persisted writes instead, so every node sees the same stream.
+    """
+    if settings.TASK_EVENTS_BACKEND == "change_stream":
+        return
+    broker.publish(task_id, build_task_event({"task_id": task_id, **task}))
+
+async def _watch_task_changes():
+    pipeline = [{"$match": {"operationType": {"$in": ["insert", "update", "replace"]}}}]
+    backoff = 1
+    while True:
+        try:
+            tasks_collection = get_tasks_collection()
+            async with tasks_collection.watch(pipeline, full_document="updateLookup") as stream:
+                logger.info("✅ Watching task changes via MongoDB change stream")
+                backoff = 1
+                async for change in stream:
+                    task = change.get("fullDocument")
+                    if task and broker.subscriber_count(task["task_id"]):
+                        broker.publish(task["task_id"], build_task_event(task))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"⚠️ Task change stream interrupted, retrying in {backoff}s: {e}")
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 60)
+
+def start_task_event_watcher():
+    """Start the change stream watcher when running with the change_stream backend"""
+    global _watcher_task
+    if settings.TASK_EVENTS_BACKEND != "change_stream" or _watcher_task is not None:
+        return
+    _watcher_task = asyncio.create_task(_watch_task_changes())
+
+async def stop_task_event_watcher():
+    global _watcher_task
+    if _watcher_task is None:
+        return
+    _watcher_task.cancel()
+    try:
+        await _watcher_task
+    except asyncio.CancelledError:
+        pass
+    _watcher_task = None
@@ -0,0 +1,58 @@
+from typing import Dict, List, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4
+
+_encoding = None
+_encoding_loaded = False
+
+def get_encoding():
+    """
+    Load the tiktoken cl100k_base encoding if tiktoken is installed
+    
+    The provider's Llama tokenizer differs slightly, but cl100k_base is far
+    closer than a character heuristic for budgeting purposes.
+    """
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            logger.info(f"tiktoken unavailable, estimating tokens from characters: {e}")
+            _encoding = None
+    return _encoding
+
+def tokenizer_name() -> str:
+    return "cl100k_base" if get_encoding() is not None else "heuristic"
+
+def count_tokens(text: Optional[str]) -> int:
+    if not text:
+        return 0
+    encoding = get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+def count_message_tokens(messages: List[Dict[str, str]]) -> int:
+    """Tokens for chat messages including per-message framing overhead"""
+    return sum(count_tokens(m.get("content", "")) + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text to at most `max_tokens` tokens, preferring a word boundary"""
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+    encoding = get_encoding()
+    if encoding is not None:
+        cut = encoding.decode(encoding.encode(text)[:max_tokens])
+    else:
+        cut = text[:max_tokens * CHARS_PER_TOKEN]
+    if " " in cut:
+        cut = cut.rsplit(" ", 1)[0]
+    return cut.rstrip()
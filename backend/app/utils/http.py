@@ -0,0 +1,103 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional, Tuple
+import gzip
+import hashlib
+
+def make_etag(*parts) -> str:
+    """Build a strong ETag from the given version parts"""
+    raw = ":".join(p.isoformat() if isinstance(p, datetime) else str(p) for p in parts)
+    return f'"{hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20]}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header (single, list or *) against an ETag"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [c.strip() for c in if_none_match.split(",")]
+    return etag in candidates or f"W/{etag}" in candidates
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+def http_date(value: datetime) -> str:
+    """Format a datetime (naive values are UTC, as stored in MongoDB) as an HTTP-date"""
+    return format_datetime(_as_utc(value).replace(microsecond=0), usegmt=True)
+
+def not_modified_since(if_modified_since: Optional[str], last_modified: datetime) -> bool:
+    """Check an If-Modified-Since header against a Last-Modified time (second precision)"""
+    if not if_modified_since:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    return _as_utc(last_modified).replace(microsecond=0) <= _as_utc(since)
+
+def if_range_matches(if_range: Optional[str], etag: str, last_modified: datetime) -> bool:
+    """Check an If-Range header (strong ETag or HTTP-date); absent means the range applies"""
+    if not if_range:
+        return True
+    if_range = if_range.strip()
+    if if_range.startswith('"') or if_range.startswith("W/"):
+        return if_range == etag
+    return if_range == http_date(last_modified)
+
+def parse_byte_range(range_header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single `Range: bytes=...` header
+    
+    Args:
+        range_header: Value of the Range header
+        size: Size of the representation in bytes
+    
+    Returns:
+        Inclusive (start, end) offsets, or None to serve the full
+        representation (no header, other units, multiple or malformed ranges)
+    
+    Raises:
+        ValueError: If the range cannot be satisfied (respond 416)
+    """
+    if not range_header:
+        return None
+    unit, _, spec = range_header.strip().partition("=")
+    if unit.strip().lower() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep or not (first + last).isdigit():
+        return None
+    if not first:
+        suffix = int(last)
+        if suffix == 0 or size == 0:
+            raise ValueError("Empty suffix range")
+        return max(0, size - suffix), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        return None
+    if start >= size:
+        raise ValueError(f"Range starts beyond {size} bytes")
+    end = int(last) if last else size - 1
+    return start, min(end, size - 1)
+
+def accepts_encoding(accept_encoding: Optional[str], coding: str) -> bool:
+    """Check whether an Accept-Encoding header allows a content coding (q=0 refuses it)"""
+    if not accept_encoding:
+        return False
+    qualities = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        params = params.strip()
+        try:
+            q = float(params[2:]) if params.startswith("q=") else 1.0
+        except ValueError:
+            q = 0.0
+        qualities[name.strip().lower()] = q
+    q = qualities.get(coding, qualities.get("*", 0.0))
+    return q > 0
+
+def gzip_body(body: bytes, level: int = 6) -> bytes:
+    """Gzip a response body deterministically (no mtime), so strong ETags stay valid"""
+    return gzip.compress(body, compresslevel=level, mtime=0)
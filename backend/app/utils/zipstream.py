@@ -0,0 +1,53 @@
+from typing import List
+import io
+import zipfile
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only, non-seekable sink that collects what zipfile writes until drained"""
+    
+    def __init__(self):
+        self._chunks: List[bytes] = []
+    
+    def writable(self) -> bool:
+        return True
+    
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+    
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+class ZipStream:
+    """
+    Build a ZIP archive incrementally for a streaming response
+    
+    zipfile writes local headers, data and data descriptors as each member
+    is added (the sink is not seekable), so only the current member and the
+    central directory are held in memory.
+    
+    Usage:
+        archive = ZipStream()
+        archive.add("a.pdf", data)
+        yield archive.drain()
+        ...
+        yield archive.close()
+    """
+    
+    def __init__(self, compression: int = zipfile.ZIP_DEFLATED, compresslevel: int = 6):
+        self._sink = _ChunkSink()
+        self._zip = zipfile.ZipFile(self._sink, mode="w", compression=compression, compresslevel=compresslevel)
+    
+    def add(self, name: str, data: bytes):
+        self._zip.writestr(name, data)
+    
+    def drain(self) -> bytes:
+        """Bytes written since the last drain"""
+        return self._sink.drain()
+    
+    def close(self) -> bytes:
+        """Write the central directory and return the remaining bytes"""
+        self._zip.close()
+        return self._sink.drain()
@@ -1,209 +1,146 @@
-from fastapi import FastAPI, Request
-
+from fastapi import FastAPI, Request, Depends
 from fastapi.middleware.cors import CORSMiddleware
-
 from app.config import settings
-
 from app.routes import auth, checkin
-
 from app.database import init_database
-
+from app.utils.auth import require_metrics_access
 from app.middleware.logging import RequestLoggingMiddleware
-
+from app.services.task_events import start_task_event_watcher, stop_task_event_watcher
+from app.services.retention import retention_manager
+from app.services.metrics import metrics
+from app.services.http_client import init_http_client, close_http_client
+from app.services.pdf_generator import shutdown_pdf_executor
+from app.services.storage import init_storage
 from datetime import datetime
-
 import logging
-
 import os
-
 import asyncio
-
 from slowapi import Limiter, _rate_limit_exceeded_handler
-
 from slowapi.util import get_remote_address
-
 from slowapi.errors import RateLimitExceeded
 
 
-
-
 logging.basicConfig(
-
     level=logging.INFO,
-
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-
 )
-
 logger = logging.getLogger(__name__)
 
 
-
-
 PORT = os.environ.get("PORT", "8000")
-
 logger.info(f"🌐 PORT environment variable: {PORT}")
 
-
-
 limiter = Limiter(key_func=get_remote_address)
 
-
-
 app = FastAPI(
-
     title="Solace AI API",
-
     description="Backend API for Solace AI Application",
-
     version="1.0.0"
-
 )
 
-
-
 app.state.limiter = limiter
-
 app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
 
 
-
-
-
 app.add_middleware(
-
     CORSMiddleware,
-
     allow_origins=["*"],
-
     allow_credentials=True,
-
     allow_methods=["*"],
-
     allow_headers=["*"],
-
-    expose_headers=["X-Request-ID"],
-
+    expose_headers=["X-Request-ID", "ETag"],
 )
 
 
-
-
 app.add_middleware(RequestLoggingMiddleware)
 
 
-
-
 app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
-
 app.include_router(checkin.router, prefix="/api/checkin", tags=["Check-ins"])
 
 
-
-
 @app.get("/")
-
 def root():
-
     """Root endpoint - sync, no async, instant response"""
-
     return {"status": "ok"}
 
-
-
 @app.get("/health")
-
 def health_check():
-
     """
     Health check for Railway - MUST be sync and instant.
     No async, no database checks, no imports.
     """
-
     return {"status": "ok"}
 
-
+@app.get("/metrics", dependencies=[Depends(require_metrics_access)])
+def get_metrics():
+    """In-process counters, gauges and histograms for this worker (METRICS_TOKEN or admin only)"""
+    return metrics.snapshot()
 
 
 _model_loading_task = None
 
-
-
 @app.on_event("startup")
-
 async def startup_event():
-
     """Initialize database and start ML model loading in background."""
-
     global _model_loading_task
-
     
-
     logger.info(f"🚀 FastAPI starting on port {PORT}...")
-
     logger.info(f"📋 CORS origins: {settings.CORS_ORIGINS}")
-
     
 
-
     try:
-
         await asyncio.wait_for(init_database(), timeout=10.0)
-
         logger.info("✅ Database connected")
-
     except Exception as e:
-
         logger.warning(f"⚠️ Database init failed (will retry): {e}")
-
     
-
+    await init_http_client()
+    start_task_event_watcher()
+    
+    try:
+        await init_storage()
+    except Exception as e:
+        logger.warning(f"⚠️ Storage backend init failed: {e}")
+    
+    if settings.RETENTION_ENABLED:
+        retention_manager.start()
+    
+    try:
+        await checkin.resume_pending_insights()
+    except Exception as e:
+        logger.warning(f"⚠️ Could not resume deferred insights: {e}")
+    
 
     async def load_models():
-
         try:
-
             from app.services.audio_ml import init_whisper, init_sentiment_models
-
             logger.info("🔄 Loading ML models in background...")
-
             
-
             loop = asyncio.get_event_loop()
-
             
-
             try:
-
                 await loop.run_in_executor(None, init_whisper)
-
                 logger.info("✅ Whisper model loaded")
-
             except Exception as e:
-
                 logger.error(f"⚠️ Whisper failed: {e}")
-
             
-
             try:
-
                 await loop.run_in_executor(None, init_sentiment_models)
-
                 logger.info("✅ Sentiment models loaded")
-
             except Exception as e:
-
                 logger.error(f"⚠️ Sentiment models failed: {e}")
-
                 
-
         except Exception as e:
-
             logger.error(f"⚠️ Model loading error: {e}")
-
     
-
     _model_loading_task = asyncio.create_task(load_models())
-
     logger.info("🚀 Startup complete. Health check ready.")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background watchers and close pooled connections."""
+    await stop_task_event_watcher()
+    await retention_manager.stop()
+    await close_http_client()
+    shutdown_pdf_executor()
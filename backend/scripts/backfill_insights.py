@@ -0,0 +1,128 @@
+"""
+Re-generate LLM insights for stored check-ins using batched requests
+
+Usage:
+    python scripts/backfill_insights.py --status fallback --batch-size 5
+    python scripts/backfill_insights.py --all --since 2024-01-01 --limit 200 --dry-run
+
+Check-ins are packed LLM_BATCH_SIZE per request (see generate_insights_batch).
+Updated check-ins get the new insights, insights_status and llm_usage; their
+pdf_url is cleared and the existing PDF file removed, so the next download
+re-renders it.
+"""
+from pathlib import Path
+from datetime import datetime
+import argparse
+import asyncio
+import os
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bson import ObjectId
+from app.config import settings
+from app.database import init_database, get_checkins_collection, get_users_collection
+from app.services.llm_insights import generate_insights_batch
+from app.services.http_client import close_http_client
+
+async def load_names(emp_ids) -> dict:
+    ids = []
+    for emp_id in emp_ids:
+        try:
+            ids.append(ObjectId(emp_id))
+        except Exception:
+            ids.append(emp_id)
+    names = {}
+    async for user in get_users_collection().find({"_id": {"$in": ids}}, {"first_name": 1, "last_name": 1}):
+        full_name = f"{user.get('first_name', '')} {user.get('last_name', '')}".strip()
+        names[str(user["_id"])] = full_name or "Employee"
+    return names
+
+async def process_chunk(chunk: list, batch_size: int, dry_run: bool) -> dict:
+    names = await load_names({c["emp_id"] for c in chunk})
+    items = [
+        {"metrics": c.get("metrics") or {}, "notes": c.get("notes"), "employee_name": names.get(str(c["emp_id"]), "Employee")}
+        for c in chunk
+    ]
+    results = await generate_insights_batch(items, batch_size=batch_size)
+    
+    stats = {"llm": 0, "fallback": 0}
+    for checkin, insights in zip(chunk, results):
+        llm_usage = insights.pop("usage", None)
+        is_llm = insights.get("source") == "llm"
+        stats["llm" if is_llm else "fallback"] += 1
+        if dry_run or not is_llm:
+            continue
+        
+        await get_checkins_collection().update_one(
+            {"_id": checkin["_id"]},
+            {
+                "$set": {
+                    "insights": insights,
+                    "insights_status": "completed",
+                    "llm_usage": llm_usage,
+                    "updated_at": datetime.utcnow()
+                },
+                "$unset": {"pdf_url": ""}
+            }
+        )
+        pdf_path = checkin.get("pdf_url")
+        if pdf_path and os.path.exists(pdf_path):
+            os.remove(pdf_path)
+    return stats
+
+async def run(args) -> dict:
+    await init_database()
+    
+    query = {}
+    if not args.all:
+        statuses = [s.strip() for s in args.status.split(",") if s.strip()]
+        query["$or"] = [{"insights_status": {"$in": statuses}}, {"insights.source": {"$in": statuses}}]
+    if args.since:
+        query["created_at"] = {"$gte": datetime.fromisoformat(args.since)}
+    
+    cursor = get_checkins_collection().find(
+        query,
+        {"emp_id": 1, "metrics": 1, "notes": 1, "pdf_url": 1}
+    ).sort("created_at", -1)
+    if args.limit:
+        cursor = cursor.limit(args.limit)
+    
+    totals = {"checkins": 0, "llm": 0, "fallback": 0}
+    chunk = []
+    chunk_size = args.batch_size * 4
+    async for checkin in cursor:
+        chunk.append(checkin)
+        if len(chunk) >= chunk_size:
+            stats = await process_chunk(chunk, args.batch_size, args.dry_run)
+            totals["checkins"] += len(chunk)
+            totals["llm"] += stats["llm"]
+            totals["fallback"] += stats["fallback"]
+            print(f"Processed {totals['checkins']} check-ins ({totals['llm']} LLM, {totals['fallback']} fallback)")
+            chunk = []
+    if chunk:
+        stats = await process_chunk(chunk, args.batch_size, args.dry_run)
+        totals["checkins"] += len(chunk)
+        totals["llm"] += stats["llm"]
+        totals["fallback"] += stats["fallback"]
+    
+    await close_http_client()
+    return totals
+
+def main():
+    parser = argparse.ArgumentParser(description="Backfill LLM insights for stored check-ins")
+    parser.add_argument("--status", default="fallback", help="Comma-separated insights_status values to re-generate")
+    parser.add_argument("--all", action="store_true", help="Re-generate every check-in regardless of status")
+    parser.add_argument("--since", help="Only check-ins created on or after this ISO date")
+    parser.add_argument("--limit", type=int, default=0)
+    parser.add_argument("--batch-size", type=int, default=None, help="Check-ins per LLM request (default LLM_BATCH_SIZE)")
+    parser.add_argument("--dry-run", action="store_true", help="Generate but do not write results")
+    args = parser.parse_args()
+    if args.batch_size is None:
+        args.batch_size = settings.LLM_BATCH_SIZE
+    
+    totals = asyncio.run(run(args))
+    print(f"Done: {totals}")
+
+if __name__ == "__main__":
+    main()
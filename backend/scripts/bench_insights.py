@@ -0,0 +1,112 @@
+"""
+Benchmark generate_insights against a configurable LLM endpoint
+
+Usage:
+    python scripts/llm_stub.py --latency lognormal:-0.5,0.6 --rate-429 0.1 &
+    LLM_API_URL=http://localhost:8081/v1/chat/completions GROQ_API_KEY=stub \
+        python scripts/bench_insights.py --requests 50 --concurrency 10
+
+Reports latency percentiles, how many calls returned LLM vs fallback
+insights, and the limiter/breaker/parse counters from the metrics registry.
+"""
+from pathlib import Path
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("LLM_API_URL", "http://127.0.0.1:8081/v1/chat/completions")
+os.environ.setdefault("GROQ_API_KEY", "stub")
+
+from collections import Counter
+from app.services.llm_insights import generate_insights
+from app.services.http_client import close_http_client
+from app.services.instrumentation import percentile
+from app.services.metrics import metrics
+
+def sample_metrics(rng: random.Random, with_transcript: bool) -> dict:
+    stress = rng.uniform(10, 90)
+    data = {
+        "stress_avg": stress,
+        "stress_max": min(100, stress + rng.uniform(0, 20)),
+        "stress_min": max(0, stress - rng.uniform(0, 20)),
+        "yawns_count": rng.randint(0, 4),
+        "engagement_score": rng.uniform(30, 95),
+        "head_pose_variance": rng.uniform(0, 0.5),
+        "duration_seconds": rng.uniform(20, 120),
+        "face_detected": True,
+        "audio": {"has_audio": False}
+    }
+    if with_transcript:
+        data["audio"] = {
+            "has_audio": True,
+            "transcript": "Today I am working on the quarterly report and feeling fairly good about it.",
+            "word_count": 15,
+            "speaking_pace_wpm": rng.uniform(100, 160),
+            "voice_energy": rng.uniform(0.2, 0.8),
+            "pitch_variance": rng.uniform(0.1, 0.6),
+            "pauses_count": rng.randint(0, 5),
+            "sentiment": rng.choice(["positive", "neutral", "negative"]),
+            "sentiment_confidence": rng.uniform(0.5, 0.99),
+            "dominant_emotion": rng.choice(["joy", "neutral", "sadness"]),
+            "emotions": {"joy": rng.random(), "neutral": rng.random(), "sadness": rng.random()}
+        }
+    return data
+
+async def run(requests: int, concurrency: int, transcript_ratio: float, seed: int) -> dict:
+    rng = random.Random(seed)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    sources: Counter = Counter()
+    
+    async def one(i: int):
+        async with semaphore:
+            started = time.perf_counter()
+            insights = await generate_insights(
+                metrics=sample_metrics(rng, rng.random() < transcript_ratio),
+                notes=None,
+                employee_name=f"Bench User {i}"
+            )
+            latencies.append(time.perf_counter() - started)
+            sources[insights.get("source", "unknown")] += 1
+    
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    await close_http_client()
+    
+    latencies.sort()
+    snapshot = metrics.snapshot()
+    return {
+        "requests": requests,
+        "concurrency": concurrency,
+        "elapsed_seconds": round(elapsed, 3),
+        "throughput_per_second": round(requests / elapsed, 2) if elapsed else None,
+        "latency_seconds": {
+            "p50": round(percentile(latencies, 50), 3),
+            "p95": round(percentile(latencies, 95), 3),
+            "p99": round(percentile(latencies, 99), 3),
+            "max": round(latencies[-1], 3) if latencies else None
+        },
+        "sources": dict(sources),
+        "counters": snapshot["counters"],
+        "gauges": snapshot["gauges"]
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark generate_insights")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--transcript-ratio", type=float, default=0.5, help="Fraction of check-ins with a transcript")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    
+    result = asyncio.run(run(args.requests, args.concurrency, args.transcript_ratio, args.seed))
+    print(json.dumps(result, indent=2, default=str))
+
+if __name__ == "__main__":
+    main()
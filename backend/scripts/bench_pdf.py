@@ -0,0 +1,83 @@
+"""
+Micro-benchmark check-in PDF rendering with a shared vs per-render report template
+
+Usage:
+    python scripts/bench_pdf.py --renders 200
+    python scripts/bench_pdf.py --renders 50 --mode fresh --keep
+
+`fresh` builds a new ReportTemplate for every PDF (the cost each render paid
+before templates were shared); `shared` reuses the process-wide template.
+PDFs are written to a temporary directory unless --keep is given.
+"""
+from pathlib import Path
+from datetime import datetime
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bson import ObjectId
+from app.services.pdf_generator import render_checkin_pdf, get_report_template, ReportTemplate, PDF_DIR
+from app.services.instrumentation import percentile
+
+SAMPLE_CHECKIN = {
+    "date": datetime(2024, 5, 6, 9, 30),
+    "notes": "Finishing the quarterly report today, then pairing on the onboarding flow.",
+    "metrics": {
+        "audio": {
+            "has_audio": True,
+            "transcript": "Today I am working on the quarterly report and feeling fairly good about it."
+        }
+    },
+    "insights": {
+        "overall_experience": "The employee came across as settled and attentive, approaching the check-in with a steady, composed demeanor.",
+        "emotional_state": "Their mood appeared even and positive, with a calm presence and no visible signs of distress.",
+        "work_motivation": "Energy levels suggest solid motivation and a willingness to engage with the day's work.",
+        "professional_appearance": "They presented themselves neatly and professionally throughout the session.",
+        "ai_observations": "Facial and vocal signals were stable, pointing to a routine day without unusual strain.",
+        "recommendations": ["Keep the current routine of short breaks", "Share progress with the team early", "Protect time for focused work"]
+    }
+}
+
+def run(mode: str, renders: int, out_dir: str) -> dict:
+    get_report_template()
+    durations = []
+    for i in range(renders):
+        checkin = {**SAMPLE_CHECKIN, "_id": ObjectId()}
+        pdf_path = os.path.join(out_dir, f"bench_{mode}_{i}.pdf")
+        started = time.perf_counter()
+        template = ReportTemplate() if mode == "fresh" else None
+        render_checkin_pdf(checkin, "Bench User", "bench@example.com", pdf_path, template=template)
+        durations.append(time.perf_counter() - started)
+    
+    durations.sort()
+    return {
+        "renders": renders,
+        "mean_ms": round(sum(durations) / len(durations) * 1000, 3),
+        "p50_ms": round(percentile(durations, 50) * 1000, 3),
+        "p95_ms": round(percentile(durations, 95) * 1000, 3),
+        "max_ms": round(durations[-1] * 1000, 3)
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark check-in PDF rendering")
+    parser.add_argument("--renders", type=int, default=100)
+    parser.add_argument("--mode", choices=["shared", "fresh", "both"], default="both")
+    parser.add_argument("--keep", action="store_true", help=f"Write PDFs to {PDF_DIR} instead of a temporary directory")
+    args = parser.parse_args()
+    
+    modes = ["fresh", "shared"] if args.mode == "both" else [args.mode]
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        out_dir = str(PDF_DIR) if args.keep else tmp_dir
+        results = {mode: run(mode, args.renders, out_dir) for mode in modes}
+    
+    if "fresh" in results and "shared" in results:
+        results["speedup"] = round(results["fresh"]["mean_ms"] / results["shared"]["mean_ms"], 2)
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Local OpenAI-compatible chat completions stub for load and latency testing
+
+Usage:
+    python scripts/llm_stub.py --port 8081 --latency lognormal:0.0,0.5 --rate-429 0.1 --rate-5xx 0.05
+
+Point the backend at it with:
+    LLM_API_URL=http://localhost:8081/v1/chat/completions GROQ_API_KEY=stub
+
+Behavior can be changed at runtime via POST /_stub/config with the same
+keys as the CLI flags (e.g. {"rate_5xx": 1.0} to force the circuit breaker
+open), and counters are available at GET /_stub/stats.
+"""
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import Dict, Any
+from collections import Counter
+import argparse
+import asyncio
+import json
+import math
+import random
+import time
+import uuid
+import uvicorn
+
+CANNED_SECTIONS = [
+    {
+        "overall_experience": "The employee came across as settled and attentive, approaching the check-in with a steady, composed demeanor.",
+        "emotional_state": "Their mood appeared even and positive, with a calm presence and no visible signs of distress.",
+        "work_motivation": "Energy levels suggest solid motivation and a willingness to engage with the day's work.",
+        "professional_appearance": "They presented themselves neatly and professionally throughout the session.",
+        "ai_observations": "Facial and vocal signals were stable, pointing to a routine day without unusual strain.",
+        "recommendations": ["Keep the current routine of short breaks", "Share progress with the team early", "Protect time for focused work"]
+    },
+    {
+        "overall_experience": "The employee seemed somewhat tired and distracted, though they stayed cooperative during the check-in.",
+        "emotional_state": "There were hints of fatigue and mild tension, with a subdued but steady mood.",
+        "work_motivation": "Motivation appears present but strained, likely affected by low energy.",
+        "professional_appearance": "Presentation was appropriate, with a relaxed but acceptable standard.",
+        "ai_observations": "Repeated yawning and slower speech suggest accumulated tiredness that may affect focus later in the day.",
+        "recommendations": ["Schedule a short recovery break before demanding tasks", "Review sleep and workload balance", "Check in with a manager about priorities"]
+    }
+]
+
+HEADERS = [
+    ("OVERALL_EXPERIENCE", "overall_experience"),
+    ("EMOTIONAL_STATE", "emotional_state"),
+    ("WORK_MOTIVATION", "work_motivation"),
+    ("PROFESSIONAL_APPEARANCE", "professional_appearance"),
+    ("AI_OBSERVATIONS", "ai_observations")
+]
+
+config: Dict[str, Any] = {
+    "latency": "fixed:0.3",
+    "token_delay": 0.01,
+    "rate_429": 0.0,
+    "rate_5xx": 0.0,
+    "retry_after": 2.0,
+    "requests_per_minute": 30,
+    "seed": None
+}
+
+stats: Counter = Counter()
+
+app = FastAPI(title="LLM stub")
+
+def sample_latency(spec: str) -> float:
+    """
+    Sample a latency in seconds from a distribution spec
+    
+    fixed:S, uniform:LOW,HIGH, normal:MEAN,STD, lognormal:MU,SIGMA, exp:MEAN
+    """
+    kind, _, args = spec.partition(":")
+    values = [float(v) for v in args.split(",") if v]
+    if kind == "fixed":
+        return values[0]
+    if kind == "uniform":
+        return random.uniform(values[0], values[1])
+    if kind == "normal":
+        return max(0.0, random.gauss(values[0], values[1]))
+    if kind == "lognormal":
+        return random.lognormvariate(values[0], values[1])
+    if kind == "exp":
+        return random.expovariate(1 / values[0])
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+def render_text(sections: Dict[str, Any]) -> str:
+    lines = [f"{header}: {sections[key]}" for header, key in HEADERS]
+    lines.append("RECOMMENDATIONS:")
+    lines.extend(f"- {item}" for item in sections["recommendations"])
+    return "\n".join(lines)
+
+def render_completion(body: Dict[str, Any]) -> str:
+    sections = random.choice(CANNED_SECTIONS)
+    if (body.get("response_format") or {}).get("type", "text") != "text":
+        return json.dumps(sections)
+    return render_text(sections)
+
+def rate_limit_headers(remaining: int) -> Dict[str, str]:
+    return {
+        "x-ratelimit-limit-requests": str(config["requests_per_minute"]),
+        "x-ratelimit-remaining-requests": str(max(0, remaining)),
+        "x-ratelimit-reset-requests": "2s"
+    }
+
+def usage_for(body: Dict[str, Any], content: str) -> Dict[str, int]:
+    prompt_tokens = sum(len(m.get("content", "")) // 4 + 4 for m in body.get("messages", []))
+    completion_tokens = len(content) // 4
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens
+    }
+
+@app.post("/v1/chat/completions")
+@app.post("/openai/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    stats["requests"] += 1
+    latency = sample_latency(config["latency"])
+    
+    roll = random.random()
+    if roll < config["rate_429"]:
+        stats["429"] += 1
+        await asyncio.sleep(min(latency, 0.05))
+        return JSONResponse(
+            status_code=429,
+            content={"error": {"message": "Rate limit reached (stub)", "type": "rate_limit_exceeded"}},
+            headers={**rate_limit_headers(0), "retry-after": str(config["retry_after"])}
+        )
+    if roll < config["rate_429"] + config["rate_5xx"]:
+        stats["5xx"] += 1
+        await asyncio.sleep(latency)
+        return JSONResponse(status_code=503, content={"error": {"message": "Service unavailable (stub)"}})
+    
+    content = render_completion(body)
+    usage = usage_for(body, content)
+    completion_id = f"chatcmpl-stub-{uuid.uuid4().hex[:12]}"
+    headers = rate_limit_headers(config["requests_per_minute"] - 1)
+    
+    if body.get("stream"):
+        stats["streamed"] += 1
+        
+        async def events():
+            await asyncio.sleep(latency)
+            words = content.split(" ")
+            for i in range(0, len(words), 3):
+                piece = " ".join(words[i:i + 3]) + (" " if i + 3 < len(words) else "")
+                chunk = {"id": completion_id, "object": "chat.completion.chunk", "choices": [{"index": 0, "delta": {"content": piece}}]}
+                yield f"data: {json.dumps(chunk)}\n\n"
+                await asyncio.sleep(config["token_delay"])
+            final = {"id": completion_id, "object": "chat.completion.chunk", "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}], "x_groq": {"usage": usage}}
+            yield f"data: {json.dumps(final)}\n\n"
+            yield "data: [DONE]\n\n"
+        
+        return StreamingResponse(events(), media_type="text/event-stream", headers=headers)
+    
+    await asyncio.sleep(latency + config["token_delay"] * math.ceil(len(content) / 12))
+    stats["completed"] += 1
+    return JSONResponse(
+        content={
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": usage
+        },
+        headers=headers
+    )
+
+@app.post("/_stub/config")
+async def update_config(request: Request):
+    updates = await request.json()
+    unknown = set(updates) - set(config)
+    if unknown:
+        return JSONResponse(status_code=400, content={"error": f"Unknown keys: {sorted(unknown)}"})
+    if "latency" in updates:
+        sample_latency(updates["latency"])
+    config.update(updates)
+    if updates.get("seed") is not None:
+        random.seed(updates["seed"])
+    return config
+
+@app.get("/_stub/stats")
+async def get_stats():
+    return {"config": config, "stats": dict(stats)}
+
+@app.post("/_stub/reset")
+async def reset_stats():
+    stats.clear()
+    return {"stats": {}}
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI-compatible chat completions stub")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--latency", default=config["latency"], help="fixed:S | uniform:LOW,HIGH | normal:MEAN,STD | lognormal:MU,SIGMA | exp:MEAN")
+    parser.add_argument("--token-delay", type=float, default=config["token_delay"], help="Seconds per streamed chunk")
+    parser.add_argument("--rate-429", type=float, default=config["rate_429"], help="Fraction of requests answered with 429")
+    parser.add_argument("--rate-5xx", type=float, default=config["rate_5xx"], help="Fraction of requests answered with 503")
+    parser.add_argument("--retry-after", type=float, default=config["retry_after"])
+    parser.add_argument("--requests-per-minute", type=int, default=config["requests_per_minute"])
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    
+    sample_latency(args.latency)
+    config.update({
+        "latency": args.latency,
+        "token_delay": args.token_delay,
+        "rate_429": args.rate_429,
+        "rate_5xx": args.rate_5xx,
+        "retry_after": args.retry_after,
+        "requests_per_minute": args.requests_per_minute,
+        "seed": args.seed
+    })
+    if args.seed is not None:
+        random.seed(args.seed)
+    
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
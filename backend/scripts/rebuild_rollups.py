@@ -0,0 +1,98 @@
+"""
+Rebuild the daily_rollups collection from raw check-ins
+
+Usage:
+    python scripts/rebuild_rollups.py --days 31
+    python scripts/rebuild_rollups.py --since 2024-01-01 --dry-run
+
+Recomputes every day from --since (or the last --days days) up to today
+with the same counters record_checkin_rollup applies, replaces those
+rollup documents and removes rollups of days without check-ins. Use it
+after deploying rollups, or to recover from missed updates; check-ins
+persisted while it runs may need another pass.
+"""
+from pathlib import Path
+from datetime import datetime, timedelta
+import argparse
+import asyncio
+import json
+import sys
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.database import init_database, get_checkins_collection, get_daily_rollups_collection
+from app.services.dashboard import rollup_day, rollup_key, rollup_increments, ROLLUP_SCOPE
+
+PROJECTION = {
+    "emp_id": 1,
+    "created_at": 1,
+    "metrics.stress_avg": 1,
+    "metrics.engagement_score": 1,
+    "metrics.audio.dominant_emotion": 1
+}
+
+def apply_checkin(doc: dict, checkin: dict):
+    for field, value in rollup_increments(checkin).items():
+        if field.startswith("emotions."):
+            name = field.split(".", 1)[1]
+            doc["emotions"][name] = doc["emotions"].get(name, 0) + value
+        else:
+            doc[field] = doc.get(field, 0) + value
+    if "emp_id" in checkin and checkin["emp_id"] not in doc["employees"]:
+        doc["employees"].append(checkin["emp_id"])
+
+async def rebuild(since: datetime, dry_run: bool) -> dict:
+    await init_database()
+    rollups = {}
+    
+    cursor = get_checkins_collection().find({"created_at": {"$gte": since}}, PROJECTION).sort("created_at", 1)
+    checkins = 0
+    async for checkin in cursor:
+        day = rollup_day(checkin["created_at"])
+        key = rollup_key(day)
+        if key not in rollups:
+            rollups[key] = {"_id": key, "scope": ROLLUP_SCOPE, "day": day, "employees": [], "emotions": {}}
+        apply_checkin(rollups[key], checkin)
+        checkins += 1
+    
+    removed = 0
+    if not dry_run:
+        collection = get_daily_rollups_collection()
+        now = datetime.utcnow()
+        for key, doc in rollups.items():
+            for field in ("employees", "emotions"):
+                if not doc[field]:
+                    del doc[field]
+            await collection.replace_one({"_id": key}, {**doc, "updated_at": now}, upsert=True)
+        result = await collection.delete_many({
+            "scope": ROLLUP_SCOPE,
+            "day": {"$gte": since},
+            "_id": {"$nin": list(rollups)}
+        })
+        removed = result.deleted_count
+    
+    return {
+        "since": since.date().isoformat(),
+        "checkins": checkins,
+        "days": len(rollups),
+        "removed": removed,
+        "dry_run": dry_run
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild daily dashboard rollups from raw check-ins")
+    parser.add_argument("--days", type=int, default=31, help="Rebuild today and the days before it")
+    parser.add_argument("--since", help="First day to rebuild (YYYY-MM-DD), overrides --days")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+    
+    if args.since:
+        since = datetime.fromisoformat(args.since)
+    else:
+        since = rollup_day(datetime.now()) - timedelta(days=args.days - 1)
+    
+    result = asyncio.run(rebuild(rollup_day(since), args.dry_run))
+    print(json.dumps(result, indent=2))
+
+if __name__ == "__main__":
+    main()